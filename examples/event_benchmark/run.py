@@ -0,0 +1,109 @@
+"""
+Microbenchmark of tick dispatch throughput in EventEngine and
+BatchEventEngine.
+
+Every tick is pushed through BaseGateway.on_tick, so it is delivered
+to both generic (EVENT_TICK) and per-symbol (EVENT_TICK + vt_symbol)
+handlers, the same way as in live trading.
+"""
+
+from datetime import datetime
+from threading import Event as Signal
+from time import perf_counter
+
+from vnpy.event import Event, EventEngine, BatchEventEngine
+from vnpy.trader.constant import Exchange
+from vnpy.trader.event import EVENT_TICK
+from vnpy.trader.gateway import BaseGateway
+from vnpy.trader.object import TickData
+
+
+SYMBOL_COUNT = 2000
+TICK_COUNT = 200_000
+GENERAL_HANDLER_COUNT = 1
+TICK_HANDLER_COUNT = 3
+
+
+class BenchmarkGateway(BaseGateway):
+    """
+    Gateway which only pushes data into event engine.
+    """
+
+    def __init__(self, event_engine: EventEngine):
+        """"""
+        super().__init__(event_engine, "BENCHMARK")
+
+    def connect(self, setting: dict) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def subscribe(self, req) -> None:
+        pass
+
+    def send_order(self, req) -> str:
+        return ""
+
+    def cancel_order(self, req) -> None:
+        pass
+
+    def query_account(self) -> None:
+        pass
+
+    def query_position(self) -> None:
+        pass
+
+
+def run_benchmark(event_engine: EventEngine) -> float:
+    """
+    Return events processed per second.
+    """
+    ticks = [
+        TickData(
+            gateway_name="BENCHMARK",
+            symbol=f"s{i}",
+            exchange=Exchange.SHFE,
+            datetime=datetime.now(),
+            last_price=i
+        )
+        for i in range(SYMBOL_COUNT)
+    ]
+
+    finished = Signal()
+    counter = {"count": 0}
+    # Each tick is distributed to generic and per-symbol handlers
+    total = TICK_COUNT * (TICK_HANDLER_COUNT + 1 + GENERAL_HANDLER_COUNT * 2)
+
+    def handler(event: Event) -> None:
+        counter["count"] += 1
+        if counter["count"] == total:
+            finished.set()
+
+    for n in range(GENERAL_HANDLER_COUNT):
+        event_engine.register_general(lambda event: handler(event))
+
+    for n in range(TICK_HANDLER_COUNT):
+        event_engine.register(EVENT_TICK, lambda event: handler(event))
+
+    for tick in ticks:
+        event_engine.register(EVENT_TICK + tick.vt_symbol, handler)
+
+    gateway = BenchmarkGateway(event_engine)
+    event_engine.start()
+
+    start = perf_counter()
+    for i in range(TICK_COUNT):
+        gateway.on_tick(ticks[i % SYMBOL_COUNT])
+    finished.wait()
+    cost = perf_counter() - start
+
+    event_engine.stop()
+
+    return TICK_COUNT / cost
+
+
+if __name__ == "__main__":
+    for engine_class in [EventEngine, BatchEventEngine]:
+        result = run_benchmark(engine_class())
+        print(f"{engine_class.__name__}:\t{result:,.0f} ticks/sec")
@@ -0,0 +1,67 @@
+"""
+Benchmark of serializers used by RpcServer and RpcClient.
+
+Each message is a tick event published by RpcEngine, the most frequent
+message sent from server to client.
+"""
+
+from datetime import datetime
+from time import perf_counter
+
+from pytz import timezone
+
+from vnpy.event import Event
+from vnpy.rpc import PickleSerializer, CompactSerializer, Serializer
+from vnpy.trader.constant import Exchange
+from vnpy.trader.event import EVENT_TICK
+from vnpy.trader.object import TickData
+
+
+MESSAGE_COUNT = 100_000
+
+def create_message() -> list:
+    """"""
+    tick = TickData(
+        gateway_name="CTP",
+        symbol="rb2010",
+        exchange=Exchange.SHFE,
+        datetime=timezone("Asia/Shanghai").localize(datetime(2020, 7, 1, 9, 30, 1, 500000)),
+        name="螺纹钢2010",
+        volume=123456,
+        open_interest=1000000,
+        last_price=3500.2,
+        limit_up=3850.6,
+        limit_down=3149.8,
+        bid_price_1=3500,
+        ask_price_1=3500.4,
+        bid_volume_1=10,
+        ask_volume_1=20
+    )
+    return ["", Event(EVENT_TICK, tick)]
+
+
+def run_benchmark(serializer: Serializer) -> None:
+    """"""
+    message = create_message()
+    data = serializer.dumps(message)
+
+    start = perf_counter()
+    for _ in range(MESSAGE_COUNT):
+        serializer.dumps(message)
+    dumps_cost = perf_counter() - start
+
+    start = perf_counter()
+    for _ in range(MESSAGE_COUNT):
+        serializer.loads(data)
+    loads_cost = perf_counter() - start
+
+    print(
+        f"{serializer.__class__.__name__}:\t{len(data)} bytes, "
+        f"dumps {dumps_cost / MESSAGE_COUNT * 1e6:.2f}us, "
+        f"loads {loads_cost / MESSAGE_COUNT * 1e6:.2f}us"
+    )
+
+
+if __name__ == "__main__":
+    for serializer_class in [PickleSerializer, CompactSerializer]:
+        run_benchmark(serializer_class())
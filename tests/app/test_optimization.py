@@ -0,0 +1,101 @@
+"""
+Test if optimization in process pool gets the same result as running
+backtesting with each setting
+"""
+import unittest
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from vnpy.app.cta_strategy.backtesting import (
+    BacktestingEngine,
+    OptimizationSetting,
+    optimize
+)
+from vnpy.app.cta_strategy.strategies.double_ma_strategy import DoubleMaStrategy
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.frame import BarFrame
+
+
+class TestOptimization(unittest.TestCase):
+
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        size = 240 * 20
+
+        close_price = np.round(3000 + np.cumsum(rng.normal(0, 2, size)))
+        open_price = np.roll(close_price, 1)
+        open_price[0] = close_price[0]
+        start = datetime(2020, 1, 1)
+
+        self.frame = BarFrame(
+            "DB",
+            "rb2010",
+            Exchange.SHFE,
+            [start + timedelta(minutes=i * 6) for i in range(size)],
+            interval=Interval.MINUTE,
+            volume=np.full(size, 100),
+            open_price=open_price,
+            high_price=np.maximum(open_price, close_price) + 1,
+            low_price=np.minimum(open_price, close_price) - 1,
+            close_price=close_price,
+        )
+
+        self.engine = BacktestingEngine()
+        self.engine.output = lambda msg: None
+        self.engine.set_parameters(
+            vt_symbol="rb2010.SHFE",
+            interval=Interval.MINUTE,
+            start=start,
+            end=start + timedelta(days=20),
+            rate=1e-4,
+            slippage=1,
+            size=10,
+            pricetick=1,
+            capital=1_000_000,
+        )
+        self.engine.add_strategy(DoubleMaStrategy, {})
+
+        # History is loaded in main process only and passed to the pool
+        self.engine.load_frame = lambda: self.frame
+
+    def test_run_optimization(self):
+        setting = OptimizationSetting()
+        setting.set_target("total_net_pnl")
+        setting.add_parameter("fast_window", 5, 10, 5)
+        setting.add_parameter("slow_window", 20, 30, 10)
+
+        results = self.engine.run_optimization(setting, output=False)
+        self.assertEqual(len(results), 4)
+
+        values = [value for _, value, _ in results]
+        self.assertEqual(values, sorted(values, reverse=True))
+
+        engine = self.engine
+        for strategy_setting in setting.generate_setting():
+            expected = optimize(
+                "total_net_pnl",
+                DoubleMaStrategy,
+                strategy_setting,
+                engine.vt_symbol,
+                engine.interval,
+                engine.start,
+                engine.rate,
+                engine.slippage,
+                engine.size,
+                engine.pricetick,
+                engine.capital,
+                engine.end,
+                engine.mode,
+                engine.inverse,
+                history=self.frame
+            )
+            result = next(r for r in results if r[0] == expected[0])
+            self.assertAlmostEqual(result[1], expected[1])
+            self.assertEqual(
+                result[2]["total_trade_count"],
+                expected[2]["total_trade_count"]
+            )
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+"""
+Test if stop order book finds the same orders as a linear scan
+"""
+import random
+import unittest
+
+from vnpy.app.cta_strategy.base import StopOrder, StopOrderBook
+from vnpy.trader.constant import Direction, Offset
+
+
+class TestStopOrderBook(unittest.TestCase):
+
+    def test_triggered(self):
+        random.seed(0)
+
+        book = StopOrderBook()
+        orders = {}
+
+        for i in range(500):
+            stop_order = StopOrder(
+                vt_symbol=random.choice(["rb2010.SHFE", "IF2006.CFFEX"]),
+                direction=random.choice([Direction.LONG, Direction.SHORT]),
+                offset=Offset.OPEN,
+                price=random.randint(90, 110),
+                volume=1,
+                stop_orderid=f"STOP.{i}",
+                strategy_name="test",
+            )
+            book.add(stop_order)
+            orders[stop_order.stop_orderid] = stop_order
+
+            # Cancel some orders randomly
+            if random.random() < 0.3:
+                stop_orderid = random.choice(list(orders.keys()))
+                self.assertIs(book.pop(stop_orderid), orders.pop(stop_orderid))
+
+        self.assertEqual(len(book), len(orders))
+        self.assertIsNone(book.pop("STOP.unknown"))
+
+        for long_price, short_price in [(95, 105), (100, 100), (80, 120), (120, 80)]:
+            expected = [
+                stop_order for stop_order in orders.values()
+                if stop_order.vt_symbol == "rb2010.SHFE" and (
+                    (stop_order.direction == Direction.LONG and stop_order.price <= long_price)
+                    or (stop_order.direction == Direction.SHORT and stop_order.price >= short_price)
+                )
+            ]
+            triggered = book.get_triggered("rb2010.SHFE", long_price, short_price)
+            self.assertEqual(triggered, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
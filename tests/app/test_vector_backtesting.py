@@ -0,0 +1,235 @@
+"""
+Test if vectorized backtesting gets the same result as event-driven one
+"""
+import unittest
+from datetime import datetime, timedelta
+
+import numpy as np
+import talib
+
+from vnpy.app.cta_strategy.backtesting import BacktestingEngine
+from vnpy.app.cta_strategy.strategies.double_ma_strategy import DoubleMaStrategy
+from vnpy.app.cta_strategy.strategies.multi_timeframe_strategy import (
+    MultiTimeframeStrategy
+)
+from vnpy.app.cta_strategy.vector import VectorBacktestingEngine, get_start_index
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.frame import BarFrame
+
+
+def double_ma_signal(frame: BarFrame, fast_window: int, slow_window: int) -> np.ndarray:
+    fast_ma = talib.SMA(frame.close_price, fast_window)
+    slow_ma = talib.SMA(frame.close_price, slow_window)
+
+    cross_over = (fast_ma[1:] > slow_ma[1:]) & (fast_ma[:-1] < slow_ma[:-1])
+    cross_below = (fast_ma[1:] < slow_ma[1:]) & (fast_ma[:-1] > slow_ma[:-1])
+
+    signal = np.full(len(frame), np.nan)
+    signal[1:][cross_over] = 1
+    signal[1:][cross_below] = -1
+
+    # ArrayManager of strategy is inited after 100 bars
+    signal[:99] = np.nan
+    return signal
+
+
+def multi_timeframe_signal(
+    frame: BarFrame,
+    start_ix: int,
+    rsi_signal: int,
+    rsi_window: int,
+    fast_window: int,
+    slow_window: int,
+    fixed_size: int
+) -> np.ndarray:
+    close_price = frame.close_price
+    minute = frame.datetime.astype("datetime64[m]").astype(np.int64) % 60
+
+    # Index of 1 minute bar which completes a window bar
+    end_5 = np.flatnonzero((minute + 1) % 5 == 0)
+    end_15 = np.flatnonzero((minute + 1) % 15 == 0)
+
+    close_15 = close_price[end_15]
+    ma_trend = np.where(
+        talib.SMA(close_15, fast_window) > talib.SMA(close_15, slow_window), 1, -1
+    )
+    ma_trend[:99] = 0
+
+    # 5 minute bar is pushed before 15 minute bar of the same minute,
+    # so it uses trend of 15 minute bars completed before.
+    trend_ix = np.searchsorted(end_15, end_5) - 1
+
+    close_5 = close_price[end_5]
+    signal = np.full(len(frame), np.nan)
+    pos = 0
+
+    for n, ix in enumerate(end_5.tolist()):
+        trend = ma_trend[trend_ix[n]] if trend_ix[n] >= 0 else 0
+        if n < 99 or not trend:
+            continue
+
+        # RSI of ArrayManager is calculated with its last 100 bars only
+        rsi_value = talib.RSI(close_5[n - 99:n + 1], rsi_window)[-1]
+
+        target = pos
+        if pos == 0:
+            if trend > 0 and rsi_value >= 50 + rsi_signal:
+                target = fixed_size
+            elif trend < 0 and rsi_value <= 50 - rsi_signal:
+                target = -fixed_size
+        elif pos > 0:
+            if trend < 0 or rsi_value < 50:
+                target = 0
+        elif pos < 0:
+            if trend > 0 or rsi_value > 50:
+                target = 0
+
+        signal[ix] = target
+
+        # Order is always filled on next bar, but only after trading starts
+        if ix >= start_ix:
+            pos = target
+
+    return signal
+
+
+def create_frame(size: int, minutes: int, start: datetime) -> BarFrame:
+    rng = np.random.default_rng(0)
+
+    close_price = np.round(3000 + np.cumsum(rng.normal(0, 2, size)))
+    # No gap between bars, so that every order is filled on next bar
+    open_price = np.roll(close_price, 1)
+    open_price[0] = close_price[0]
+
+    return BarFrame(
+        "DB",
+        "rb2010",
+        Exchange.SHFE,
+        [start + timedelta(minutes=i * minutes) for i in range(size)],
+        interval=Interval.MINUTE,
+        volume=np.full(size, 100),
+        open_price=open_price,
+        high_price=np.maximum(open_price, close_price) + 1,
+        low_price=np.minimum(open_price, close_price) - 1,
+        close_price=close_price,
+    )
+
+
+class TestVectorBacktesting(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.start = datetime(2020, 1, 1)
+        self.parameters = dict(
+            vt_symbol="rb2010.SHFE",
+            interval=Interval.MINUTE,
+            start=self.start,
+            end=self.start + timedelta(days=30),
+            rate=1e-4,
+            slippage=1,
+            size=10,
+            pricetick=1,
+            capital=1_000_000,
+        )
+
+    def assert_same_result(
+        self,
+        frame: BarFrame,
+        strategy_class: type,
+        setting: dict,
+        target,
+        **kwargs
+    ):
+        engine = BacktestingEngine()
+        engine.output = lambda msg: None
+        engine.set_parameters(**self.parameters)
+        engine.add_strategy(strategy_class, setting)
+        engine.history_data = frame.to_rows()
+        engine.run_backtesting()
+        df = engine.calculate_result()
+        statistics = engine.calculate_statistics(output=False)
+
+        vector_engine = VectorBacktestingEngine()
+        vector_engine.output = lambda msg: None
+        vector_engine.set_parameters(**self.parameters)
+        vector_engine.frame = frame
+        vector_engine.run_backtesting(target, days=10, **kwargs)
+        vector_df = vector_engine.calculate_result()
+        vector_statistics = vector_engine.calculate_statistics(output=False)
+
+        trades = [
+            (t.datetime, t.direction, t.offset, t.price, t.volume)
+            for t in engine.get_all_trades()
+        ]
+        vector_trades = [
+            (t.datetime, t.direction, t.offset, t.price, t.volume)
+            for t in vector_engine.get_all_trades()
+        ]
+        self.assertTrue(trades)
+        self.assertEqual(trades, vector_trades)
+
+        columns = list(vector_df.columns)
+        np.testing.assert_allclose(
+            df[columns].astype(float).values, vector_df.values.astype(float)
+        )
+        for key, value in statistics.items():
+            if isinstance(value, float):
+                self.assertAlmostEqual(value, vector_statistics[key], places=6)
+            else:
+                self.assertEqual(value, vector_statistics[key])
+
+    def test_start_index(self):
+        frame = create_frame(240 * 30, 6, self.start)
+        start_ix = get_start_index(frame.datetime, 10)
+
+        engine = BacktestingEngine()
+        engine.output = lambda msg: None
+        engine.set_parameters(**self.parameters)
+        engine.add_strategy(DoubleMaStrategy, {})
+        engine.history_data = frame.to_rows()
+
+        replayed = []
+        engine.new_bar = replayed.append
+        engine.run_backtesting()
+
+        # The first bar of 10th day ends initializing and is not replayed
+        end_bar = frame[start_ix - 1]
+        self.assertEqual((end_bar.datetime - frame[0].datetime).days, 9)
+        self.assertNotEqual(end_bar.datetime.day, frame[start_ix - 2].datetime.day)
+
+        self.assertEqual(len(replayed), len(frame) - start_ix)
+        self.assertEqual(replayed[0].datetime, frame[start_ix].datetime)
+
+    def test_double_ma(self):
+        frame = create_frame(240 * 30, 6, self.start)
+        setting = {"fast_window": 5, "slow_window": 30}
+
+        self.assert_same_result(
+            frame,
+            DoubleMaStrategy,
+            setting,
+            lambda frame: double_ma_signal(frame, **setting)
+        )
+
+    def test_multi_timeframe(self):
+        frame = create_frame(1440 * 20, 1, self.start)
+        setting = {
+            "rsi_signal": 20,
+            "rsi_window": 14,
+            "fast_window": 5,
+            "slow_window": 20,
+            "fixed_size": 1,
+        }
+        start_ix = get_start_index(frame.datetime, 10)
+
+        self.assert_same_result(
+            frame,
+            MultiTimeframeStrategy,
+            setting,
+            lambda frame: multi_timeframe_signal(frame, start_ix, **setting),
+            long_price=frame.close_price + 5,
+            short_price=frame.close_price - 5,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
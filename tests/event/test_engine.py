@@ -0,0 +1,203 @@
+"""
+Test if event engines distribute events correctly
+"""
+import unittest
+from collections import defaultdict
+from threading import Event as Signal, current_thread
+from types import SimpleNamespace
+
+from vnpy.event import (
+    Event,
+    EventEngine,
+    BatchEventEngine,
+    ShardedEventEngine,
+    EVENT_TIMER,
+    EVENT_STATISTICS,
+    AFFINITY_KEY
+)
+
+
+class TestEventEngine(unittest.TestCase):
+
+    def run_engine(self, event_engine: EventEngine, events: list) -> list:
+        received = []
+        finished = Signal()
+
+        def process_event(event: Event):
+            received.append((event.type, event.data))
+
+        def process_general_event(event: Event):
+            if event.type == EVENT_TIMER:
+                return
+
+            received.append(("general", event.type))
+            if event.type == "end":
+                finished.set()
+
+        event_engine.register("eTick.", process_event)
+        event_engine.register("eTick.rb.SHFE", process_event)
+        event_engine.register_general(process_general_event)
+
+        event_engine.start()
+        for event in events:
+            if isinstance(event, list):
+                event_engine.put_group(event)
+            else:
+                event_engine.put(event)
+        event_engine.put(Event("end"))
+
+        finished.wait(5)
+        event_engine.stop()
+        return received
+
+    def test_group_same_as_single(self):
+        single = [Event("eTick.", 1), Event("eTick.rb.SHFE", 1), Event("eLog", 2)]
+        grouped = [[Event("eTick.", 1), Event("eTick.rb.SHFE", 1)], Event("eLog", 2)]
+
+        expected = self.run_engine(EventEngine(), single)
+        self.assertEqual(expected, self.run_engine(EventEngine(), grouped))
+        self.assertEqual(expected, self.run_engine(BatchEventEngine(), single))
+        self.assertEqual(expected, self.run_engine(BatchEventEngine(), grouped))
+
+    def test_unregister(self):
+        event_engine = BatchEventEngine()
+        handler = print
+
+        event_engine.register("eTick.", handler)
+        event_engine.register_general(handler)
+        event_engine.unregister("eTick.", handler)
+        event_engine.unregister_general(handler)
+
+        dispatch, general = event_engine._table
+        self.assertEqual(dispatch, {})
+        self.assertEqual(general, ())
+
+    def test_sharded_order(self):
+        event_engine = ShardedEventEngine(shard_count=4)
+        keyed = defaultdict(list)
+        main_threads = set()
+        finished = Signal()
+        total = 4000
+
+        def process_keyed_event(event: Event):
+            data = event.data
+            keyed[data.vt_symbol].append((data.seq, current_thread().name))
+
+        def process_main_event(event: Event):
+            main_threads.add(current_thread().name)
+            if event.data.seq == total - 1:
+                finished.set()
+
+        event_engine.register("eTick.", process_keyed_event, AFFINITY_KEY)
+        event_engine.register("eTick.", process_main_event)
+        event_engine.start()
+
+        for seq in range(total):
+            data = SimpleNamespace(vt_symbol=f"s{seq % 10}.SHFE", seq=seq)
+            event_engine.put(Event("eTick.", data))
+
+        finished.wait(5)
+        event_engine.stop()
+
+        self.assertEqual(len(main_threads), 1)
+        self.assertEqual(len(keyed), 10)
+        for buf in keyed.values():
+            seqs = [seq for seq, _ in buf]
+            self.assertEqual(seqs, sorted(seqs))
+            self.assertEqual(len({name for _, name in buf}), 1)
+
+    def test_conflated(self):
+        event_engine = EventEngine()
+        received = []
+        blocked = Signal()
+        finished = Signal()
+
+        def process_event(event: Event, dropped: int):
+            blocked.wait(5)
+            received.append((event.data.vt_symbol, event.data.seq, dropped))
+            if len(received) + sum(r[2] for r in received) == 100:
+                finished.set()
+
+        event_engine.register_conflated("eTick.", process_event)
+        event_engine.start()
+
+        for seq in range(100):
+            data = SimpleNamespace(vt_symbol=f"s{seq % 2}.SHFE", seq=seq)
+            event_engine.put(Event("eTick.", data))
+
+        # Wait till all events are put into conflating channel
+        while event_engine._queue.qsize():
+            pass
+        blocked.set()
+
+        finished.wait(5)
+        dropped_count = event_engine.get_conflated_dropped_count("eTick.", process_event)
+        event_engine.stop()
+
+        latest = {vt_symbol: seq for vt_symbol, seq, _ in received}
+        self.assertEqual(latest, {"s0.SHFE": 98, "s1.SHFE": 99})
+        self.assertEqual(len(received) + sum(r[2] for r in received), 100)
+        self.assertEqual(dropped_count, sum(r[2] for r in received))
+
+    def test_conflated_key(self):
+        event_engine = EventEngine()
+        received = {}
+        finished = Signal()
+
+        def process_event(event: Event, dropped: int):
+            received[event.data.name] = event.data.seq
+            if received == {"a": 98, "b": 99}:
+                finished.set()
+
+        event_engine.register_conflated("eSpreadData", process_event, "name")
+        event_engine.start()
+
+        for seq in range(100):
+            data = SimpleNamespace(name="ab"[seq % 2], seq=seq)
+            event_engine.put(Event("eSpreadData", data))
+
+        finished.wait(5)
+        event_engine.stop()
+
+        self.assertEqual(received, {"a": 98, "b": 99})
+
+    def test_statistics(self):
+        for engine_class in [EventEngine, BatchEventEngine, ShardedEventEngine]:
+            event_engine = engine_class()
+            snapshots = []
+            finished = Signal()
+
+            def process_event(event: Event):
+                pass
+
+            def process_statistics_event(event: Event):
+                snapshots.append(event.data)
+                finished.set()
+
+            event_engine.register("eTick.", process_event)
+            event_engine.register(EVENT_STATISTICS, process_statistics_event)
+
+            self.assertEqual(event_engine.get_statistics(), {})
+            event_engine.enable_statistics()
+            event_engine.start()
+
+            for i in range(100):
+                event_engine.put(Event("eTick.", i))
+
+            finished.wait(5)
+            event_engine.stop()
+
+            data = snapshots[0]
+            self.assertGreaterEqual(data["max_queue_depth"], 0)
+            self.assertEqual(data["types"]["eTick."]["wait"]["count"], 100)
+            self.assertEqual(sum(data["types"]["eTick."]["process"]["histogram"]), 100)
+
+            name = process_event.__qualname__
+            self.assertEqual(data["handlers"][name]["count"], 100)
+
+            event_engine.disable_statistics()
+            self.assertEqual(event_engine.get_statistics(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
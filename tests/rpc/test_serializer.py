@@ -0,0 +1,78 @@
+"""
+Test if data objects are restored exactly by compact serializer
+"""
+import unittest
+from datetime import datetime
+
+from pytz import timezone
+
+from vnpy.event import Event
+from vnpy.rpc.serializer import CompactSerializer, PickleSerializer
+from vnpy.trader.constant import Direction, Exchange, Interval, Product
+from vnpy.trader.object import BarData, ContractData, OrderData, TickData
+
+
+class TestSerializer(unittest.TestCase):
+
+    def test_compact(self):
+        tz = timezone("Asia/Shanghai")
+        tick = TickData(
+            gateway_name="CTP",
+            symbol="rb2010",
+            exchange=Exchange.SHFE,
+            datetime=tz.localize(datetime(2020, 7, 1, 9, 30, 1, 500000)),
+            name="螺纹钢2010",
+            last_price=3500.2,
+            bid_price_1=3500,
+            ask_price_1=3500.4,
+        )
+        bar = BarData(
+            gateway_name="DB",
+            symbol="rb2010",
+            exchange=Exchange.SHFE,
+            datetime=datetime(2020, 7, 1, 9, 30),
+            interval=Interval.MINUTE,
+            close_price=3500.2
+        )
+        order = OrderData(
+            gateway_name="CTP",
+            symbol="rb2010",
+            exchange=Exchange.SHFE,
+            orderid="1_1_1",
+            direction=Direction.LONG,
+            price=3500,
+            volume=1
+        )
+        contract = ContractData(
+            gateway_name="CTP",
+            symbol="rb2010",
+            exchange=Exchange.SHFE,
+            name="螺纹钢2010",
+            product=Product.FUTURES,
+            size=10,
+            pricetick=1
+        )
+
+        # Unexpected field value falls back to standard pickle
+        unexpected = OrderData("CTP", "rb2010", Exchange.SHFE, "1_1_2")
+        unexpected.price = None
+
+        message = ["", Event("eTick.", tick), [bar, order, contract, unexpected]]
+
+        compact = CompactSerializer()
+        pickle = PickleSerializer()
+        data = compact.dumps(message)
+
+        self.assertLess(len(data), len(pickle.dumps(message)))
+
+        for result in [compact.loads(data), pickle.loads(data)]:
+            self.assertEqual(result[1].type, "eTick.")
+            self.assertEqual(result[1].data, tick)
+            self.assertEqual(result[1].data.__dict__, tick.__dict__)
+            self.assertEqual(result[1].data.datetime.utcoffset(), tick.datetime.utcoffset())
+            self.assertEqual(result[2], [bar, order, contract, unexpected])
+            self.assertEqual(result[2][1].vt_orderid, order.vt_orderid)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+"""
+Test if orders are served while slow requests are still in flight
+"""
+import time
+import unittest
+
+from vnpy.rpc import RpcClient, RpcServer, RemoteException
+
+
+REP_ADDRESS = "tcp://127.0.0.1:32014"
+PUB_ADDRESS = "tcp://127.0.0.1:34102"
+
+
+def send_order(value: int) -> int:
+    return value
+
+
+def query_history(seconds: float) -> float:
+    time.sleep(seconds)
+    return seconds
+
+
+def fail() -> None:
+    raise ValueError("fail")
+
+
+class EchoClient(RpcClient):
+
+    def callback(self, topic, data):
+        pass
+
+
+class TestServer(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.server = RpcServer()
+        self.server.register(send_order, high_priority=True)
+        self.server.register(query_history)
+        self.server.register(fail)
+        self.server.start(REP_ADDRESS, PUB_ADDRESS, worker_count=2)
+
+        self.client = EchoClient()
+        self.client.start(REP_ADDRESS, PUB_ADDRESS)
+
+    def tearDown(self) -> None:
+        self.client.stop()
+        self.server.stop()
+        self.client.join()
+        self.server.join()
+
+    def test_priority(self):
+        # All workers of normal lane are busy with slow queries
+        futures = [self.client.call_async("query_history", 1) for _ in range(3)]
+        time.sleep(0.1)
+
+        start = time.perf_counter()
+        results = [self.client.call_async("send_order", i) for i in range(100)]
+        self.assertEqual([future.result(1) for future in results], list(range(100)))
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+        self.assertEqual([future.result(3) for future in futures], [1, 1, 1])
+
+        with self.assertRaises(RemoteException):
+            self.client.fail()
+
+        with self.assertRaises(RemoteException):
+            self.client.query_history(1, timeout=100)
+
+
+if __name__ == "__main__":
+    unittest.main()
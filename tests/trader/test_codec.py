@@ -0,0 +1,59 @@
+"""
+Test if tick frame is restored exactly after encoding and decoding
+"""
+import unittest
+
+import numpy as np
+
+from vnpy.trader.codec import decode_ticks, encode_ticks
+from vnpy.trader.constant import Exchange
+from vnpy.trader.frame import TickFrame
+
+
+class TestCodec(unittest.TestCase):
+
+    def test_encode_ticks(self):
+        rng = np.random.default_rng(0)
+        count = 10_000
+
+        datetimes = np.datetime64("2020-07-01T09:00:00", "us") + np.cumsum(
+            rng.integers(0, 1_000_000, count)
+        ).astype("timedelta64[us]")
+        last_price = 3500 + np.cumsum(rng.integers(-1, 2, count)) * 0.2
+
+        frame = TickFrame(
+            "DB",
+            "rb2010",
+            Exchange.SHFE,
+            datetimes,
+            name="螺纹钢2010",
+            last_price=last_price,
+            volume=np.cumsum(rng.integers(0, 100, count)).astype(float),
+            bid_price_1=last_price - 0.2,
+            ask_price_1=last_price + 0.2,
+            bid_volume_1=rng.integers(1, 500, count).astype(float),
+            limit_up=np.full(count, 3850.6),
+            open_interest=rng.random(count),     # cannot be quantized
+        )
+
+        data = encode_ticks(frame)
+        result = decode_ticks(data)
+
+        # Fixed width records take 248 bytes per tick
+        self.assertLess(len(data), count * 248 / 10)
+
+        self.assertEqual(result.vt_symbol, frame.vt_symbol)
+        self.assertEqual(result.name, frame.name)
+        np.testing.assert_array_equal(result.datetime, frame.datetime)
+
+        for name in TickFrame.float_fields:
+            np.testing.assert_array_equal(
+                result.columns[name], frame.columns[name], err_msg=name
+            )
+
+        empty = decode_ticks(encode_ticks(frame[:0]))
+        self.assertEqual(len(empty), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
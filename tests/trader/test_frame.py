@@ -0,0 +1,150 @@
+"""
+Test if compact data objects and frames keep data unchanged
+"""
+import pickle
+import unittest
+from copy import copy
+from datetime import datetime, timedelta, timezone
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader import frame as frame_module
+from vnpy.trader.frame import (
+    BarFrame, FrameChain, FrameStream, SharedFrame, TickFrame, SHARED_MEMORY_AVAILABLE
+)
+from vnpy.trader.object import BarData, SlotBarData, SlotTickData, TickData
+
+
+class TestFrame(unittest.TestCase):
+
+    def create_bars(self, count: int) -> list:
+        start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+        return [
+            BarData(
+                gateway_name="DB",
+                symbol="rb2010",
+                exchange=Exchange.SHFE,
+                datetime=start + timedelta(minutes=i),
+                interval=Interval.MINUTE,
+                volume=i,
+                open_price=i,
+                high_price=i + 2,
+                low_price=i - 2,
+                close_price=i + 1,
+            )
+            for i in range(count)
+        ]
+
+    def test_slot_data(self):
+        tick = SlotTickData(
+            gateway_name="DB",
+            symbol="rb2010",
+            exchange=Exchange.SHFE,
+            datetime=datetime(2020, 1, 1),
+            last_price=3500,
+        )
+        other = TickData(
+            gateway_name="DB",
+            symbol="rb2010",
+            exchange=Exchange.SHFE,
+            datetime=datetime(2020, 1, 1),
+            last_price=3500,
+        )
+
+        self.assertIs(tick.vt_symbol, SlotTickData("DB", "rb2010", Exchange.SHFE, None).vt_symbol)
+        self.assertEqual(tick.vt_symbol, other.vt_symbol)
+        self.assertEqual(tick.__dict__, other.__dict__)
+        self.assertEqual(copy(tick), tick)
+        self.assertEqual(pickle.loads(pickle.dumps(tick)), tick)
+
+        with self.assertRaises(AttributeError):
+            tick.unknown_field = 1
+
+    def test_bar_frame(self):
+        bars = self.create_bars(100)
+        frame = BarFrame.from_rows(bars)
+
+        self.assertEqual(len(frame), 100)
+        self.assertEqual(frame.interval, Interval.MINUTE)
+        self.assertEqual(frame.close_price[10], 11)
+
+        rows = frame.to_rows()
+        for bar, row in zip(bars, rows):
+            self.assertIsInstance(row, SlotBarData)
+            self.assertEqual(bar.__dict__, row.__dict__)
+
+        self.assertEqual(frame[-1], rows[-1])
+
+        part = frame[10:20]
+        self.assertEqual(len(part), 10)
+        self.assertEqual(part[0], rows[10])
+
+    def test_tick_frame(self):
+        ticks = [
+            TickData(
+                gateway_name="DB",
+                symbol="rb2010",
+                exchange=Exchange.SHFE,
+                datetime=datetime(2020, 1, 1, 9, 0, i),
+                name="螺纹钢2010",
+                last_price=3500 + i,
+                ask_volume_5=i,
+            )
+            for i in range(10)
+        ]
+        frame = TickFrame.from_rows(ticks)
+
+        for tick, row in zip(ticks, frame):
+            self.assertEqual(tick.__dict__, row.__dict__)
+
+    def test_frame_chain(self):
+        bars = self.create_bars(100)
+        frame = BarFrame.from_rows(bars)
+
+        # Rows are created chunk by chunk across frames chained
+        chunk_size = frame_module.ITER_CHUNK_SIZE
+        frame_module.ITER_CHUNK_SIZE = 7
+        try:
+            chain = FrameChain([frame[:30], frame[30:30], frame[30:]])
+            rows = list(chain)
+        finally:
+            frame_module.ITER_CHUNK_SIZE = chunk_size
+
+        self.assertEqual(len(chain), 100)
+        self.assertEqual(rows, frame.to_rows())
+
+    def test_frame_stream(self):
+        frame = BarFrame.from_rows(self.create_bars(100))
+        loaded = []
+
+        def loader():
+            for i in range(0, 100, 30):
+                loaded.append(i)
+                yield frame[i:i + 30]
+
+        stream = FrameStream(loader)
+        self.assertEqual(loaded, [])
+        self.assertIsNone(stream.size)
+
+        # Frames are loaded lazily and again for every iteration
+        self.assertEqual(list(stream), frame.to_rows())
+        self.assertEqual(list(stream), frame.to_rows())
+        self.assertEqual(loaded, [0, 30, 60, 90] * 2)
+        self.assertEqual(stream.size, 100)
+
+    @unittest.skipUnless(SHARED_MEMORY_AVAILABLE, "shared memory requires Python 3.8+")
+    def test_shared_frame(self):
+        frame = BarFrame.from_rows(self.create_bars(100))
+        shared_frame = SharedFrame(frame)
+
+        # Only name of shared memory is pickled
+        attached = pickle.loads(pickle.dumps(shared_frame)).attach()
+
+        self.assertEqual(attached.to_rows(), frame.to_rows())
+        with self.assertRaises(ValueError):
+            attached.close_price[0] = 0
+
+        shared_frame.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
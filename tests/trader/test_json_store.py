@@ -0,0 +1,66 @@
+"""
+Test if json store saves all changes and recovers them from journal
+"""
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from vnpy.trader.utility import JsonStore, load_json
+
+
+class TestJsonStore(unittest.TestCase):
+
+    def setUp(self) -> None:
+        # Absolute path is used as it is, instead of under .vntrader folder
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.filepath = Path(self.temp_dir.name).joinpath("test_json_store.json")
+        self.journal_path = self.filepath.with_name(self.filepath.name + ".journal")
+        self.filename = str(self.filepath)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_write_behind(self):
+        store = JsonStore(self.filename, interval=60)
+        self.assertEqual(store.load(), {})
+
+        for i in range(1000):
+            store.set(f"strategy{i % 10}", {"pos": i})
+        store.remove("strategy0")
+
+        # Changes are saved at once when flushed, without waiting for interval
+        store.flush()
+        self.assertEqual(len(load_json(self.filename)), 9)
+        self.assertFalse(self.journal_path.exists())
+
+        store.set("strategy1", {"pos": -1})
+        store.close()
+
+        data = load_json(self.filename)
+        self.assertEqual(data["strategy1"], {"pos": -1})
+        self.assertEqual(data["strategy9"], {"pos": 999})
+        self.assertNotIn("strategy0", data)
+
+    def test_recover(self):
+        store = JsonStore(self.filename)
+        store.load()
+        store.set("a", 1)
+        store.close()
+
+        # Journal left by crashed programme, with the last record half written
+        with open(self.journal_path, mode="w", encoding="UTF-8") as f:
+            f.write(json.dumps(["b", [1, 2]]) + "\n")
+            f.write(json.dumps(["a"]) + "\n")
+            f.write('["c", ')
+
+        store = JsonStore(self.filename)
+        self.assertEqual(store.load(), {"b": [1, 2]})
+        store.close()
+
+        self.assertEqual(load_json(self.filename), {"b": [1, 2]})
+        self.assertFalse(self.journal_path.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+"""
+Test if vectorized daily result is the same as calculated day by day
+"""
+import unittest
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from vnpy.app.cta_strategy.backtesting import DailyResult
+from vnpy.trader.constant import Direction, Exchange, Offset
+from vnpy.trader.object import TradeData
+from vnpy.trader.statistics import (
+    calculate_daily_pnl,
+    calculate_statistics,
+    create_daily_df,
+    get_trade_arrays
+)
+
+
+class TestStatistics(unittest.TestCase):
+
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        start = date(2020, 1, 1)
+
+        self.dates = [start + timedelta(days=i) for i in range(50)]
+        self.close_prices = np.round(100 + np.cumsum(rng.normal(0, 1, 50)), 2)
+
+        self.trades = []
+        for i in range(200):
+            d = self.dates[rng.integers(50)]
+            trade = TradeData(
+                gateway_name="BACKTESTING",
+                symbol="IF2006",
+                exchange=Exchange.CFFEX,
+                orderid=str(i),
+                tradeid=str(i),
+                direction=Direction.LONG if rng.random() > 0.5 else Direction.SHORT,
+                offset=Offset.NONE,
+                price=round(100 + rng.normal(0, 5), 2),
+                volume=int(rng.integers(1, 5)),
+                datetime=datetime(d.year, d.month, d.day, 10),
+            )
+            self.trades.append(trade)
+
+    def calculate_by_object(self, inverse: bool) -> list:
+        daily_results = {
+            d: DailyResult(d, close_price)
+            for d, close_price in zip(self.dates, self.close_prices)
+        }
+        for trade in self.trades:
+            daily_results[trade.datetime.date()].add_trade(trade)
+
+        pre_close = 0
+        start_pos = 0
+        for daily_result in daily_results.values():
+            daily_result.calculate_pnl(pre_close, start_pos, 300, 2.5e-5, 0.2, inverse)
+            pre_close = daily_result.close_price
+            start_pos = daily_result.end_pos
+
+        return list(daily_results.values())
+
+    def test_trade_arrays(self):
+        trade_days, trade_changes, trade_prices = get_trade_arrays(self.trades, self.dates)
+
+        for ix, trade in enumerate(self.trades):
+            self.assertEqual(trade.dict["time"], trade.datetime)
+            self.assertEqual(self.dates[trade_days[ix]], trade.datetime.date())
+            self.assertEqual(abs(trade_changes[ix]), trade.volume)
+            self.assertEqual(trade_prices[ix], trade.price)
+
+    def test_daily_pnl(self):
+        trade_days, trade_changes, trade_prices = get_trade_arrays(self.trades, self.dates)
+
+        for inverse in (False, True):
+            results = calculate_daily_pnl(
+                self.close_prices,
+                trade_days,
+                trade_changes,
+                trade_prices,
+                300,
+                2.5e-5,
+                0.2,
+                inverse
+            )
+
+            daily_results = self.calculate_by_object(inverse)
+            for key, values in results.items():
+                expected = [getattr(r, key) for r in daily_results]
+                np.testing.assert_allclose(values, expected, err_msg=key)
+
+    def test_statistics(self):
+        trade_days, trade_changes, trade_prices = get_trade_arrays(self.trades, self.dates)
+        results = calculate_daily_pnl(
+            self.close_prices, trade_days, trade_changes, trade_prices, 300, 2.5e-5, 0.2
+        )
+        df = create_daily_df(self.dates, results)
+        statistics = calculate_statistics(df, 1_000_000, 0.02)
+
+        balance = df["net_pnl"].cumsum() + 1_000_000
+        drawdown = balance - balance.cummax()
+        max_drawdown_end = drawdown.idxmin()
+        max_drawdown_start = balance[:max_drawdown_end].idxmax()
+
+        self.assertEqual(statistics["total_days"], 50)
+        self.assertEqual(statistics["total_trade_count"], 200)
+        self.assertAlmostEqual(statistics["end_balance"], balance.iloc[-1])
+        self.assertAlmostEqual(statistics["max_drawdown"], drawdown.min())
+        self.assertEqual(
+            statistics["max_drawdown_duration"],
+            (max_drawdown_end - max_drawdown_start).days
+        )
+        self.assertEqual(calculate_statistics(None, 1_000_000)["total_days"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
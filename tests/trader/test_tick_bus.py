@@ -0,0 +1,92 @@
+"""
+Test if ticks written into tick bus are read back in order
+"""
+import unittest
+from dataclasses import replace
+from datetime import datetime
+
+from vnpy.trader.constant import Exchange, Product
+from vnpy.trader.database import DB_TZ
+from vnpy.trader.object import ContractData, TickData
+from vnpy.trader.tick_bus import TickBus, TickBusReader
+
+
+BUS_NAME = "test_tick_bus"
+
+
+class TestTickBus(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.bus = TickBus(BUS_NAME, capacity=100)
+        self.reader = TickBusReader(BUS_NAME, gateway_name="TEST")
+
+    def tearDown(self) -> None:
+        self.reader.close()
+        self.bus.close()
+
+    def create_tick(self, i: int) -> TickData:
+        return TickData(
+            gateway_name="CTP",
+            symbol="rb2010",
+            exchange=Exchange.SHFE,
+            datetime=DB_TZ.localize(datetime(2020, 7, 1, 9, 30, 0, i)),
+            name="螺纹钢2010",
+            volume=i,
+            last_price=3500 + i * 0.2,
+            ask_volume_5=i
+        )
+
+    def test_read(self):
+        self.assertIsNone(self.reader.get_tick("rb2010.SHFE"))
+        self.reader.subscribe("rb2010.SHFE")
+
+        tick = self.create_tick(0)
+        self.bus.put(tick)
+
+        result = self.reader.get_tick("rb2010.SHFE")
+        tick.gateway_name = "TEST"
+        self.assertEqual(result, tick)
+        self.assertEqual(self.reader.get_symbols(), ["rb2010.SHFE"])
+
+        # Ticks overwritten before being read are skipped
+        for i in range(1, 251):
+            self.bus.put(self.create_tick(i))
+
+        ticks = self.reader.poll()
+        self.assertEqual([t.volume for t in ticks], list(range(151, 251)))
+        self.assertEqual(self.reader.poll(), [])
+
+        self.assertTrue(self.reader.is_active())
+        self.bus.write_header(False)
+        self.assertFalse(self.reader.is_active())
+
+    def test_contract(self):
+        contract = ContractData(
+            gateway_name="CTP",
+            symbol="rb2010",
+            exchange=Exchange.SHFE,
+            name="螺纹钢2010",
+            product=Product.FUTURES,
+            size=10,
+            pricetick=1
+        )
+        self.bus.put(self.create_tick(0), contract)
+
+        # Contract is not listed if not known by writer
+        self.bus.put(replace(self.create_tick(0), symbol="hc2010"))
+
+        self.assertEqual(self.reader.get_symbols(), ["rb2010.SHFE", "hc2010.SHFE"])
+
+        contract.gateway_name = "TEST"
+        self.assertEqual(self.reader.contracts, {"rb2010.SHFE": contract})
+
+    def test_live_writer(self):
+        # Bus of writer still running is never replaced
+        with self.assertRaises(RuntimeError):
+            TickBus(BUS_NAME)
+
+        self.assertTrue(self.reader.is_active())
+
+
+if __name__ == "__main__":
+    unittest.main()
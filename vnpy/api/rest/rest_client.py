@@ -2,9 +2,12 @@ import sys
 import traceback
 from datetime import datetime
 from enum import Enum
+from itertools import count
 from multiprocessing.dummy import Pool
-from queue import Empty, Queue
-from typing import Any, Callable, Optional, Union, Type
+from queue import Empty, PriorityQueue
+from threading import BoundedSemaphore, Lock
+from time import sleep, time
+from typing import Any, Callable, Dict, Optional, Union, Type
 from types import TracebackType
 
 import requests
@@ -24,6 +27,15 @@ class RequestStatus(Enum):
     error = 3       # Exception raised
 
 
+class RequestPriority(Enum):
+    """
+    Requests of higher priority (smaller value) are sent first.
+    """
+
+    high = 0        # Order and cancel
+    normal = 1      # Query
+
+
 class Request(object):
     """
     Request object for status check.
@@ -40,6 +52,7 @@ class Request(object):
         on_failed: ON_FAILED_TYPE = None,
         on_error: ON_ERROR_TYPE = None,
         extra: Any = None,
+        priority: RequestPriority = None,
     ):
         """"""
         self.method: str = method
@@ -56,6 +69,33 @@ class Request(object):
         self.response: requests.Response = None
         self.status: RequestStatus = RequestStatus.ready
 
+        # Order and cancel are sent with other methods than GET
+        if priority is None:
+            if method == "GET":
+                priority = RequestPriority.normal
+            else:
+                priority = RequestPriority.high
+        self.priority: RequestPriority = priority
+
+        # Time (in seconds) of creating, sending and receiving response
+        self.create_time: float = time()
+        self.send_time: float = 0
+        self.receive_time: float = 0
+
+    @property
+    def wait_latency(self) -> float:
+        """
+        Time waiting in queue and for endpoint limit.
+        """
+        return self.send_time - self.create_time
+
+    @property
+    def latency(self) -> float:
+        """
+        Time from sending request to receiving response.
+        """
+        return self.receive_time - self.send_time
+
     def __str__(self):
         """"""
         if self.response is None:
@@ -82,6 +122,59 @@ class Request(object):
         )
 
 
+class EndpointLimit(object):
+    """
+    Limit of concurrent requests and request rate of an endpoint.
+    """
+
+    def __init__(self, concurrency: int = 0, rate: int = 0, interval: float = 1):
+        """
+        At most [concurrency] requests are sent at the same time and
+        [rate] requests every [interval] seconds, 0 for no limit.
+        """
+        self.semaphore: Optional[BoundedSemaphore] = None
+        if concurrency:
+            self.semaphore = BoundedSemaphore(concurrency)
+
+        self.rate: int = rate
+        self.interval: float = interval
+
+        # Token bucket, which is refilled continuously
+        self.tokens: float = rate
+        self.update_time: float = time()
+        self.lock: Lock = Lock()
+
+    def acquire(self) -> None:
+        """
+        Wait till request can be sent.
+        """
+        if self.rate:
+            while True:
+                with self.lock:
+                    now = time()
+                    self.tokens = min(
+                        self.rate,
+                        self.tokens + (now - self.update_time) * self.rate / self.interval
+                    )
+                    self.update_time = now
+
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        break
+
+                    wait = (1 - self.tokens) * self.interval / self.rate
+
+                sleep(wait)
+
+        if self.semaphore:
+            self.semaphore.acquire()
+
+    def release(self) -> None:
+        """"""
+        if self.semaphore:
+            self.semaphore.release()
+
+
 class RestClient(object):
     """
     HTTP Client designed for all sorts of trading RESTFul API.
@@ -89,15 +182,35 @@ class RestClient(object):
     * Reimplement on_failed function to handle Non-2xx responses.
     * Use on_failed parameter in add_request function for individual Non-2xx response handling.
     * Reimplement on_error function to handle exception msg.
+    * Reimplement on_latency function to publish latency of each request.
+    * Set concurrent to True to send requests concurrently.
+
+    Requests are sent one by one by default, so that sign (e.g. nonce
+    generation) and callbacks never run at the same time. If concurrent
+    is set, requests are sent by n worker threads, each of which keeps
+    its own session with keep-alive connections. Order and cancel
+    requests are sent before queries waiting in queue.
     """
 
+    # Only enable it if sign and all callbacks are thread-safe
+    concurrent: bool = False
+
+    # Requests slower than this (in seconds) are reported by on_latency
+    slow_latency: float = 1
+
     def __init__(self):
         """"""
         self.url_base: str = ""
         self._active: bool = False
 
-        self._queue: Queue = Queue()
+        self._queue: PriorityQueue = PriorityQueue()
         self._pool: Pool = None
+        self._count = count()       # Keep FIFO order of the same priority
+
+        self._limits: Dict[str, EndpointLimit] = {}
+
+        self._latencies: Dict[str, list] = {}
+        self._latency_lock: Lock = Lock()
 
         self.proxies: dict = None
 
@@ -119,14 +232,20 @@ class RestClient(object):
 
     def start(self, n: int = 3) -> None:
         """
-        Start rest client with session count n.
+        Start rest client with session count n, requests are sent
+        concurrently by n worker threads only if concurrent is set.
         """
         if self._active:
             return
 
+        if not self.concurrent:
+            n = 1
+
         self._active = True
         self._pool = Pool(n)
-        self._pool.apply_async(self._run)
+
+        for _ in range(n):
+            self._pool.apply_async(self._run)
 
     def stop(self) -> None:
         """
@@ -140,6 +259,36 @@ class RestClient(object):
         """
         self._queue.join()
 
+    def set_endpoint_limit(
+        self,
+        path: str,
+        concurrency: int = 0,
+        rate: int = 0,
+        interval: float = 1
+    ) -> None:
+        """
+        Limit concurrent requests and request rate of endpoint path,
+        e.g. set_endpoint_limit("/api/v3/order", rate=10).
+        """
+        self._limits[path] = EndpointLimit(concurrency, rate, interval)
+
+    def get_latency(self) -> Dict[str, dict]:
+        """
+        Get latency statistics (in milliseconds) of every endpoint.
+        """
+        with self._latency_lock:
+            items = list(self._latencies.items())
+
+        result = {}
+        for path, (count_, total, maximum, wait_total) in items:
+            result[path] = {
+                "count": count_,
+                "average": total / count_ * 1000,
+                "max": maximum * 1000,
+                "average_wait": wait_total / count_ * 1000,
+            }
+        return result
+
     def add_request(
         self,
         method: str,
@@ -151,6 +300,7 @@ class RestClient(object):
         on_failed: ON_FAILED_TYPE = None,
         on_error: ON_ERROR_TYPE = None,
         extra: Any = None,
+        priority: RequestPriority = None,
     ) -> Request:
         """
         Add a new request.
@@ -163,6 +313,7 @@ class RestClient(object):
         :param on_failed: callback function if Non-2xx status, type, type: (code, dict, Request)
         :param on_error: callback function when catching Python exception, type: (etype, evalue, tb, Request)
         :param extra: Any extra data which can be used when handling callback
+        :param priority: RequestPriority, high for methods other than GET by default
         :return: Request
         """
         request = Request(
@@ -175,8 +326,9 @@ class RestClient(object):
             on_failed,
             on_error,
             extra,
+            priority,
         )
-        self._queue.put(request)
+        self._queue.put((request.priority.value, next(self._count), request))
         return request
 
     def _run(self) -> None:
@@ -185,9 +337,9 @@ class RestClient(object):
             session = requests.session()
             while self._active:
                 try:
-                    request = self._queue.get(timeout=1)
+                    _, _, request = self._queue.get(timeout=1)
                     try:
-                        self._process_request(request, session)
+                        self._send_request(request, session)
                     finally:
                         self._queue.task_done()
                 except Empty:
@@ -196,6 +348,23 @@ class RestClient(object):
             et, ev, tb = sys.exc_info()
             self.on_error(et, ev, tb, None)
 
+    def _send_request(
+        self, request: Request, session: requests.Session
+    ) -> None:
+        """
+        Send request within limit of its endpoint.
+        """
+        limit = self._limits.get(request.path, None)
+        if not limit:
+            self._process_request(request, session)
+            return
+
+        limit.acquire()
+        try:
+            self._process_request(request, session)
+        finally:
+            limit.release()
+
     def sign(self, request: Request) -> None:
         """
         This function is called before sending any request out.
@@ -225,6 +394,25 @@ class RestClient(object):
         )
         sys.excepthook(exception_type, exception_value, tb)
 
+    def on_latency(self, request: Request) -> None:
+        """
+        Called after response of request received, reimplement this to
+        publish latency of each request. Slow requests are reported by
+        default.
+        """
+        if request.latency >= self.slow_latency:
+            sys.stderr.write(self.latency_detail(request))
+
+    def latency_detail(self, request: Request) -> str:
+        """"""
+        return "[{}]: Slow RestClient request {} {}: latency {:.0f}ms, wait {:.0f}ms\n".format(
+            datetime.now().isoformat(),
+            request.method,
+            request.path,
+            request.latency * 1000,
+            request.wait_latency * 1000,
+        )
+
     def exception_detail(
         self,
         exception_type: type,
@@ -253,6 +441,7 @@ class RestClient(object):
 
             url = self.make_full_url(request.path)
 
+            request.send_time = time()
             response = session.request(
                 request.method,
                 url,
@@ -261,7 +450,10 @@ class RestClient(object):
                 data=request.data,
                 proxies=self.proxies,
             )
+            request.receive_time = time()
             request.response = response
+            self._record_latency(request)
+
             status_code = response.status_code
             if status_code // 100 == 2:  # 2xx codes are all successful
                 if status_code == 204:
@@ -286,6 +478,17 @@ class RestClient(object):
             else:
                 self.on_error(t, v, tb, request)
 
+    def _record_latency(self, request: Request) -> None:
+        """"""
+        with self._latency_lock:
+            data = self._latencies.setdefault(request.path, [0, 0, 0, 0])
+            data[0] += 1
+            data[1] += request.latency
+            data[2] = max(data[2], request.latency)
+            data[3] += request.wait_latency
+
+        self.on_latency(request)
+
     def make_full_url(self, path: str) -> str:
         """
         Make relative api path into full url.
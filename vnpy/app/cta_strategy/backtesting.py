@@ -1,7 +1,6 @@
-from collections import defaultdict
-from datetime import date, datetime, timedelta
-from typing import Callable
-from itertools import product
+from datetime import date, datetime
+from typing import Callable, Iterator, Union
+from itertools import chain, product
 from functools import lru_cache
 from time import time
 import multiprocessing
@@ -16,8 +15,22 @@ from deap import creator, base, tools, algorithms
 
 from vnpy.trader.constant import (Direction, Offset, Exchange,
                                   Interval, Status)
-from vnpy.trader.database import database_manager
+from vnpy.trader.cache import data_cache
+from vnpy.trader.frame import (
+    SHARED_MEMORY_AVAILABLE,
+    BaseFrame,
+    FrameChain,
+    FrameStream,
+    SharedFrame
+)
 from vnpy.trader.object import OrderData, TradeData, BarData, TickData
+from vnpy.trader.statistics import (
+    calculate_daily_pnl,
+    calculate_statistics,
+    create_daily_df,
+    get_trade_arrays,
+    output_statistics
+)
 from vnpy.trader.utility import round_to
 
 from .base import (
@@ -25,8 +38,8 @@ from .base import (
     EngineType,
     STOPORDER_PREFIX,
     StopOrder,
-    StopOrderStatus,
-    INTERVAL_DELTA_MAP
+    StopOrderBook,
+    StopOrderStatus
 )
 from .template import CtaTemplate
 
@@ -129,11 +142,11 @@ class BacktestingEngine:
         self.interval = None
         self.days = 0
         self.callback = None
-        self.history_data = []
+        self.history_data = FrameChain()
 
         self.stop_order_count = 0
         self.stop_orders = {}
-        self.active_stop_orders = {}
+        self.active_stop_orders = StopOrderBook()
 
         self.limit_order_count = 0
         self.limit_orders = {}
@@ -146,6 +159,7 @@ class BacktestingEngine:
 
         self.daily_results = {}
         self.daily_df = None
+        self.daily_updated = False
 
     def clear_data(self):
         """
@@ -169,6 +183,7 @@ class BacktestingEngine:
 
         self.logs.clear()
         self.daily_results.clear()
+        self.daily_updated = False
 
     def set_parameters(
         self,
@@ -222,53 +237,54 @@ class BacktestingEngine:
             self.output("起始日期必须小于结束日期")
             return
 
-        self.history_data.clear()       # Clear previously loaded history data
-
-        # Load 30 days of data each time and allow for progress update
-        total_days = (self.end - self.start).days
-        progress_days = max(int(total_days / 10), 1)
-        progress_delta = timedelta(days=progress_days)
-        interval_delta = INTERVAL_DELTA_MAP[self.interval]
-
-        start = self.start
-        end = self.start + progress_delta
-        progress = 0
-
-        while start < self.end:
-            progress_bar = "#" * int(progress * 10 + 1)
-            self.output(f"加载进度：{progress_bar} [{progress:.0%}]")
-
-            end = min(end, self.end)  # Make sure end time stays within set range
-            if self.mode == BacktestingMode.BAR:
-                data = load_bar_data(
-                    self.symbol,
-                    self.exchange,
-                    self.interval,
-                    start,
-                    end
-                )
-            else:
-                data = load_tick_data(
-                    self.symbol,
-                    self.exchange,
-                    start,
-                    end
-                )
-
-            self.history_data.extend(data)
-
-            progress += progress_days / total_days
-            progress = min(progress, 1)
+        # History data is read chunk by chunk when replaying, so that only
+        # one chunk (instead of the whole range) is kept in memory.
+        self.history_data = FrameStream(self.iter_frames)
 
-            if int(progress * 100) % 50 == 0:
-                progress_bar = "#" * int(progress * 10)
-                self.output(f"加载进度：{progress_bar} [{progress:.0%}]")
+        self.output("历史数据加载完成，回放时分批读取")
 
+    def iter_frames(self) -> Iterator[BaseFrame]:
+        """
+        Iterate history data as frames chunk by chunk.
+        """
+        if self.mode == BacktestingMode.BAR:
+            return iter_bar_data(
+                self.symbol,
+                self.exchange,
+                self.interval,
+                self.start,
+                self.end
+            )
+        else:
+            return iter_tick_data(
+                self.symbol,
+                self.exchange,
+                self.start,
+                self.end
+            )
 
-            start = end + interval_delta
-            end += progress_delta
+    def load_frame(self) -> BaseFrame:
+        """
+        Load all history data into one frame at once.
+        """
+        if not self.end:
+            self.end = datetime.now()
 
-        self.output(f"历史数据加载完成，数据量：{len(self.history_data)}")
+        if self.mode == BacktestingMode.BAR:
+            return load_bar_data(
+                self.symbol,
+                self.exchange,
+                self.interval,
+                self.start,
+                self.end
+            )
+        else:
+            return load_tick_data(
+                self.symbol,
+                self.exchange,
+                self.start,
+                self.end
+            )
 
     def run_backtesting(self):
         """"""
@@ -279,14 +295,18 @@ class BacktestingEngine:
 
         self.strategy.on_init()
 
-        # Use the first [days] of history data for initializing strategy
+        # Use the first [days] of history data for initializing strategy.
+        # History data is iterated only once, so that it can be streamed
+        # from frames without creating all data objects at once.
         day_count = 1
-        ix = 0
+        inited = False
+        iterator = iter(self.history_data)
 
-        for ix, data in enumerate(self.history_data):
+        for data in iterator:
             if self.datetime and data.datetime.day != self.datetime.day:
                 day_count += 1
                 if day_count >= self.days:
+                    inited = True
                     break
 
             self.datetime = data.datetime
@@ -305,28 +325,36 @@ class BacktestingEngine:
         self.strategy.trading = True
         self.output("开始回放历史数据")
 
-        # Use the rest of history data for running backtesting
-        backtesting_data = self.history_data[ix + 1:]
-        if not backtesting_data:
+        # Use the rest of history data for running backtesting, data
+        # ending initializing is not replayed either.
+        first = next(iterator, None) if inited else None
+        if first is None:
             self.output("历史数据不足，回测终止")
             return
 
-        total_size = len(backtesting_data)
-        batch_size = max(int(total_size / 10), 1)
+        # Progress is estimated with datetime, since size of streamed
+        # history data is unknown before replaying.
+        start = first.datetime.date()
+        end = self.end.date() if self.end else start
+        total_days = max((end - start).days, 1)
+        batch_ix = 0
 
-        for ix, i in enumerate(range(0, total_size, batch_size)):
-            batch_data = backtesting_data[i: i + batch_size]
-            for data in batch_data:
-                try:
-                    func(data)
-                except Exception:
-                    self.output("触发异常，回测终止")
-                    self.output(traceback.format_exc())
-                    return
+        for data in chain([first], iterator):
+            try:
+                func(data)
+            except Exception:
+                self.output("触发异常，回测终止")
+                self.output(traceback.format_exc())
+                return
 
-            progress = min(ix / 10, 1)
-            progress_bar = "=" * (ix + 1)
-            self.output(f"回放进度：{progress_bar} [{progress:.0%}]")
+            ix = min((data.datetime.date() - start).days * 10 // total_days, 9)
+            while batch_ix < ix:
+                batch_ix += 1
+                progress_bar = "=" * batch_ix
+                self.output(f"回放进度：{progress_bar} [{batch_ix / 10:.0%}]")
+
+        progress_bar = "=" * 10
+        self.output(f"回放进度：{progress_bar} [100%]")
 
         self.strategy.on_stop()
         self.output("历史数据回放结束")
@@ -339,37 +367,28 @@ class BacktestingEngine:
             self.output("成交记录为空，无法计算")
             return
 
-        # Add trade data into daily reuslt.
-        for trade in self.trades.values():
-            d = trade.datetime.date()
-            daily_result = self.daily_results[d]
-            daily_result.add_trade(trade)
-
-        # Calculate daily result by iteration.
-        pre_close = 0
-        start_pos = 0
-
-        for daily_result in self.daily_results.values():
-            daily_result.calculate_pnl(
-                pre_close,
-                start_pos,
-                self.size,
-                self.rate,
-                self.slippage,
-                self.inverse
-            )
-
-            pre_close = daily_result.close_price
-            start_pos = daily_result.end_pos
-
-        # Generate dataframe
-        results = defaultdict(list)
-
-        for daily_result in self.daily_results.values():
-            for key, value in daily_result.__dict__.items():
-                results[key].append(value)
+        dates = list(self.daily_results.keys())
+        close_prices = np.fromiter(
+            (daily_result.close_price for daily_result in self.daily_results.values()),
+            dtype=np.float64,
+            count=len(dates)
+        )
+        trade_days, trade_changes, trade_prices = get_trade_arrays(
+            self.trades.values(), dates
+        )
 
-        self.daily_df = DataFrame.from_dict(results).set_index("date")
+        results = calculate_daily_pnl(
+            close_prices,
+            trade_days,
+            trade_changes,
+            trade_prices,
+            self.size,
+            self.rate,
+            self.slippage,
+            self.inverse
+        )
+        self.daily_df = create_daily_df(dates, results)
+        self.daily_updated = False
 
         self.output("逐日盯市盈亏计算完成")
         return self.daily_df
@@ -382,167 +401,10 @@ class BacktestingEngine:
         if df is None:
             df = self.daily_df
 
-        # Check for init DataFrame
-        if df is None:
-            # Set all statistics to 0 if no trade.
-            start_date = ""
-            end_date = ""
-            total_days = 0
-            profit_days = 0
-            loss_days = 0
-            end_balance = 0
-            max_drawdown = 0
-            max_ddpercent = 0
-            max_drawdown_duration = 0
-            total_net_pnl = 0
-            daily_net_pnl = 0
-            total_commission = 0
-            daily_commission = 0
-            total_slippage = 0
-            daily_slippage = 0
-            total_turnover = 0
-            daily_turnover = 0
-            total_trade_count = 0
-            daily_trade_count = 0
-            total_return = 0
-            annual_return = 0
-            daily_return = 0
-            return_std = 0
-            sharpe_ratio = 0
-            return_drawdown_ratio = 0
-        else:
-            # Calculate balance related time series data
-            df["balance"] = df["net_pnl"].cumsum() + self.capital
-
-            # When balance falls below 0, set daily return to 0
-            x = df["balance"] / df["balance"].shift(1)
-            x[x <= 0] = np.nan
-            df["return"] = np.log(x).fillna(0)
-
-            df["highlevel"] = (
-                df["balance"].rolling(
-                    min_periods=1, window=len(df), center=False).max()
-            )
-            df["drawdown"] = df["balance"] - df["highlevel"]
-            df["ddpercent"] = df["drawdown"] / df["highlevel"] * 100
+        statistics = calculate_statistics(df, self.capital, self.risk_free)
 
-            # Calculate statistics value
-            start_date = df.index[0]
-            end_date = df.index[-1]
-
-            total_days = len(df)
-            profit_days = len(df[df["net_pnl"] > 0])
-            loss_days = len(df[df["net_pnl"] < 0])
-
-            end_balance = df["balance"].iloc[-1]
-            max_drawdown = df["drawdown"].min()
-            max_ddpercent = df["ddpercent"].min()
-            max_drawdown_end = df["drawdown"].idxmin()
-
-            if isinstance(max_drawdown_end, date):
-                max_drawdown_start = df["balance"][:max_drawdown_end].idxmax()
-                max_drawdown_duration = (max_drawdown_end - max_drawdown_start).days
-            else:
-                max_drawdown_duration = 0
-
-            total_net_pnl = df["net_pnl"].sum()
-            daily_net_pnl = total_net_pnl / total_days
-
-            total_commission = df["commission"].sum()
-            daily_commission = total_commission / total_days
-
-            total_slippage = df["slippage"].sum()
-            daily_slippage = total_slippage / total_days
-
-            total_turnover = df["turnover"].sum()
-            daily_turnover = total_turnover / total_days
-
-            total_trade_count = df["trade_count"].sum()
-            daily_trade_count = total_trade_count / total_days
-
-            total_return = (end_balance / self.capital - 1) * 100
-            annual_return = total_return / total_days * 240
-            daily_return = df["return"].mean() * 100
-            return_std = df["return"].std() * 100
-
-            if return_std:
-                daily_risk_free = self.risk_free / np.sqrt(240)
-                sharpe_ratio = (daily_return - daily_risk_free) / return_std * np.sqrt(240)
-            else:
-                sharpe_ratio = 0
-
-            return_drawdown_ratio = -total_return / max_ddpercent
-
-        # Output
         if output:
-            self.output("-" * 30)
-            self.output(f"首个交易日：\t{start_date}")
-            self.output(f"最后交易日：\t{end_date}")
-
-            self.output(f"总交易日：\t{total_days}")
-            self.output(f"盈利交易日：\t{profit_days}")
-            self.output(f"亏损交易日：\t{loss_days}")
-
-            self.output(f"起始资金：\t{self.capital:,.2f}")
-            self.output(f"结束资金：\t{end_balance:,.2f}")
-
-            self.output(f"总收益率：\t{total_return:,.2f}%")
-            self.output(f"年化收益：\t{annual_return:,.2f}%")
-            self.output(f"最大回撤: \t{max_drawdown:,.2f}")
-            self.output(f"百分比最大回撤: {max_ddpercent:,.2f}%")
-            self.output(f"最长回撤天数: \t{max_drawdown_duration}")
-
-            self.output(f"总盈亏：\t{total_net_pnl:,.2f}")
-            self.output(f"总手续费：\t{total_commission:,.2f}")
-            self.output(f"总滑点：\t{total_slippage:,.2f}")
-            self.output(f"总成交金额：\t{total_turnover:,.2f}")
-            self.output(f"总成交笔数：\t{total_trade_count}")
-
-            self.output(f"日均盈亏：\t{daily_net_pnl:,.2f}")
-            self.output(f"日均手续费：\t{daily_commission:,.2f}")
-            self.output(f"日均滑点：\t{daily_slippage:,.2f}")
-            self.output(f"日均成交金额：\t{daily_turnover:,.2f}")
-            self.output(f"日均成交笔数：\t{daily_trade_count}")
-
-            self.output(f"日均收益率：\t{daily_return:,.2f}%")
-            self.output(f"收益标准差：\t{return_std:,.2f}%")
-            self.output(f"Sharpe Ratio：\t{sharpe_ratio:,.2f}")
-            self.output(f"收益回撤比：\t{return_drawdown_ratio:,.2f}")
-
-        statistics = {
-            "start_date": start_date,
-            "end_date": end_date,
-            "total_days": total_days,
-            "profit_days": profit_days,
-            "loss_days": loss_days,
-            "capital": self.capital,
-            "end_balance": end_balance,
-            "max_drawdown": max_drawdown,
-            "max_ddpercent": max_ddpercent,
-            "max_drawdown_duration": max_drawdown_duration,
-            "total_net_pnl": total_net_pnl,
-            "daily_net_pnl": daily_net_pnl,
-            "total_commission": total_commission,
-            "daily_commission": daily_commission,
-            "total_slippage": total_slippage,
-            "daily_slippage": daily_slippage,
-            "total_turnover": total_turnover,
-            "daily_turnover": daily_turnover,
-            "total_trade_count": total_trade_count,
-            "daily_trade_count": daily_trade_count,
-            "total_return": total_return,
-            "annual_return": annual_return,
-            "daily_return": daily_return,
-            "return_std": return_std,
-            "sharpe_ratio": sharpe_ratio,
-            "return_drawdown_ratio": return_drawdown_ratio,
-        }
-
-        # Filter potential error infinite value
-        for key, value in statistics.items():
-            if value in (np.inf, -np.inf):
-                value = 0
-            statistics[key] = np.nan_to_num(value)
+            output_statistics(statistics, self.output)
 
         self.output("策略统计指标计算完成")
         return statistics
@@ -603,36 +465,54 @@ class BacktestingEngine:
             self.output("优化目标未设置，请检查")
             return
 
+        # Load history data only once in shared memory, which is read
+        # by all processes without copying. Without shared memory support
+        # (Python 3.7) the frame is copied into each process instead.
+        history = self.load_frame()
+        if SHARED_MEMORY_AVAILABLE:
+            history = SharedFrame(history)
+
+        parameters = (
+            target_name,
+            self.strategy_class,
+            self.vt_symbol,
+            self.interval,
+            self.start,
+            self.rate,
+            self.slippage,
+            self.size,
+            self.pricetick,
+            self.capital,
+            self.end,
+            self.mode,
+            self.inverse
+        )
+
         # Use multiprocessing pool for running backtesting with different setting
         # Force to use spawn method to create new process (instead of fork on Linux)
+        process_count = multiprocessing.cpu_count()
         ctx = multiprocessing.get_context("spawn")
-        pool = ctx.Pool(multiprocessing.cpu_count())
+        pool = ctx.Pool(
+            process_count,
+            initializer=init_optimization,
+            initargs=(history, parameters)
+        )
 
-        results = []
-        for setting in settings:
-            result = (pool.apply_async(optimize, (
-                target_name,
-                self.strategy_class,
-                setting,
-                self.vt_symbol,
-                self.interval,
-                self.start,
-                self.rate,
-                self.slippage,
-                self.size,
-                self.pricetick,
-                self.capital,
-                self.end,
-                self.mode,
-                self.inverse
-            )))
-            results.append(result)
+        # Dispatch settings in chunks to reduce inter-process communication
+        chunksize = max(int(len(settings) / process_count / 4), 1)
+
+        try:
+            result_values = list(
+                pool.imap_unordered(optimize_setting, settings, chunksize)
+            )
+        finally:
+            pool.close()
+            pool.join()
 
-        pool.close()
-        pool.join()
+            if isinstance(history, SharedFrame):
+                history.close()
 
         # Sort results and output
-        result_values = [result.get() for result in results]
         result_values.sort(reverse=True, key=lambda result: result[1])
 
         if output:
@@ -892,20 +772,12 @@ class BacktestingEngine:
             long_best_price = long_cross_price
             short_best_price = short_cross_price
 
-        for stop_order in list(self.active_stop_orders.values()):
-            # Check whether stop order can be triggered.
-            long_cross = (
-                stop_order.direction == Direction.LONG
-                and stop_order.price <= long_cross_price
-            )
-
-            short_cross = (
-                stop_order.direction == Direction.SHORT
-                and stop_order.price >= short_cross_price
-            )
+        triggered_orders = self.active_stop_orders.get_triggered(
+            self.vt_symbol, long_cross_price, short_cross_price
+        )
 
-            if not long_cross and not short_cross:
-                continue
+        for stop_order in triggered_orders:
+            long_cross = stop_order.direction == Direction.LONG
 
             # Create order data.
             self.limit_order_count += 1
@@ -1021,7 +893,7 @@ class BacktestingEngine:
             strategy_name=self.strategy.strategy_name,
         )
 
-        self.active_stop_orders[stop_order.stop_orderid] = stop_order
+        self.active_stop_orders.add(stop_order)
         self.stop_orders[stop_order.stop_orderid] = stop_order
 
         return stop_order.stop_orderid
@@ -1152,8 +1024,38 @@ class BacktestingEngine:
         """
         Return all daily result data.
         """
+        if not self.daily_updated:
+            self.update_daily_results()
         return list(self.daily_results.values())
 
+    def update_daily_results(self):
+        """
+        Calculate pnl of daily result objects, which is only necessary
+        for showing them since calculate_result works on arrays.
+        """
+        for trade in self.trades.values():
+            d = trade.datetime.date()
+            daily_result = self.daily_results[d]
+            daily_result.add_trade(trade)
+
+        pre_close = 0
+        start_pos = 0
+
+        for daily_result in self.daily_results.values():
+            daily_result.calculate_pnl(
+                pre_close,
+                start_pos,
+                self.size,
+                self.rate,
+                self.slippage,
+                self.inverse
+            )
+
+            pre_close = daily_result.close_price
+            start_pos = daily_result.end_pos
+
+        self.daily_updated = True
+
 
 class DailyResult:
     """"""
@@ -1257,10 +1159,13 @@ def optimize(
     capital: int,
     end: datetime,
     mode: BacktestingMode,
-    inverse: bool
+    inverse: bool,
+    history: BaseFrame = None
 ):
     """
     Function for running in multiprocessing.pool
+
+    History data is loaded from database if not provided.
     """
     engine = BacktestingEngine()
 
@@ -1279,7 +1184,12 @@ def optimize(
     )
 
     engine.add_strategy(strategy_class, setting)
-    engine.load_data()
+
+    if history is not None:
+        engine.history_data = history
+    else:
+        engine.load_data()
+
     engine.run_backtesting()
     engine.calculate_result()
     statistics = engine.calculate_statistics(output=False)
@@ -1288,6 +1198,42 @@ def optimize(
     return (str(setting), target_value, statistics)
 
 
+# Global value of optimization process
+optimization_history = None
+optimization_parameters = None
+
+
+def init_optimization(history: Union[SharedFrame, BaseFrame], parameters: tuple):
+    """
+    Initializer of optimization process, attach to history data
+    in shared memory (or use the frame copied to this process).
+    """
+    global optimization_history
+    global optimization_parameters
+
+    if isinstance(history, SharedFrame):
+        optimization_history = history.attach()
+    else:
+        optimization_history = history
+    optimization_parameters = parameters
+
+
+def optimize_setting(setting: dict):
+    """
+    Run optimization of one setting in process started with
+    init_optimization.
+    """
+    target_name, strategy_class, *args = optimization_parameters
+
+    return optimize(
+        target_name,
+        strategy_class,
+        setting,
+        *args,
+        history=optimization_history
+    )
+
+
 @lru_cache(maxsize=1000000)
 def _ga_optimize(parameter_values: tuple):
     """"""
@@ -1325,8 +1271,11 @@ def load_bar_data(
     start: datetime,
     end: datetime
 ):
-    """"""
-    return database_manager.load_bar_data(
+    """
+    Load bar data as columnar frame from local data cache, which is
+    kept in much less memory and produces bar objects when iterated.
+    """
+    return data_cache.load_bar_array(
         symbol, exchange, interval, start, end
     )
 
@@ -1338,8 +1287,40 @@ def load_tick_data(
     start: datetime,
     end: datetime
 ):
-    """"""
-    return database_manager.load_tick_data(
+    """
+    Load tick data as columnar frame.
+    """
+    return data_cache.load_tick_array(
+        symbol, exchange, start, end
+    )
+
+
+def iter_bar_data(
+    symbol: str,
+    exchange: Exchange,
+    interval: Interval,
+    start: datetime,
+    end: datetime
+) -> Iterator[BaseFrame]:
+    """
+    Iterate bar data as frames chunk by chunk, which are not kept in
+    memory like load_bar_data.
+    """
+    return data_cache.iter_bar_array(
+        symbol, exchange, interval, start, end
+    )
+
+
+def iter_tick_data(
+    symbol: str,
+    exchange: Exchange,
+    start: datetime,
+    end: datetime
+) -> Iterator[BaseFrame]:
+    """
+    Iterate tick data as frames chunk by chunk.
+    """
+    return data_cache.iter_tick_array(
         symbol, exchange, start, end
     )
 
@@ -2,9 +2,14 @@
 Defines constants and objects used in CtaStrategy App.
 """
 
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
 from dataclasses import dataclass, field
 from enum import Enum
 from datetime import timedelta
+from math import inf
+from operator import itemgetter
+from typing import Dict, Iterator, List, Tuple
 
 from vnpy.trader.constant import Direction, Offset, Interval
 
@@ -42,6 +47,120 @@ class StopOrder:
     status: StopOrderStatus = StopOrderStatus.WAITING
 
 
+class StopOrderBook:
+    """
+    Waiting stop orders indexed by vt_symbol and trigger price, so that
+    checking a new price only touches orders which are triggered.
+
+    Long and short orders of each vt_symbol are kept in lists sorted by
+    (price, sequence, stop_orderid). Long orders triggered by a price
+    are a prefix of the long list, short ones a suffix of the short list.
+    """
+
+    def __init__(self):
+        """"""
+        self.orders: Dict[str, StopOrder] = {}
+        self.order_keys: Dict[str, Tuple[float, int, str]] = {}
+
+        self.long_books: Dict[str, List[Tuple[float, int, str]]] = defaultdict(list)
+        self.short_books: Dict[str, List[Tuple[float, int, str]]] = defaultdict(list)
+
+        self.count: int = 0
+
+    def add(self, stop_order: StopOrder) -> None:
+        """"""
+        self.count += 1
+        key = (stop_order.price, self.count, stop_order.stop_orderid)
+
+        self.orders[stop_order.stop_orderid] = stop_order
+        self.order_keys[stop_order.stop_orderid] = key
+
+        if stop_order.direction == Direction.LONG:
+            insort(self.long_books[stop_order.vt_symbol], key)
+        else:
+            insort(self.short_books[stop_order.vt_symbol], key)
+
+    def pop(self, stop_orderid: str, default: StopOrder = None) -> StopOrder:
+        """
+        Remove stop order from book and return it.
+        """
+        stop_order = self.orders.pop(stop_orderid, None)
+        if not stop_order:
+            return default
+
+        key = self.order_keys.pop(stop_orderid)
+
+        if stop_order.direction == Direction.LONG:
+            book = self.long_books[stop_order.vt_symbol]
+        else:
+            book = self.short_books[stop_order.vt_symbol]
+        del book[bisect_left(book, key)]
+
+        return stop_order
+
+    def get(self, stop_orderid: str, default: StopOrder = None) -> StopOrder:
+        """"""
+        return self.orders.get(stop_orderid, default)
+
+    def get_triggered(
+        self,
+        vt_symbol: str,
+        long_price: float,
+        short_price: float
+    ) -> List[StopOrder]:
+        """
+        Get stop orders of vt_symbol triggered by prices, which are long
+        orders with price <= long_price and short orders with price >=
+        short_price. Orders are returned in the sequence they are added.
+        """
+        keys = []
+
+        # Lowest long price and highest short price are checked first,
+        # since most prices trigger nothing.
+        long_book = self.long_books.get(vt_symbol, None)
+        if long_book and long_book[0][0] <= long_price:
+            ix = bisect_right(long_book, (long_price, inf))
+            keys.extend(long_book[:ix])
+
+        short_book = self.short_books.get(vt_symbol, None)
+        if short_book and short_book[-1][0] >= short_price:
+            ix = bisect_left(short_book, (short_price,))
+            keys.extend(short_book[ix:])
+
+        if not keys:
+            return keys
+
+        keys.sort(key=itemgetter(1))
+        return [self.orders[key[2]] for key in keys]
+
+    def keys(self) -> List[str]:
+        """"""
+        return list(self.orders.keys())
+
+    def values(self) -> List[StopOrder]:
+        """"""
+        return list(self.orders.values())
+
+    def clear(self) -> None:
+        """"""
+        self.orders.clear()
+        self.order_keys.clear()
+        self.long_books.clear()
+        self.short_books.clear()
+
+    def __contains__(self, stop_orderid: str) -> bool:
+        """"""
+        return stop_orderid in self.orders
+
+    def __len__(self) -> int:
+        """"""
+        return len(self.orders)
+
+    def __iter__(self) -> Iterator[str]:
+        """"""
+        return iter(self.keys())
+
+
 EVENT_CTA_LOG = "eCtaLog"
 EVENT_CTA_STRATEGY = "eCtaStrategy"
 EVENT_CTA_STOPORDER = "eCtaStopOrder"
@@ -5,10 +5,11 @@ import os
 import traceback
 from collections import defaultdict
 from pathlib import Path
-from typing import Any, Callable
+from typing import Any, Callable, Dict, List, Tuple
 from datetime import datetime, timedelta
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, wait
 from copy import copy
+from threading import Lock
 
 from tzlocal import get_localzone
 import numpy as np
@@ -37,10 +38,17 @@ from vnpy.trader.constant import (
     Offset,
     Status
 )
-from vnpy.trader.utility import load_json, save_json, extract_vt_symbol, round_to
+from vnpy.trader.utility import (
+    load_json,
+    save_json,
+    extract_vt_symbol,
+    round_to,
+    JsonStore
+)
 from vnpy.trader.rqdata import rqdata_client
 from vnpy.trader.converter import OffsetConverter
 from vnpy.trader.database import database_manager
+from vnpy.trader.setting import SETTINGS
 
 from .base import (
     APP_NAME,
@@ -49,6 +57,7 @@ from .base import (
     EVENT_CTA_STOPORDER,
     EngineType,
     StopOrder,
+    StopOrderBook,
     StopOrderStatus,
     STOPORDER_PREFIX
 )
@@ -80,6 +89,7 @@ class CtaEngine(BaseEngine):
 
         self.strategy_setting = {}  # strategy_name: dict
         self.strategy_data = {}     # strategy_name: dict
+        self.data_store = JsonStore(self.data_filename)
 
         self.classes = {}           # class_name: stategy_class
         self.strategies = {}        # strategy_name: strategy
@@ -91,10 +101,21 @@ class CtaEngine(BaseEngine):
             set)                    # strategy_name: orderid list
 
         self.stop_order_count = 0   # for generating stop_orderid
-        self.stop_orders = {}       # stop_orderid: stop_order
+        self.stop_orders = StopOrderBook()  # stop_orderid: stop_order
 
         self.init_executor = ThreadPoolExecutor(max_workers=1)
 
+        # Bars loaded during init_all_strategies, shared by strategies
+        # of the same (vt_symbol, interval, use_database).
+        self.bar_cache: Dict[Tuple, Tuple[int, List[BarData]]] = None
+        self.bar_cache_locks: Dict[Tuple, Lock] = defaultdict(Lock)
+        self.rq_lock = Lock()
+        self.subscribe_lock = Lock()
+
+        # Gateway history queries are not thread-safe, one at a time
+        # for each gateway.
+        self.history_locks: Dict[str, Lock] = defaultdict(Lock)
+
         self.rq_client = None
         self.rq_symbols = set()
 
@@ -118,6 +139,7 @@ class CtaEngine(BaseEngine):
     def close(self):
         """"""
         self.stop_all_strategies()
+        self.data_store.close()
 
     def register_event(self):
         """"""
@@ -148,7 +170,9 @@ class CtaEngine(BaseEngine):
             start=start,
             end=end
         )
-        data = rqdata_client.query_history(req)
+        # RQData client is not used by several threads at the same time
+        with self.rq_lock:
+            data = rqdata_client.query_history(req)
         return data
 
     def process_tick_event(self, event: Event):
@@ -247,63 +271,56 @@ class CtaEngine(BaseEngine):
 
     def check_stop_order(self, tick: TickData):
         """"""
-        for stop_order in list(self.stop_orders.values()):
-            if stop_order.vt_symbol != tick.vt_symbol:
-                continue
+        triggered_orders = self.stop_orders.get_triggered(
+            tick.vt_symbol, tick.last_price, tick.last_price
+        )
 
-            long_triggered = (
-                stop_order.direction == Direction.LONG and tick.last_price >= stop_order.price
-            )
-            short_triggered = (
-                stop_order.direction == Direction.SHORT and tick.last_price <= stop_order.price
-            )
+        for stop_order in triggered_orders:
+            strategy = self.strategies[stop_order.strategy_name]
 
-            if long_triggered or short_triggered:
-                strategy = self.strategies[stop_order.strategy_name]
-
-                # To get excuted immediately after stop order is
-                # triggered, use limit price if available, otherwise
-                # use ask_price_5 or bid_price_5
-                if stop_order.direction == Direction.LONG:
-                    if tick.limit_up:
-                        price = tick.limit_up
-                    else:
-                        price = tick.ask_price_5
+            # To get excuted immediately after stop order is
+            # triggered, use limit price if available, otherwise
+            # use ask_price_5 or bid_price_5
+            if stop_order.direction == Direction.LONG:
+                if tick.limit_up:
+                    price = tick.limit_up
                 else:
-                    if tick.limit_down:
-                        price = tick.limit_down
-                    else:
-                        price = tick.bid_price_5
-
-                contract = self.main_engine.get_contract(stop_order.vt_symbol)
-
-                vt_orderids = self.send_limit_order(
-                    strategy,
-                    contract,
-                    stop_order.direction,
-                    stop_order.offset,
-                    price,
-                    stop_order.volume,
-                    stop_order.lock
-                )
+                    price = tick.ask_price_5
+            else:
+                if tick.limit_down:
+                    price = tick.limit_down
+                else:
+                    price = tick.bid_price_5
+
+            contract = self.main_engine.get_contract(stop_order.vt_symbol)
+
+            vt_orderids = self.send_limit_order(
+                strategy,
+                contract,
+                stop_order.direction,
+                stop_order.offset,
+                price,
+                stop_order.volume,
+                stop_order.lock
+            )
 
-                # Update stop order status if placed successfully
-                if vt_orderids:
-                    # Remove from relation map.
-                    self.stop_orders.pop(stop_order.stop_orderid)
+            # Update stop order status if placed successfully
+            if vt_orderids:
+                # Remove from relation map.
+                self.stop_orders.pop(stop_order.stop_orderid)
 
-                    strategy_vt_orderids = self.strategy_orderid_map[strategy.strategy_name]
-                    if stop_order.stop_orderid in strategy_vt_orderids:
-                        strategy_vt_orderids.remove(stop_order.stop_orderid)
+                strategy_vt_orderids = self.strategy_orderid_map[strategy.strategy_name]
+                if stop_order.stop_orderid in strategy_vt_orderids:
+                    strategy_vt_orderids.remove(stop_order.stop_orderid)
 
-                    # Change stop order status to cancelled and update to strategy.
-                    stop_order.status = StopOrderStatus.TRIGGERED
-                    stop_order.vt_orderids = vt_orderids
+                # Change stop order status to cancelled and update to strategy.
+                stop_order.status = StopOrderStatus.TRIGGERED
+                stop_order.vt_orderids = vt_orderids
 
-                    self.call_strategy_func(
-                        strategy, strategy.on_stop_order, stop_order
-                    )
-                    self.put_stop_order_event(stop_order)
+                self.call_strategy_func(
+                    strategy, strategy.on_stop_order, stop_order
+                )
+                self.put_stop_order_event(stop_order)
 
     def send_server_order(
         self,
@@ -436,7 +453,7 @@ class CtaEngine(BaseEngine):
             lock=lock
         )
 
-        self.stop_orders[stop_orderid] = stop_order
+        self.stop_orders.add(stop_order)
 
         vt_orderids = self.strategy_orderid_map[strategy.strategy_name]
         vt_orderids.add(stop_orderid)
@@ -600,6 +617,24 @@ class CtaEngine(BaseEngine):
         use_database: bool
     ):
         """"""
+        if self.bar_cache is None:
+            bars = self.query_bar(vt_symbol, days, interval, use_database)
+        else:
+            bars = self.query_cached_bar(vt_symbol, days, interval, use_database)
+
+        for bar in bars:
+            callback(bar)
+
+    def query_bar(
+        self,
+        vt_symbol: str,
+        days: int,
+        interval: Interval,
+        use_database: bool
+    ) -> List[BarData]:
+        """
+        Query bar data of last [days] from gateway, RQData or database.
+        """
         symbol, exchange = extract_vt_symbol(vt_symbol)
         end = datetime.now(get_localzone())
         start = end - timedelta(days)
@@ -618,7 +653,8 @@ class CtaEngine(BaseEngine):
                     start=start,
                     end=end
                 )
-                bars = self.main_engine.query_history(req, contract.gateway_name)
+                with self.history_locks[contract.gateway_name]:
+                    bars = self.main_engine.query_history(req, contract.gateway_name)
 
             # Try to query bars from RQData, if not found, load from database.
             else:
@@ -633,8 +669,38 @@ class CtaEngine(BaseEngine):
                 end=end,
             )
 
-        for bar in bars:
-            callback(bar)
+        return bars
+
+    def query_cached_bar(
+        self,
+        vt_symbol: str,
+        days: int,
+        interval: Interval,
+        use_database: bool
+    ) -> List[BarData]:
+        """
+        Query bar data through bar cache, each series is queried only
+        once by the first strategy and then shared by others.
+        """
+        key = (vt_symbol, interval, use_database)
+
+        # Strategies of other series are not blocked while querying.
+        with self.bar_cache_locks[key]:
+            cached_days, bars = self.bar_cache.get(key, (0, []))
+
+            if cached_days < days:
+                bars = self.query_bar(vt_symbol, days, interval, use_database)
+                self.bar_cache[key] = (days, bars)
+                return bars
+
+        if cached_days == days or not bars:
+            return bars
+
+        start = datetime.now(get_localzone()) - timedelta(days)
+        if not bars[0].datetime.tzinfo:
+            start = start.replace(tzinfo=None)
+
+        return [bar for bar in bars if bar.datetime >= start]
 
     def load_tick(
         self,
@@ -750,7 +816,8 @@ class CtaEngine(BaseEngine):
         if contract:
             req = SubscribeRequest(
                 symbol=contract.symbol, exchange=contract.exchange)
-            self.main_engine.subscribe(req, contract.gateway_name)
+            with self.subscribe_lock:
+                self.main_engine.subscribe(req, contract.gateway_name)
         else:
             self.write_log(f"行情订阅失败，找不到合约{strategy.vt_symbol}", strategy)
 
@@ -881,19 +948,19 @@ class CtaEngine(BaseEngine):
         """
         Load strategy data from json file.
         """
-        self.strategy_data = load_json(self.data_filename)
+        self.strategy_data = self.data_store.load()
 
     def sync_strategy_data(self, strategy: CtaTemplate):
         """
-        Sync strategy data into json file.
+        Sync strategy data into json file, which is saved by data store
+        in background.
         """
         data = strategy.get_variables()
         # Strategy status (inited, trading) should not be synced.
         data.pop("inited")
         data.pop("trading")
 
-        self.strategy_data[strategy.strategy_name] = data
-        save_json(self.data_filename, self.strategy_data)
+        self.data_store.set(strategy.strategy_name, data)
 
     def get_all_strategy_class_names(self):
         """
@@ -922,9 +989,39 @@ class CtaEngine(BaseEngine):
 
     def init_all_strategies(self):
         """
+        Init all strategies in a batch, with history data shared and at
+        most SETTINGS["cta.init_workers"] strategies inited at the same time.
         """
-        for strategy_name in self.strategies.keys():
-            self.init_strategy(strategy_name)
+        self.init_executor.submit(self._init_all_strategies)
+
+    def _init_all_strategies(self):
+        """"""
+        strategy_names = [
+            strategy_name for strategy_name, strategy in self.strategies.items()
+            if not strategy.inited
+        ]
+        if not strategy_names:
+            return
+
+        self.write_log(f"开始批量初始化{len(strategy_names)}个策略")
+        start = datetime.now()
+
+        self.bar_cache = {}
+        max_workers = max(SETTINGS["cta.init_workers"], 1)
+
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [
+                    executor.submit(self._init_strategy, strategy_name)
+                    for strategy_name in strategy_names
+                ]
+                wait(futures)
+        finally:
+            self.bar_cache = None
+            self.bar_cache_locks.clear()
+
+        cost = (datetime.now() - start).total_seconds()
+        self.write_log(f"批量初始化完成，耗时{cost:.1f}秒")
 
     def start_all_strategies(self):
         """
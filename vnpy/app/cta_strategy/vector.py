@@ -0,0 +1,295 @@
+"""
+Vectorized fast-path backtesting for bar strategies whose signals can
+be calculated as NumPy arrays over the whole history.
+"""
+
+from typing import Callable, List, Union
+
+import numpy as np
+
+from vnpy.trader.constant import Direction, Offset
+from vnpy.trader.frame import BarFrame
+from vnpy.trader.object import TradeData
+from vnpy.trader.statistics import calculate_daily_pnl, create_daily_df
+
+from .backtesting import BacktestingEngine
+from .base import BacktestingMode
+
+
+class VectorBacktestingEngine(BacktestingEngine):
+    """
+    Backtesting engine which takes target position of every bar instead
+    of running strategy object bar by bar.
+
+    Target position of a bar is the position wanted after its close.
+    When it differs from current position, a limit order is sent at
+    long_price/short_price (close price by default) and crossed with
+    next bar the same way as BacktestingEngine does. Order not filled
+    on next bar is cancelled, and sent again if target is unchanged.
+
+    Daily results and statistics are the same as BacktestingEngine for
+    strategies which follow the rules above, e.g. DoubleMaStrategy.
+    Stop orders and tick mode are not supported.
+    """
+
+    def __init__(self):
+        """"""
+        super().__init__()
+
+        self.frame: BarFrame = None
+        self.start_ix: int = 0
+
+        self.target: np.ndarray = None
+        self.pos: np.ndarray = None
+        self.trade_price: np.ndarray = None
+
+    def clear_data(self):
+        """"""
+        super().clear_data()
+
+        self.start_ix = 0
+        self.target = None
+        self.pos = None
+        self.trade_price = None
+        self.daily_df = None
+
+    def load_data(self):
+        """"""
+        if self.mode != BacktestingMode.BAR:
+            self.output("向量化回测只支持K线模式")
+            return
+
+        self.output("开始加载历史数据")
+
+        if self.start >= (self.end or self.start):
+            self.output("起始日期必须小于结束日期")
+            return
+
+        self.frame = self.load_frame()
+        self.output(f"历史数据加载完成，数据量：{len(self.frame)}")
+
+    def run_backtesting(
+        self,
+        target: Union[np.ndarray, Callable[[BarFrame], np.ndarray]],
+        long_price: Union[np.ndarray, float] = None,
+        short_price: Union[np.ndarray, float] = None,
+        days: int = 10
+    ):
+        """
+        Target can be an array with the same length as history data or a
+        function calculating it from history frame. NaN in target means
+        keeping the previous target, so that entry/exit signals can be
+        passed directly.
+
+        Data within the first [days] is used for initializing only,
+        which is the same as load_bar(days) in strategy.
+        """
+        frame = self.frame
+        size = len(frame)
+
+        if callable(target):
+            target = target(frame)
+        target = np.asarray(target, dtype=np.float64)
+
+        if len(target) != size:
+            self.output("目标仓位数量和历史数据不一致，回测终止")
+            return
+
+        self.start_ix = get_start_index(frame.datetime, days)
+        if self.start_ix >= size:
+            self.output("历史数据不足，回测终止")
+            return
+        self.output("开始计算向量化回测")
+
+        close_price = frame.close_price
+        long_price = get_price_array(long_price, close_price)
+        short_price = get_price_array(short_price, close_price)
+
+        # Signals before trading starts are ignored, same as strategy
+        # which sends no order during initializing.
+        target = target.copy()
+        target[:self.start_ix] = 0
+        target = fill_forward(target)
+
+        # Whether order sent on bar i can be filled on bar i+1
+        low_price = frame.low_price[1:]
+        high_price = frame.high_price[1:]
+
+        long_cross = np.zeros(size, dtype=bool)
+        long_cross[:-1] = (long_price[:-1] >= low_price) & (low_price > 0)
+
+        short_cross = np.zeros(size, dtype=bool)
+        short_cross[:-1] = (short_price[:-1] <= high_price) & (high_price > 0)
+
+        # Position after order of bar i is target when order in either
+        # direction can be filled. Otherwise it depends on position
+        # before, which is resolved bar by bar for these (rare) bars.
+        next_pos = target.copy()
+        unsure_ix = np.flatnonzero(~(long_cross & short_cross))
+
+        for ix in unsure_ix.tolist():
+            pos = next_pos[ix - 1] if ix else 0
+            t = target[ix]
+
+            if (t > pos and long_cross[ix]) or (t < pos and short_cross[ix]):
+                next_pos[ix] = t
+            else:
+                next_pos[ix] = pos
+
+        pos = np.zeros(size)
+        pos[1:] = next_pos[:-1]
+
+        # Trade price of order filled on bar i
+        open_price = frame.open_price
+        change = np.zeros(size)
+        change[1:] = np.diff(pos)
+
+        trade_price = np.full(size, np.nan)
+        trade_price[1:] = np.where(
+            change[1:] > 0,
+            np.minimum(long_price[:-1], open_price[1:]),
+            np.maximum(short_price[:-1], open_price[1:])
+        )
+        trade_price[change == 0] = np.nan
+
+        self.target = target
+        self.pos = pos
+        self.trade_price = trade_price
+
+        self.output("向量化回测计算完成")
+
+    def calculate_result(self):
+        """
+        Calculate daily result from position changes.
+        """
+        self.output("开始计算逐日盯市盈亏")
+
+        if self.pos is None or not np.any(self.pos):
+            self.output("成交记录为空，无法计算")
+            return
+
+        ix = self.start_ix
+        datetimes = self.frame.datetime[ix:]
+        close_price = self.frame.close_price[ix:]
+        pos = self.pos[ix:]
+        price = self.trade_price[ix:]
+
+        # Bars are grouped by date, same as update_daily_close
+        dates = datetimes.astype("datetime64[D]")
+        day_end = np.ones(len(dates), dtype=bool)
+        day_end[:-1] = dates[1:] != dates[:-1]
+        day_ix = np.cumsum(day_end) - day_end
+
+        # Position reversed is split into two trades, since it is done
+        # with close and open orders.
+        before = self.pos[ix - 1:-1] if ix else np.r_[0, pos[:-1]]
+        traded = ~np.isnan(price)
+        reversed_ = traded & (pos * before < 0)
+
+        trade_days = np.concatenate([day_ix[traded], day_ix[reversed_]])
+        trade_changes = np.concatenate([
+            np.where(reversed_, -before, pos - before)[traded],
+            pos[reversed_]
+        ])
+        trade_prices = np.concatenate([price[traded], price[reversed_]])
+
+        results = calculate_daily_pnl(
+            close_price[day_end],
+            trade_days,
+            trade_changes,
+            trade_prices,
+            self.size,
+            self.rate,
+            self.slippage,
+            self.inverse
+        )
+        self.daily_df = create_daily_df(dates[day_end].astype(object), results)
+
+        self.output("逐日盯市盈亏计算完成")
+        return self.daily_df
+
+    def get_all_trades(self) -> List[TradeData]:
+        """
+        Create trade data from position changes, which is slow and only
+        for checking results.
+        """
+        trades = []
+        localize = self.frame._localize
+
+        for ix in np.flatnonzero(~np.isnan(self.trade_price)).tolist():
+            before = self.pos[ix - 1].item()
+            after = self.pos[ix].item()
+
+            if after > before:
+                direction = Direction.LONG
+            else:
+                direction = Direction.SHORT
+
+            if before * after < 0:
+                volumes = [(Offset.CLOSE, abs(before)), (Offset.OPEN, abs(after))]
+            elif abs(after) > abs(before):
+                volumes = [(Offset.OPEN, abs(after - before))]
+            else:
+                volumes = [(Offset.CLOSE, abs(after - before))]
+
+            for offset, volume in volumes:
+                tradeid = str(len(trades) + 1)
+                trade = TradeData(
+                    symbol=self.symbol,
+                    exchange=self.exchange,
+                    orderid=tradeid,
+                    tradeid=tradeid,
+                    direction=direction,
+                    offset=offset,
+                    price=self.trade_price[ix].item(),
+                    volume=volume,
+                    datetime=localize(self.frame.datetime[ix].item()),
+                    gateway_name=self.gateway_name,
+                )
+                trades.append(trade)
+
+        return trades
+
+
+def get_start_index(datetimes: np.ndarray, days: int) -> int:
+    """
+    Get index of the first bar used for trading, which is the same as
+    run_backtesting of BacktestingEngine: the first bar of [days]th day
+    ends initializing and is skipped, trading starts from the next one.
+    """
+    if not len(datetimes):
+        return 0
+
+    dates = datetimes.astype("datetime64[D]")
+    changed = np.zeros(len(dates), dtype=bool)
+    changed[1:] = dates[1:] != dates[:-1]
+
+    day_count = np.cumsum(changed) + 1
+    ready = np.flatnonzero(changed & (day_count >= days))
+
+    if not len(ready):
+        return len(datetimes)
+    return int(ready[0]) + 1
+
+
+def get_price_array(
+    price: Union[np.ndarray, float, None],
+    default: np.ndarray
+) -> np.ndarray:
+    """"""
+    if price is None:
+        return default
+    return np.broadcast_to(np.asarray(price, dtype=np.float64), default.shape)
+
+
+def fill_forward(values: np.ndarray) -> np.ndarray:
+    """
+    Replace NaN with the last valid value before it (0 at beginning).
+    """
+    valid = ~np.isnan(values)
+    ix = np.where(valid, np.arange(len(values)), 0)
+    np.maximum.accumulate(ix, out=ix)
+
+    filled = values[ix]
+    filled[~valid[ix]] = 0
+    return filled
@@ -1,6 +1,6 @@
 import csv
 from datetime import datetime
-from typing import List, Tuple
+from typing import Callable, Iterator, List, Tuple
 
 from vnpy.trader.database import BarOverview, DB_TZ
 from vnpy.trader.engine import BaseEngine, MainEngine, EventEngine
@@ -37,51 +37,74 @@ class ManagerEngine(BaseEngine):
         close_head: str,
         volume_head: str,
         open_interest_head: str,
-        datetime_format: str
+        datetime_format: str,
+        callback: Callable[[int], None] = None
     ) -> Tuple:
-        """"""
-        with open(file_path, "rt") as f:
-            buf = [line.replace("\0", "") for line in f]
-
-        reader = csv.DictReader(buf, delimiter=",")
+        """
+        Bars are read and saved in batches, and callback is called with
+        count of bars saved after each batch.
 
-        bars = []
+        Import is not all-or-nothing: when a row cannot be parsed, bars
+        before it are still saved, and then ValueError is raised with
+        the line number and count of bars saved.
+        """
         start = None
-        count = 0
-
-        for item in reader:
-            if datetime_format:
-                dt = datetime.strptime(item[datetime_head], datetime_format)
-            else:
-                dt = datetime.fromisoformat(item[datetime_head])
-
-            open_interest = item.get(open_interest_head, 0)
-
-            bar = BarData(
-                symbol=symbol,
-                exchange=exchange,
-                datetime=dt,
-                interval=interval,
-                volume=float(item[volume_head]),
-                open_price=float(item[open_head]),
-                high_price=float(item[high_head]),
-                low_price=float(item[low_head]),
-                close_price=float(item[close_head]),
-                open_interest=float(open_interest),
-                gateway_name="DB",
-            )
+        end = None
+        error = None
+
+        def generate_bars(reader: csv.DictReader) -> Iterator[BarData]:
+            """"""
+            nonlocal start, end, error
+
+            for item in reader:
+                try:
+                    if datetime_format:
+                        dt = datetime.strptime(item[datetime_head], datetime_format)
+                    else:
+                        dt = datetime.fromisoformat(item[datetime_head])
+
+                    open_interest = item.get(open_interest_head, 0)
+
+                    bar = BarData(
+                        symbol=symbol,
+                        exchange=exchange,
+                        datetime=dt,
+                        interval=interval,
+                        volume=float(item[volume_head]),
+                        open_price=float(item[open_head]),
+                        high_price=float(item[high_head]),
+                        low_price=float(item[low_head]),
+                        close_price=float(item[close_head]),
+                        open_interest=float(open_interest),
+                        gateway_name="DB",
+                    )
+                except (KeyError, TypeError, ValueError) as e:
+                    # Stop here so that bars read before are saved
+                    error = f"第{reader.line_num}行数据解析失败：{e!r}"
+                    return
+
+                # do some statistics
+                if not start:
+                    start = bar.datetime
+                end = bar.datetime
+
+                yield bar
 
-            bars.append(bar)
+        with open(file_path, "rt") as f:
+            lines = (line.replace("\0", "") for line in f)
+            reader = csv.DictReader(lines, delimiter=",")
 
-            # do some statistics
-            count += 1
-            if not start:
-                start = bar.datetime
+            # insert into database
+            count = database_manager.ingest_bar_data(
+                generate_bars(reader),
+                callback=callback
+            )
 
-        # insert into database
-        database_manager.save_bar_data(bars)
+        if error:
+            raise ValueError(
+                f"{error}，之前的{count}条数据已导入（{start} - {end}）"
+            )
 
-        end = bar.datetime
         return start, end, count
 
     def output_data_to_csv(
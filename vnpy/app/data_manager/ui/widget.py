@@ -215,20 +215,24 @@ class ManagerWidget(QtWidgets.QWidget):
         open_interest_head = dialog.open_interest_edit.text()
         datetime_format = dialog.format_edit.text()
 
-        start, end, count = self.engine.import_data_from_csv(
-            file_path,
-            symbol,
-            exchange,
-            interval,
-            datetime_head,
-            open_head,
-            high_head,
-            low_head,
-            close_head,
-            volume_head,
-            open_interest_head,
-            datetime_format
-        )
+        try:
+            start, end, count = self.engine.import_data_from_csv(
+                file_path,
+                symbol,
+                exchange,
+                interval,
+                datetime_head,
+                open_head,
+                high_head,
+                low_head,
+                close_head,
+                volume_head,
+                open_interest_head,
+                datetime_format
+            )
+        except ValueError as e:
+            QtWidgets.QMessageBox.warning(self, "载入中断！", str(e))
+            return
 
         msg = f"\
         CSV载入成功\n\
@@ -1,11 +1,14 @@
 """"""
 
 import sys
+from collections import defaultdict
 from threading import Thread
 from queue import Queue, Empty
 from copy import copy
+from time import perf_counter
+from typing import Dict, List, Tuple
 
-from vnpy.event import Event, EventEngine
+from vnpy.event import Event, EventEngine, AFFINITY_KEY
 from vnpy.trader.engine import BaseEngine, MainEngine
 from vnpy.trader.constant import Exchange
 from vnpy.trader.object import (
@@ -17,6 +20,7 @@ from vnpy.trader.object import (
 from vnpy.trader.event import EVENT_TICK, EVENT_CONTRACT
 from vnpy.trader.utility import load_json, save_json, BarGenerator
 from vnpy.trader.database import database_manager
+from vnpy.trader.setting import SETTINGS
 from vnpy.app.spread_trading.base import EVENT_SPREAD_DATA, SpreadData
 
 
@@ -25,6 +29,7 @@ APP_NAME = "DataRecorder"
 EVENT_RECORDER_LOG = "eRecorderLog"
 EVENT_RECORDER_UPDATE = "eRecorderUpdate"
 EVENT_RECORDER_EXCEPTION = "eRecorderException"
+EVENT_RECORDER_STATUS = "eRecorderStatus"
 
 
 class RecorderEngine(BaseEngine):
@@ -39,6 +44,19 @@ class RecorderEngine(BaseEngine):
         self.thread = Thread(target=self.run)
         self.active = False
 
+        # Data is buffered by (task_type, vt_symbol) and saved in batch
+        self.buffers: Dict[Tuple[str, str], List] = defaultdict(list)
+        self.flush_size: int = SETTINGS["recorder.flush_size"]
+        self.flush_interval: float = SETTINGS["recorder.flush_interval"]
+
+        self.flush_count: int = 0
+        self.flush_latency: float = 0
+        self.max_flush_latency: float = 0
+
+        # Data is kept in buffers and saved again at next flush interval
+        # after database failed
+        self.save_failed: bool = False
+
         self.tick_recordings = {}
         self.bar_recordings = {}
         self.bar_generators = {}
@@ -64,31 +82,126 @@ class RecorderEngine(BaseEngine):
 
     def run(self):
         """"""
+        flush_time = perf_counter() + self.flush_interval
+
         while self.active:
             try:
-                task = self.queue.get(timeout=1)
-                task_type, data = task
+                task = self.queue.get(timeout=max(flush_time - perf_counter(), 0))
+                self.buffer_task(task)
+            except Empty:
+                pass
 
-                if task_type == "tick":
-                    database_manager.save_tick_data([data])
-                elif task_type == "bar":
-                    database_manager.save_bar_data([data])
+            if perf_counter() >= flush_time:
+                self.flush_all()
+                self.put_status_event()
+                flush_time = perf_counter() + self.flush_interval
 
-            except Empty:
-                continue
+        # Save all data left before thread exits
+        while not self.queue.empty():
+            self.buffer_task(self.queue.get())
+        self.flush_all()
 
-            except Exception:
-                self.active = False
+        buffer_size = self.get_buffer_size()
+        if buffer_size:
+            self.write_log(f"数据库写入失败，{buffer_size}条数据未能保存")
+
+    def buffer_task(self, task: tuple):
+        """"""
+        task_type, data = task
+
+        key = (task_type, data.vt_symbol)
+        buf = self.buffers[key]
+        buf.append(data)
+
+        # Wait for next flush interval to retry if database failed
+        if len(buf) >= self.flush_size and not self.save_failed:
+            self.flush(key)
+
+    def flush(self, key: Tuple[str, str]):
+        """
+        Save buffered data of one key, which is kept if failed.
+        """
+        data = self.buffers.get(key, None)
+        if data and self.save_data(key[0], data):
+            self.buffers.pop(key)
+
+    def flush_all(self):
+        """
+        Save all buffered data. Ticks of different symbols are saved
+        together in one database call, while bars are saved by symbol
+        since bar overview is updated for each call.
+        """
+        tick_keys = []
+        ticks = []
+
+        for key in list(self.buffers.keys()):
+            if key[0] == "tick":
+                tick_keys.append(key)
+                ticks.extend(self.buffers[key])
+            else:
+                self.flush(key)
+
+        if ticks and self.save_data("tick", ticks):
+            for key in tick_keys:
+                self.buffers.pop(key)
+
+    def save_data(self, task_type: str, data: list) -> bool:
+        """
+        Save data into database, return False if failed.
+        """
+        start = perf_counter()
+
+        try:
+            if task_type == "tick":
+                database_manager.save_tick_data(data)
+            elif task_type == "bar":
+                database_manager.save_bar_data(data)
+        except Exception:
+            # Only report the first failure until database recovers
+            if not self.save_failed:
+                self.save_failed = True
 
                 info = sys.exc_info()
                 event = Event(EVENT_RECORDER_EXCEPTION, info)
                 self.event_engine.put(event)
+            return False
+
+        if self.save_failed:
+            self.save_failed = False
+            self.write_log("数据库写入恢复")
+
+        self.flush_latency = perf_counter() - start
+        self.max_flush_latency = max(self.flush_latency, self.max_flush_latency)
+        self.flush_count += 1
+        return True
+
+    def get_buffer_size(self) -> int:
+        """"""
+        return sum(len(buf) for buf in list(self.buffers.values()))
+
+    def get_status(self) -> dict:
+        """
+        Get status of writing thread, latency is in milliseconds.
+        """
+        return {
+            "queue_size": self.queue.qsize(),
+            "buffer_size": self.get_buffer_size(),
+            "flush_count": self.flush_count,
+            "flush_latency": self.flush_latency * 1000,
+            "max_flush_latency": self.max_flush_latency * 1000,
+            "save_failed": self.save_failed,
+        }
+
+    def put_status_event(self):
+        """"""
+        event = Event(EVENT_RECORDER_STATUS, self.get_status())
+        self.event_engine.put(event)
 
     def close(self):
         """"""
         self.active = False
 
-        if self.thread.isAlive():
+        if self.thread.is_alive():
             self.thread.join()
 
     def start(self):
@@ -178,7 +291,8 @@ class RecorderEngine(BaseEngine):
 
     def register_event(self):
         """"""
-        self.event_engine.register(EVENT_TICK, self.process_tick_event)
+        # Bar generators are per vt_symbol, so ticks can be processed by key
+        self.event_engine.register(EVENT_TICK, self.process_tick_event, AFFINITY_KEY)
         self.event_engine.register(EVENT_CONTRACT, self.process_contract_event)
         self.event_engine.register(EVENT_SPREAD_DATA, self.process_spread_event)
 
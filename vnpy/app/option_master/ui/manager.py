@@ -6,6 +6,7 @@ from scipy import interpolate
 
 from vnpy.event import Event
 from vnpy.trader.ui import QtWidgets, QtCore, QtGui
+from vnpy.trader.ui.widget import ConflatedEmitter
 from vnpy.trader.event import EVENT_TICK, EVENT_TIMER, EVENT_TRADE
 from vnpy.trader.object import TickData, TradeData
 from vnpy.trader.utility import save_json, load_json
@@ -398,9 +399,10 @@ class ElectronicEyeMonitor(QtWidgets.QTableWidget):
             EVENT_OPTION_ALGO_STATUS,
             self.signal_status.emit
         )
-        self.event_engine.register(
+        self.tick_emitter = ConflatedEmitter(self.signal_tick)
+        self.event_engine.register_conflated(
             EVENT_TICK,
-            self.signal_tick.emit
+            self.tick_emitter
         )
         self.event_engine.register(
             EVENT_TRADE,
@@ -4,7 +4,9 @@ from collections import defaultdict
 
 from vnpy.event import Event
 from vnpy.trader.ui import QtWidgets, QtCore, QtGui
-from vnpy.trader.ui.widget import COLOR_BID, COLOR_ASK, COLOR_BLACK
+from vnpy.trader.ui.widget import (
+    COLOR_BID, COLOR_ASK, COLOR_BLACK, ConflatedEmitter
+)
 from vnpy.trader.event import (
     EVENT_TICK, EVENT_TRADE, EVENT_POSITION, EVENT_TIMER
 )
@@ -242,7 +244,8 @@ class OptionMarketMonitor(MonitorTable):
         self.signal_trade.connect(self.process_trade_event)
         self.signal_position.connect(self.process_position_event)
 
-        self.event_engine.register(EVENT_TICK, self.signal_tick.emit)
+        self.tick_emitter = ConflatedEmitter(self.signal_tick)
+        self.event_engine.register_conflated(EVENT_TICK, self.tick_emitter)
         self.event_engine.register(EVENT_TRADE, self.signal_trade.emit)
         self.event_engine.register(EVENT_POSITION, self.signal_position.emit)
 
@@ -441,7 +444,8 @@ class OptionGreeksMonitor(MonitorTable):
         self.signal_trade.connect(self.process_trade_event)
         self.signal_position.connect(self.process_position_event)
 
-        self.event_engine.register(EVENT_TICK, self.signal_tick.emit)
+        self.tick_emitter = ConflatedEmitter(self.signal_tick)
+        self.event_engine.register_conflated(EVENT_TICK, self.tick_emitter)
         self.event_engine.register(EVENT_TRADE, self.signal_trade.emit)
         self.event_engine.register(EVENT_POSITION, self.signal_position.emit)
 
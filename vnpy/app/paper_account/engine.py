@@ -4,7 +4,7 @@ from datetime import datetime
 from tzlocal import get_localzone
 
 from vnpy.event import Event, EventEngine
-from vnpy.trader.utility import extract_vt_symbol, save_json, load_json
+from vnpy.trader.utility import extract_vt_symbol, save_json, load_json, JsonStore
 from vnpy.trader.engine import BaseEngine, MainEngine
 from vnpy.trader.object import (
     OrderRequest, CancelRequest, SubscribeRequest,
@@ -54,6 +54,8 @@ class PaperEngine(BaseEngine):
         self.ticks: Dict[str, TickData] = {}
         self.positions: Dict[Tuple[str, Direction], PositionData] = {}
 
+        self.data_store: JsonStore = JsonStore(self.data_filename)
+
         # Patch main engine functions
         self._subscribe = main_engine.subscribe
         self._query_history = main_engine.query_history
@@ -67,6 +69,10 @@ class PaperEngine(BaseEngine):
         self.load_data()
         self.register_event()
 
+    def close(self) -> None:
+        """"""
+        self.data_store.close()
+
     def register_event(self):
         """"""
         self.event_engine.register(EVENT_CONTRACT, self.process_contract_event)
@@ -386,7 +392,7 @@ class PaperEngine(BaseEngine):
             self.put_event(EVENT_POSITION, copy(long_position))
             self.put_event(EVENT_POSITION, copy(short_position))
 
-        self.save_data()
+        self.save_data(vt_symbol)
 
     def get_position(self, vt_symbol: str, direction: Direction):
         """"""
@@ -411,12 +417,17 @@ class PaperEngine(BaseEngine):
         log = LogData(msg=msg, gateway_name=GATEWAY_NAME)
         self.put_event(EVENT_LOG, log)
 
-    def save_data(self) -> None:
-        """"""
-        position_data = []
-
+    def save_data(self, vt_symbol: str = "") -> None:
+        """
+        Save positions of vt_symbol (all if not given) by data store.
+        """
         for position in self.positions.values():
+            if vt_symbol and position.vt_symbol != vt_symbol:
+                continue
+
             if not position.volume:
+                if position.vt_positionid in self.data_store.data:
+                    self.data_store.remove(position.vt_positionid)
                 continue
 
             d = {
@@ -425,15 +436,21 @@ class PaperEngine(BaseEngine):
                 "price": position.price,
                 "direction": position.direction.value
             }
-            position_data.append(d)
-
-        save_json(self.data_filename, position_data)
+            self.data_store.set(position.vt_positionid, d)
 
     def load_data(self) -> None:
         """"""
+        # Position data was saved as list before
         position_data = load_json(self.data_filename)
+        if isinstance(position_data, list):
+            position_data = {
+                f"{d['vt_symbol']}.{d['direction']}": d for d in position_data
+            }
+            save_json(self.data_filename, position_data)
+
+        position_data = self.data_store.load()
 
-        for d in position_data:
+        for d in position_data.values():
             vt_symbol = d["vt_symbol"]
             direction = Direction(d["direction"])
 
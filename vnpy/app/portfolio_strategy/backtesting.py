@@ -11,8 +11,16 @@ from plotly.subplots import make_subplots
 from pandas import DataFrame
 
 from vnpy.trader.constant import Direction, Offset, Interval, Status
-from vnpy.trader.database import database_manager
+from vnpy.trader.cache import data_cache
 from vnpy.trader.object import OrderData, TradeData, BarData
+from vnpy.trader.statistics import (
+    SUM_FIELDS,
+    calculate_daily_pnl,
+    calculate_statistics,
+    create_daily_df,
+    get_trade_arrays,
+    output_statistics
+)
 from vnpy.trader.utility import round_to, extract_vt_symbol
 
 from .template import StrategyTemplate
@@ -64,6 +72,7 @@ class BacktestingEngine:
 
         self.daily_results = {}
         self.daily_df = None
+        self.daily_updated = False
 
     def clear_data(self) -> None:
         """
@@ -83,6 +92,7 @@ class BacktestingEngine:
         self.logs.clear()
         self.daily_results.clear()
         self.daily_df = None
+        self.daily_updated = False
 
     def set_parameters(
         self,
@@ -221,42 +231,50 @@ class BacktestingEngine:
             self.output("成交记录为空，无法计算")
             return
 
-        # Add trade data into daily reuslt.
+        dates = list(self.daily_results.keys())
+        day_count = len(dates)
+
+        contract_trades = defaultdict(list)
         for trade in self.trades.values():
-            d = trade.datetime.date()
-            daily_result = self.daily_results[d]
-            daily_result.add_trade(trade)
+            contract_trades[trade.vt_symbol].append(trade)
 
-        # Calculate daily result by iteration.
-        pre_closes = {}
-        start_poses = {}
+        # Calculate result of each contract on days with its close price,
+        # and then sum them up.
+        results = {key: np.zeros(day_count) for key in SUM_FIELDS}
 
-        for daily_result in self.daily_results.values():
-            daily_result.calculate_pnl(
-                pre_closes,
-                start_poses,
-                self.sizes,
-                self.rates,
-                self.slippages,
+        for vt_symbol in self.vt_symbols:
+            close_prices = np.fromiter(
+                (
+                    daily_result.close_prices.get(vt_symbol, np.nan)
+                    for daily_result in self.daily_results.values()
+                ),
+                dtype=np.float64,
+                count=day_count
             )
+            valid = ~np.isnan(close_prices)
+            valid_dates = [d for d, v in zip(dates, valid) if v]
 
-            pre_closes = daily_result.close_prices
-            start_poses = daily_result.end_poses
+            trade_days, trade_changes, trade_prices = get_trade_arrays(
+                contract_trades[vt_symbol], valid_dates
+            )
+
+            contract_results = calculate_daily_pnl(
+                close_prices[valid],
+                trade_days,
+                trade_changes,
+                trade_prices,
+                self.sizes[vt_symbol],
+                self.rates[vt_symbol],
+                self.slippages[vt_symbol]
+            )
 
-        # Generate dataframe
-        results = defaultdict(list)
+            for key in SUM_FIELDS:
+                results[key][valid] += contract_results[key]
 
-        for daily_result in self.daily_results.values():
-            fields = [
-                "date", "trade_count", "turnover",
-                "commission", "slippage", "trading_pnl",
-                "holding_pnl", "total_pnl", "net_pnl"
-            ]
-            for key in fields:
-                value = getattr(daily_result, key)
-                results[key].append(value)
+        results["trade_count"] = results["trade_count"].astype(int)
 
-        self.daily_df = DataFrame.from_dict(results).set_index("date")
+        self.daily_df = create_daily_df(dates, results)
+        self.daily_updated = False
 
         self.output("逐日盯市盈亏计算完成")
         return self.daily_df
@@ -269,162 +287,10 @@ class BacktestingEngine:
         if df is None:
             df = self.daily_df
 
-        # Check for init DataFrame
-        if df is None:
-            # Set all statistics to 0 if no trade.
-            start_date = ""
-            end_date = ""
-            total_days = 0
-            profit_days = 0
-            loss_days = 0
-            end_balance = 0
-            max_drawdown = 0
-            max_ddpercent = 0
-            max_drawdown_duration = 0
-            total_net_pnl = 0
-            daily_net_pnl = 0
-            total_commission = 0
-            daily_commission = 0
-            total_slippage = 0
-            daily_slippage = 0
-            total_turnover = 0
-            daily_turnover = 0
-            total_trade_count = 0
-            daily_trade_count = 0
-            total_return = 0
-            annual_return = 0
-            daily_return = 0
-            return_std = 0
-            sharpe_ratio = 0
-            return_drawdown_ratio = 0
-        else:
-            # Calculate balance related time series data
-            df["balance"] = df["net_pnl"].cumsum() + self.capital
-            df["return"] = np.log(df["balance"] / df["balance"].shift(1)).fillna(0)
-            df["highlevel"] = (
-                df["balance"].rolling(
-                    min_periods=1, window=len(df), center=False).max()
-            )
-            df["drawdown"] = df["balance"] - df["highlevel"]
-            df["ddpercent"] = df["drawdown"] / df["highlevel"] * 100
-
-            # Calculate statistics value
-            start_date = df.index[0]
-            end_date = df.index[-1]
-
-            total_days = len(df)
-            profit_days = len(df[df["net_pnl"] > 0])
-            loss_days = len(df[df["net_pnl"] < 0])
-
-            end_balance = df["balance"].iloc[-1]
-            max_drawdown = df["drawdown"].min()
-            max_ddpercent = df["ddpercent"].min()
-            max_drawdown_end = df["drawdown"].idxmin()
-
-            if isinstance(max_drawdown_end, date):
-                max_drawdown_start = df["balance"][:max_drawdown_end].idxmax()
-                max_drawdown_duration = (max_drawdown_end - max_drawdown_start).days
-            else:
-                max_drawdown_duration = 0
-
-            total_net_pnl = df["net_pnl"].sum()
-            daily_net_pnl = total_net_pnl / total_days
-
-            total_commission = df["commission"].sum()
-            daily_commission = total_commission / total_days
+        statistics = calculate_statistics(df, self.capital, self.risk_free)
 
-            total_slippage = df["slippage"].sum()
-            daily_slippage = total_slippage / total_days
-
-            total_turnover = df["turnover"].sum()
-            daily_turnover = total_turnover / total_days
-
-            total_trade_count = df["trade_count"].sum()
-            daily_trade_count = total_trade_count / total_days
-
-            total_return = (end_balance / self.capital - 1) * 100
-            annual_return = total_return / total_days * 240
-            daily_return = df["return"].mean() * 100
-            return_std = df["return"].std() * 100
-
-            if return_std:
-                daily_risk_free = self.risk_free / np.sqrt(240)
-                sharpe_ratio = (daily_return - daily_risk_free) / return_std * np.sqrt(240)
-            else:
-                sharpe_ratio = 0
-
-            return_drawdown_ratio = -total_net_pnl / max_drawdown
-
-        # Output
         if output:
-            self.output("-" * 30)
-            self.output(f"首个交易日：\t{start_date}")
-            self.output(f"最后交易日：\t{end_date}")
-
-            self.output(f"总交易日：\t{total_days}")
-            self.output(f"盈利交易日：\t{profit_days}")
-            self.output(f"亏损交易日：\t{loss_days}")
-
-            self.output(f"起始资金：\t{self.capital:,.2f}")
-            self.output(f"结束资金：\t{end_balance:,.2f}")
-
-            self.output(f"总收益率：\t{total_return:,.2f}%")
-            self.output(f"年化收益：\t{annual_return:,.2f}%")
-            self.output(f"最大回撤: \t{max_drawdown:,.2f}")
-            self.output(f"百分比最大回撤: {max_ddpercent:,.2f}%")
-            self.output(f"最长回撤天数: \t{max_drawdown_duration}")
-
-            self.output(f"总盈亏：\t{total_net_pnl:,.2f}")
-            self.output(f"总手续费：\t{total_commission:,.2f}")
-            self.output(f"总滑点：\t{total_slippage:,.2f}")
-            self.output(f"总成交金额：\t{total_turnover:,.2f}")
-            self.output(f"总成交笔数：\t{total_trade_count}")
-
-            self.output(f"日均盈亏：\t{daily_net_pnl:,.2f}")
-            self.output(f"日均手续费：\t{daily_commission:,.2f}")
-            self.output(f"日均滑点：\t{daily_slippage:,.2f}")
-            self.output(f"日均成交金额：\t{daily_turnover:,.2f}")
-            self.output(f"日均成交笔数：\t{daily_trade_count}")
-
-            self.output(f"日均收益率：\t{daily_return:,.2f}%")
-            self.output(f"收益标准差：\t{return_std:,.2f}%")
-            self.output(f"Sharpe Ratio：\t{sharpe_ratio:,.2f}")
-            self.output(f"收益回撤比：\t{return_drawdown_ratio:,.2f}")
-
-        statistics = {
-            "start_date": start_date,
-            "end_date": end_date,
-            "total_days": total_days,
-            "profit_days": profit_days,
-            "loss_days": loss_days,
-            "capital": self.capital,
-            "end_balance": end_balance,
-            "max_drawdown": max_drawdown,
-            "max_ddpercent": max_ddpercent,
-            "max_drawdown_duration": max_drawdown_duration,
-            "total_net_pnl": total_net_pnl,
-            "daily_net_pnl": daily_net_pnl,
-            "total_commission": total_commission,
-            "daily_commission": daily_commission,
-            "total_slippage": total_slippage,
-            "daily_slippage": daily_slippage,
-            "total_turnover": total_turnover,
-            "daily_turnover": daily_turnover,
-            "total_trade_count": total_trade_count,
-            "daily_trade_count": daily_trade_count,
-            "total_return": total_return,
-            "annual_return": annual_return,
-            "daily_return": daily_return,
-            "return_std": return_std,
-            "sharpe_ratio": sharpe_ratio,
-            "return_drawdown_ratio": return_drawdown_ratio,
-        }
-
-        # Filter potential error infinite value
-        for key, value in statistics.items():
-            if value in (np.inf, -np.inf):
-                value = 0
-            statistics[key] = np.nan_to_num(value)
+            output_statistics(statistics, self.output)
 
         self.output("策略统计指标计算完成")
         return statistics
@@ -683,8 +549,37 @@ class BacktestingEngine:
         """
         Return all daily result data.
         """
+        if not self.daily_updated:
+            self.update_daily_results()
         return list(self.daily_results.values())
 
+    def update_daily_results(self) -> None:
+        """
+        Calculate pnl of daily result objects, which is only necessary
+        for showing them since calculate_result works on arrays.
+        """
+        for trade in self.trades.values():
+            d = trade.datetime.date()
+            daily_result = self.daily_results[d]
+            daily_result.add_trade(trade)
+
+        pre_closes = {}
+        start_poses = {}
+
+        for daily_result in self.daily_results.values():
+            daily_result.calculate_pnl(
+                pre_closes,
+                start_poses,
+                self.sizes,
+                self.rates,
+                self.slippages,
+            )
+
+            pre_closes = daily_result.close_prices
+            start_poses = daily_result.end_poses
+
+        self.daily_updated = True
+
 
 class ContractDailyResult:
     """"""
@@ -841,9 +736,11 @@ def load_bar_data(
     start: datetime,
     end: datetime
 ):
-    """"""
+    """
+    Load bar data as columnar frame.
+    """
     symbol, exchange = extract_vt_symbol(vt_symbol)
 
-    return database_manager.load_bar_data(
+    return data_cache.load_bar_array(
         symbol, exchange, interval, start, end
     )
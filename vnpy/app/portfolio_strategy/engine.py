@@ -37,7 +37,13 @@ from vnpy.trader.constant import (
     Exchange,
     Offset
 )
-from vnpy.trader.utility import load_json, save_json, extract_vt_symbol, round_to
+from vnpy.trader.utility import (
+    load_json,
+    save_json,
+    extract_vt_symbol,
+    round_to,
+    JsonStore
+)
 from vnpy.trader.rqdata import rqdata_client
 from vnpy.trader.converter import OffsetConverter
 from vnpy.trader.database import database_manager
@@ -61,6 +67,7 @@ class StrategyEngine(BaseEngine):
         super().__init__(main_engine, event_engine, APP_NAME)
 
         self.strategy_data: Dict[str, Dict] = {}
+        self.data_store: JsonStore = JsonStore(self.data_filename)
 
         self.classes: Dict[str, Type[StrategyTemplate]] = {}
         self.strategies: Dict[str, StrategyTemplate] = {}
@@ -87,6 +94,7 @@ class StrategyEngine(BaseEngine):
     def close(self):
         """"""
         self.stop_all_strategies()
+        self.data_store.close()
 
     def register_event(self):
         """"""
@@ -527,18 +535,18 @@ class StrategyEngine(BaseEngine):
         """
         Load strategy data from json file.
         """
-        self.strategy_data = load_json(self.data_filename)
+        self.strategy_data = self.data_store.load()
 
     def sync_strategy_data(self, strategy: StrategyTemplate):
         """
-        Sync strategy data into json file.
+        Sync strategy data into json file, which is saved by data store
+        in background.
         """
         data = strategy.get_variables()
         data.pop("inited")      # Strategy status (inited, trading) should not be synced.
         data.pop("trading")
 
-        self.strategy_data[strategy.strategy_name] = data
-        save_json(self.data_filename, self.strategy_data)
+        self.data_store.set(strategy.strategy_name, data)
 
     def get_all_strategy_class_names(self):
         """
@@ -1,11 +1,23 @@
 """"""
 
 import traceback
-from typing import Optional
+import zlib
+from threading import Lock
+from typing import Any, Dict, Optional
 
 from vnpy.event import Event, EventEngine
-from vnpy.rpc import RpcServer
+from vnpy.rpc import RpcServer, make_topic, DEFAULT_WORKER_COUNT
 from vnpy.trader.engine import BaseEngine, MainEngine
+from vnpy.trader.event import (
+    EVENT_TICK,
+    EVENT_ORDER,
+    EVENT_TRADE,
+    EVENT_POSITION,
+    EVENT_ACCOUNT,
+    EVENT_CONTRACT,
+    EVENT_LOG,
+    EVENT_TIMER
+)
 from vnpy.trader.utility import load_json, save_json
 from vnpy.trader.object import LogData
 
@@ -13,6 +25,38 @@ APP_NAME = "RpcService"
 
 EVENT_RPC_LOG = "eRpcLog"
 
+# Attribute of data used as the second key of topic for each event type
+TOPIC_KEYS = {
+    EVENT_TICK: "vt_symbol",
+    EVENT_ORDER: "gateway_name",
+    EVENT_TRADE: "gateway_name",
+    EVENT_POSITION: "gateway_name",
+    EVENT_ACCOUNT: "gateway_name",
+    EVENT_CONTRACT: "gateway_name",
+    EVENT_LOG: "gateway_name",
+}
+
+# Prefixes of specific event types (e.g. EVENT_TICK + vt_symbol) pushed
+# together with general ones
+SPECIFIC_PREFIXES = tuple(type for type in TOPIC_KEYS if type.endswith("."))
+
+# First key of topic for other events (e.g. events of apps), so that
+# client receives all of them with one subscription
+GENERAL_TOPIC = "general"
+
+# Attribute of data used as key in snapshot for each event type, in the
+# order of being restored by client
+SNAPSHOT_KEYS = {
+    EVENT_CONTRACT: "vt_symbol",
+    EVENT_ACCOUNT: "vt_accountid",
+    EVENT_POSITION: "vt_positionid",
+    EVENT_ORDER: "vt_orderid",
+    EVENT_TRADE: "vt_tradeid",
+}
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_CHUNK_SIZE = 1000
+
 
 class RpcEngine(BaseEngine):
     """"""
@@ -24,9 +68,18 @@ class RpcEngine(BaseEngine):
 
         self.rep_address = "tcp://*:2014"
         self.pub_address = "tcp://*:4102"
+        self.worker_count = DEFAULT_WORKER_COUNT
 
         self.server: Optional[RpcServer] = None
 
+        # Latest trading data and sequence number of its last update,
+        # which are changed together with lock held
+        self.seq: int = 0
+        self.states: Dict[str, Dict[str, Any]] = {
+            event_type: {} for event_type in SNAPSHOT_KEYS
+        }
+        self.lock: Lock = Lock()
+
         self.init_server()
         self.load_setting()
         self.register_event()
@@ -35,11 +88,13 @@ class RpcEngine(BaseEngine):
         """"""
         self.server = RpcServer()
 
+        # Order functions are never blocked by slow queries
+        self.server.register(self.main_engine.send_order, high_priority=True)
+        self.server.register(self.main_engine.send_orders, high_priority=True)
+        self.server.register(self.main_engine.cancel_order, high_priority=True)
+        self.server.register(self.main_engine.cancel_orders, high_priority=True)
+
         self.server.register(self.main_engine.subscribe)
-        self.server.register(self.main_engine.send_order)
-        self.server.register(self.main_engine.send_orders)
-        self.server.register(self.main_engine.cancel_order)
-        self.server.register(self.main_engine.cancel_orders)
         self.server.register(self.main_engine.query_history)
 
         self.server.register(self.main_engine.get_tick)
@@ -56,17 +111,23 @@ class RpcEngine(BaseEngine):
         self.server.register(self.main_engine.get_all_contracts)
         self.server.register(self.main_engine.get_all_active_orders)
 
+        self.server.register(self.event_engine.get_statistics)
+
+        self.server.register(self.get_snapshot)
+
     def load_setting(self):
         """"""
         setting = load_json(self.setting_filename)
         self.rep_address = setting.get("rep_address", self.rep_address)
         self.pub_address = setting.get("pub_address", self.pub_address)
+        self.worker_count = setting.get("worker_count", self.worker_count)
 
     def save_setting(self):
         """"""
         setting = {
             "rep_address": self.rep_address,
-            "pub_address": self.pub_address
+            "pub_address": self.pub_address,
+            "worker_count": self.worker_count
         }
         save_json(self.setting_filename, setting)
 
@@ -80,7 +141,11 @@ class RpcEngine(BaseEngine):
         self.pub_address = pub_address
 
         try:
-            self.server.start(rep_address, pub_address)
+            self.server.start(
+                rep_address,
+                pub_address,
+                worker_count=self.worker_count
+            )
         except:  # noqa
             msg = traceback.format_exc()
             self.write_log(f"RPC服务启动失败：{msg}")
@@ -109,10 +174,88 @@ class RpcEngine(BaseEngine):
         """"""
         self.event_engine.register_general(self.process_event)
 
+        # Data received before the engine is added
+        with self.lock:
+            for data in self.main_engine.get_all_contracts():
+                self.states[EVENT_CONTRACT][data.vt_symbol] = data
+            for data in self.main_engine.get_all_accounts():
+                self.states[EVENT_ACCOUNT][data.vt_accountid] = data
+            for data in self.main_engine.get_all_positions():
+                self.states[EVENT_POSITION][data.vt_positionid] = data
+            for data in self.main_engine.get_all_orders():
+                self.states[EVENT_ORDER][data.vt_orderid] = data
+            for data in self.main_engine.get_all_trades():
+                self.states[EVENT_TRADE][data.vt_tradeid] = data
+
     def process_event(self, event: Event):
+        """
+        Publish event with topic of event type and key of data (e.g.
+        "eTick.|rb2010.SHFE|"), so that client receives only what it
+        subscribes.
+
+        Update of trading data is published with sequence number, and
+        others with None.
+        """
+        snapshot_key = SNAPSHOT_KEYS.get(event.type, None)
+
+        if snapshot_key:
+            with self.lock:
+                data = event.data
+                self.states[event.type][getattr(data, snapshot_key)] = data
+
+                self.seq += 1
+                self.publish_event(event, self.seq)
+        else:
+            self.publish_event(event, None)
+
+    def publish_event(self, event: Event, seq: Optional[int]) -> None:
         """"""
-        if self.server.is_active():
-            self.server.publish("", event)
+        if not self.server.is_active():
+            return
+
+        key_name = TOPIC_KEYS.get(event.type, None)
+
+        if key_name:
+            topic = make_topic(event.type, getattr(event.data, key_name))
+        # Specific event is restored from general one by client
+        elif event.type.startswith(SPECIFIC_PREFIXES):
+            return
+        # Client has timer of its own
+        elif event.type == EVENT_TIMER:
+            return
+        else:
+            topic = make_topic(GENERAL_TOPIC, event.type)
+
+        self.server.publish(topic, (seq, event))
+
+    def get_snapshot(self, chunk_size: int = SNAPSHOT_CHUNK_SIZE) -> dict:
+        """
+        Get all trading data with sequence number of the last update
+        included, so that client applies only updates after it.
+
+        Data is split into zlib compressed chunks of event type and a
+        list of data objects, which are restored one by one by client.
+        """
+        with self.lock:
+            seq = self.seq
+            states = [
+                (event_type, list(state.values()))
+                for event_type, state in self.states.items()
+            ]
+
+        chunks = []
+        for event_type, objects in states:
+            for i in range(0, len(objects), chunk_size):
+                data = self.server.serializer.dumps(
+                    [event_type, objects[i: i + chunk_size]]
+                )
+                chunks.append(zlib.compress(data))
+
+        return {
+            "version": SNAPSHOT_VERSION,
+            "seq": seq,
+            "chunks": chunks
+        }
 
     def write_log(self, msg: str) -> None:
         """"""
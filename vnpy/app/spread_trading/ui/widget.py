@@ -102,6 +102,7 @@ class SpreadDataMonitor(BaseMonitor):
     event_type = EVENT_SPREAD_DATA
     data_key = "name"
     sorting = False
+    conflated = True
 
     headers = {
         "name": {"display": "名称", "cell": BaseCell, "update": False},
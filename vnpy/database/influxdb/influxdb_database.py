@@ -1,17 +1,22 @@
 """"""
 from datetime import datetime
-from typing import List
+from typing import Iterator, List, Set
 import shelve
 
 from influxdb import InfluxDBClient
 
 from vnpy.trader.constant import Exchange, Interval
 from vnpy.trader.object import BarData, TickData
+from vnpy.trader.frame import BarFrame, TickFrame
 from vnpy.trader.database import (
     BaseDatabase,
     BarOverview,
     DB_TZ,
-    convert_tz
+    BAR_ARRAY_FIELDS,
+    TICK_ARRAY_FIELDS,
+    convert_tz,
+    create_bar_frame,
+    create_tick_frame
 )
 from vnpy.trader.setting import SETTINGS
 from vnpy.trader.utility import (
@@ -66,60 +71,87 @@ class InfluxdbDatabase(BaseDatabase):
             }
             json_body.append(d)
 
-        self.client.write_points(json_body, batch_size=10000)
-
-        # Update bar overview
+        # Bars already in database are overwritten, so only new bars are
+        # added into overview count.
         symbol, exchange = extract_vt_symbol(vt_symbol)
         key = f"{vt_symbol}_{interval.value}"
 
+        datetimes = {bar.datetime for bar in bars}
+        start = min(datetimes)
+        end = max(datetimes)
+
         f = shelve.open(self.overview_filepath)
         overview = f.get(key, None)
 
+        if overview and start <= overview.end and end >= overview.start:
+            replaced = self.count_bar_data(vt_symbol, interval, datetimes)
+        else:
+            replaced = 0
+
+        self.client.write_points(json_body, batch_size=10000)
+
+        # Update bar overview
         if not overview:
             overview = BarOverview(
                 symbol=symbol,
                 exchange=exchange,
                 interval=interval
             )
-            overview.count = len(bars)
-            overview.start = bars[0].datetime
-            overview.end = bars[-1].datetime
+            overview.count = len(datetimes)
+            overview.start = start
+            overview.end = end
         else:
-            overview.start = min(overview.start, bars[0].datetime)
-            overview.end = max(overview.end, bars[-1].datetime)
-
-            query = (
-                "select count(close_price) from bar_data"
-                " where vt_symbol=$vt_symbol"
-                " and interval=$interval"
-            )
-            bind_params = {
-                "vt_symbol": vt_symbol,
-                "interval": interval.value
-            }
-            result = self.client.query(query, bind_params=bind_params)
-            points = result.get_points()
-
-            for d in points:
-                overview.count = d["count"]
+            overview.start = min(overview.start, start)
+            overview.end = max(overview.end, end)
+            overview.count += len(datetimes) - replaced
 
         f[key] = overview
         f.close()
 
+    def count_bar_data(
+        self,
+        vt_symbol: str,
+        interval: Interval,
+        datetimes: Set[datetime]
+    ) -> int:
+        """
+        Count bars of given datetimes in database.
+        """
+        query = (
+            "select close_price from bar_data"
+            " where vt_symbol=$vt_symbol"
+            " and interval=$interval"
+            f" and time >= '{min(datetimes):%Y-%m-%dT%H:%M:%SZ}'"
+            f" and time <= '{max(datetimes):%Y-%m-%dT%H:%M:%SZ}';"
+        )
+
+        bind_params = {
+            "vt_symbol": vt_symbol,
+            "interval": interval.value
+        }
+
+        result = self.client.query(query, bind_params=bind_params)
+        points = result.get_points()
+
+        count = 0
+        for d in points:
+            dt = datetime.strptime(d["time"], "%Y-%m-%dT%H:%M:%SZ")
+            if dt in datetimes:
+                count += 1
+
+        return count
+
     def save_tick_data(self, ticks: List[TickData]) -> bool:
         """"""
         json_body = []
 
-        tick = ticks[0]
-        vt_symbol = tick.vt_symbol
-
         for tick in ticks:
             tick.datetime = convert_tz(tick.datetime)
 
             d = {
                 "measurement": "tick_data",
                 "tags": {
-                    "vt_symbol": vt_symbol
+                    "vt_symbol": tick.vt_symbol
                 },
                 "time": tick.datetime.isoformat(),
                 "fields": {
@@ -278,6 +310,172 @@ class InfluxdbDatabase(BaseDatabase):
 
         return ticks
 
+    def load_bar_array(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime
+    ) -> BarFrame:
+        """"""
+        # Time column always comes first in query result
+        fields = ",".join(BAR_ARRAY_FIELDS[1:])
+        query = (
+            f"select {fields} from bar_data"
+            " where vt_symbol=$vt_symbol"
+            " and interval=$interval"
+            f" and time >= '{start.date().isoformat()}'"
+            f" and time <= '{end.date().isoformat()}';"
+        )
+
+        bind_params = {
+            "vt_symbol": generate_vt_symbol(symbol, exchange),
+            "interval": interval.value
+        }
+
+        rows = self.query_rows(query, bind_params)
+        return create_bar_frame(symbol, exchange, interval, rows)
+
+    def load_tick_array(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        start: datetime,
+        end: datetime
+    ) -> TickFrame:
+        """"""
+        fields = ",".join(TICK_ARRAY_FIELDS[1:])
+        query = (
+            f"select {fields} from tick_data"
+            " where vt_symbol=$vt_symbol"
+            f" and time >= '{start.date().isoformat()}'"
+            f" and time <= '{end.date().isoformat()}';"
+        )
+
+        bind_params = {
+            "vt_symbol": generate_vt_symbol(symbol, exchange),
+        }
+
+        rows = self.query_rows(query, bind_params)
+        return create_tick_frame(symbol, exchange, rows)
+
+    def iter_bar_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime,
+        chunk_size: int = 100_000
+    ) -> Iterator[BarData]:
+        """"""
+        for frame in self.iter_bar_array(
+            symbol, exchange, interval, start, end, chunk_size
+        ):
+            yield from frame
+
+    def iter_tick_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        start: datetime,
+        end: datetime,
+        chunk_size: int = 100_000
+    ) -> Iterator[TickData]:
+        """"""
+        for frame in self.iter_tick_array(symbol, exchange, start, end, chunk_size):
+            yield from frame
+
+    def iter_bar_array(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime,
+        chunk_size: int = 100_000
+    ) -> Iterator[BarFrame]:
+        """"""
+        fields = ",".join(BAR_ARRAY_FIELDS[1:])
+        query = (
+            f"select {fields} from bar_data"
+            " where vt_symbol=$vt_symbol"
+            " and interval=$interval"
+            f" and time >= '{start.date().isoformat()}'"
+            f" and time <= '{end.date().isoformat()}';"
+        )
+
+        bind_params = {
+            "vt_symbol": generate_vt_symbol(symbol, exchange),
+            "interval": interval.value
+        }
+
+        for rows in self.iter_rows(query, bind_params, chunk_size):
+            yield create_bar_frame(symbol, exchange, interval, rows)
+
+    def iter_tick_array(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        start: datetime,
+        end: datetime,
+        chunk_size: int = 100_000
+    ) -> Iterator[TickFrame]:
+        """"""
+        fields = ",".join(TICK_ARRAY_FIELDS[1:])
+        query = (
+            f"select {fields} from tick_data"
+            " where vt_symbol=$vt_symbol"
+            f" and time >= '{start.date().isoformat()}'"
+            f" and time <= '{end.date().isoformat()}';"
+        )
+
+        bind_params = {
+            "vt_symbol": generate_vt_symbol(symbol, exchange),
+        }
+
+        for rows in self.iter_rows(query, bind_params, chunk_size):
+            yield create_tick_frame(symbol, exchange, rows)
+
+    def query_rows(self, query: str, bind_params: dict) -> list:
+        """
+        Get raw value rows of query result, with time in epoch
+        microseconds instead of time string.
+        """
+        result = self.client.query(query, bind_params=bind_params, epoch="u")
+
+        rows = []
+        for series in result.raw.get("series", []):
+            rows.extend(series["values"])
+        return rows
+
+    def iter_rows(
+        self,
+        query: str,
+        bind_params: dict,
+        chunk_size: int
+    ) -> Iterator[list]:
+        """
+        Iterate raw value rows of query result, which is streamed from
+        server in chunks of chunk_size.
+        """
+        results = self.client.query(
+            query,
+            bind_params=bind_params,
+            epoch="u",
+            chunked=True,
+            chunk_size=chunk_size
+        )
+
+        for result in results:
+            rows = []
+            for series in result.raw.get("series", []):
+                rows.extend(series["values"])
+
+            if rows:
+                yield rows
+
     def delete_bar_data(
         self,
         symbol: str,
@@ -366,17 +564,19 @@ class InfluxdbDatabase(BaseDatabase):
         overview_count = len(f)
 
         if data_count and not overview_count:
-            self.init_bar_overview()
+            self.rebuild_overview()
 
         overviews = list(f.values())
         f.close()
         return overviews
 
-    def init_bar_overview(self) -> None:
+    def rebuild_overview(self) -> None:
         """
-        Init overview table if not exists.
+        Rebuild bar overview from all bar data in database, which can be
+        used for repairing overview.
         """
         f = shelve.open(self.overview_filepath)
+        f.clear()
 
         query: str = "select count(close_price) from bar_data group by *"
         result = self.client.query(query)
@@ -406,9 +606,9 @@ class InfluxdbDatabase(BaseDatabase):
     def get_bar_datetime(self, vt_symbol: str, interval: Interval, order: int) -> datetime:
         """"""
         if order > 0:
-            keyword = "last"
-        else:
             keyword = "first"
+        else:
+            keyword = "last"
 
         query = (
             f"select {keyword}(close_price), * from bar_data"
@@ -1,6 +1,6 @@
 """"""
 from datetime import datetime
-from typing import List
+from typing import Iterator, List
 
 from mongoengine import (
     Document,
@@ -15,11 +15,17 @@ from mongoengine.errors import DoesNotExist
 
 from vnpy.trader.constant import Exchange, Interval
 from vnpy.trader.object import BarData, TickData
+from vnpy.trader.frame import BarFrame, TickFrame
 from vnpy.trader.database import (
     BaseDatabase,
     BarOverview,
     DB_TZ,
-    convert_tz
+    BAR_ARRAY_FIELDS,
+    TICK_ARRAY_FIELDS,
+    convert_tz,
+    create_bar_frame,
+    create_tick_frame,
+    iter_batches
 )
 from vnpy.trader.setting import SETTINGS
 
@@ -158,7 +164,9 @@ class MongodbDatabase(BaseDatabase):
         exchange = bar.exchange
         interval = bar.interval
 
-        # Upsert data into mongodb
+        # Convert bar object to dict and adjust timezone
+        data = []
+
         for bar in bars:
             bar.datetime = convert_tz(bar.datetime)
 
@@ -167,16 +175,9 @@ class MongodbDatabase(BaseDatabase):
             d["interval"] = d["interval"].value
             d.pop("gateway_name")
             d.pop("vt_symbol")
-            param = to_update_param(d)
-
-            DbBarData.objects(
-                symbol=d["symbol"],
-                exchange=d["exchange"],
-                interval=d["interval"],
-                datetime=d["datetime"],
-            ).update_one(upsert=True, **param)
+            data.append(d)
 
-        # Update bar overview
+        # Get bar overview
         try:
             overview: DbBarOverview = DbBarOverview.objects(
                 symbol=symbol,
@@ -190,18 +191,42 @@ class MongodbDatabase(BaseDatabase):
                 interval=interval.value
             )
 
-        if not overview.start:
-            overview.start = bars[0].datetime
-            overview.end = bars[-1].datetime
-            overview.count = len(bars)
-        else:
-            overview.start = min(bars[0].datetime, overview.start)
-            overview.end = max(bars[-1].datetime, overview.end)
-            overview.count = DbBarData.objects(
+        # Bars already in database are replaced by upsert, so only new
+        # bars are added into overview count.
+        datetimes = list({d["datetime"] for d in data})
+        start = min(datetimes)
+        end = max(datetimes)
+
+        if overview.start and start <= overview.end and end >= overview.start:
+            replaced = DbBarData.objects(
                 symbol=symbol,
                 exchange=exchange.value,
-                interval=interval.value
+                interval=interval.value,
+                datetime__in=datetimes
             ).count()
+        else:
+            replaced = 0
+
+        # Upsert data into mongodb
+        for d in data:
+            param = to_update_param(d)
+
+            DbBarData.objects(
+                symbol=d["symbol"],
+                exchange=d["exchange"],
+                interval=d["interval"],
+                datetime=d["datetime"],
+            ).update_one(upsert=True, **param)
+
+        # Update bar overview
+        if not overview.start:
+            overview.start = start
+            overview.end = end
+            overview.count = len(datetimes)
+        else:
+            overview.start = min(start, overview.start)
+            overview.end = max(end, overview.end)
+            overview.count += len(datetimes) - replaced
 
         overview.save()
 
@@ -278,6 +303,129 @@ class MongodbDatabase(BaseDatabase):
 
         return ticks
 
+    def load_bar_array(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime
+    ) -> BarFrame:
+        """"""
+        s: QuerySet = DbBarData.objects(
+            symbol=symbol,
+            exchange=exchange.value,
+            interval=interval.value,
+            datetime__gte=convert_tz(start),
+            datetime__lte=convert_tz(end),
+        ).order_by("datetime").only(*BAR_ARRAY_FIELDS)
+
+        # Read raw documents from pymongo without creating Document objects
+        rows = [
+            [d.get(name, None) for name in BAR_ARRAY_FIELDS]
+            for d in s.as_pymongo()
+        ]
+        return create_bar_frame(symbol, exchange, interval, rows)
+
+    def load_tick_array(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        start: datetime,
+        end: datetime
+    ) -> TickFrame:
+        """"""
+        s: QuerySet = DbTickData.objects(
+            symbol=symbol,
+            exchange=exchange.value,
+            datetime__gte=convert_tz(start),
+            datetime__lte=convert_tz(end),
+        ).order_by("datetime").only(*TICK_ARRAY_FIELDS)
+
+        rows = [
+            [d.get(name, None) for name in TICK_ARRAY_FIELDS]
+            for d in s.as_pymongo()
+        ]
+        return create_tick_frame(symbol, exchange, rows)
+
+    def iter_bar_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime,
+        chunk_size: int = 100_000
+    ) -> Iterator[BarData]:
+        """"""
+        for frame in self.iter_bar_array(
+            symbol, exchange, interval, start, end, chunk_size
+        ):
+            yield from frame
+
+    def iter_tick_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        start: datetime,
+        end: datetime,
+        chunk_size: int = 100_000
+    ) -> Iterator[TickData]:
+        """"""
+        for frame in self.iter_tick_array(symbol, exchange, start, end, chunk_size):
+            yield from frame
+
+    def iter_bar_array(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime,
+        chunk_size: int = 100_000
+    ) -> Iterator[BarFrame]:
+        """"""
+        s: QuerySet = DbBarData.objects(
+            symbol=symbol,
+            exchange=exchange.value,
+            interval=interval.value,
+            datetime__gte=convert_tz(start),
+            datetime__lte=convert_tz(end),
+        ).order_by("datetime").only(*BAR_ARRAY_FIELDS)
+
+        # Server side cursor returns documents in batches of chunk_size
+        rows = (
+            [d.get(name, None) for name in BAR_ARRAY_FIELDS]
+            for d in s.as_pymongo().batch_size(chunk_size)
+        )
+
+        for batch in iter_batches(rows, chunk_size):
+            yield create_bar_frame(symbol, exchange, interval, batch)
+
+    def iter_tick_array(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        start: datetime,
+        end: datetime,
+        chunk_size: int = 100_000
+    ) -> Iterator[TickFrame]:
+        """"""
+        s: QuerySet = DbTickData.objects(
+            symbol=symbol,
+            exchange=exchange.value,
+            datetime__gte=convert_tz(start),
+            datetime__lte=convert_tz(end),
+        ).order_by("datetime").only(*TICK_ARRAY_FIELDS)
+
+        rows = (
+            [d.get(name, None) for name in TICK_ARRAY_FIELDS]
+            for d in s.as_pymongo().batch_size(chunk_size)
+        )
+
+        for batch in iter_batches(rows, chunk_size):
+            yield create_tick_frame(symbol, exchange, batch)
+
     def delete_bar_data(
         self,
         symbol: str,
@@ -320,7 +468,7 @@ class MongodbDatabase(BaseDatabase):
         data_count = DbBarData.objects.count()
         overview_count = DbBarOverview.objects.count()
         if data_count and not overview_count:
-            self.init_bar_overview()
+            self.rebuild_overview()
 
         s: QuerySet = DbBarOverview.objects()
         overviews = []
@@ -330,9 +478,10 @@ class MongodbDatabase(BaseDatabase):
             overviews.append(overview)
         return overviews
 
-    def init_bar_overview(self) -> None:
+    def rebuild_overview(self) -> None:
         """
-        Init overview table if not exists.
+        Rebuild bar overview from all bar data in database, which can be
+        used for repairing overview.
         """
         s: QuerySet = (
             DbBarData.objects.aggregate({
@@ -342,11 +491,15 @@ class MongodbDatabase(BaseDatabase):
                         "exchange": "$exchange",
                         "interval": "$interval",
                     },
-                    "count": {"$sum": 1}
+                    "count": {"$sum": 1},
+                    "start": {"$min": "$datetime"},
+                    "end": {"$max": "$datetime"},
                 }
             })
         )
 
+        DbBarOverview.objects.delete()
+
         for d in s:
             id_data = d["_id"]
 
@@ -355,29 +508,8 @@ class MongodbDatabase(BaseDatabase):
             overview.exchange = id_data["exchange"]
             overview.interval = id_data["interval"]
             overview.count = d["count"]
-
-            start_bar: DbBarData = (
-                DbBarData.objects(
-                    symbol=id_data["symbol"],
-                    exchange=id_data["exchange"],
-                    interval=id_data["interval"],
-                )
-                .order_by("+datetime")
-                .first()
-            )
-            overview.start = start_bar.datetime
-
-            end_bar: DbBarData = (
-                DbBarData.objects(
-                    symbol=id_data["symbol"],
-                    exchange=id_data["exchange"],
-                    interval=id_data["interval"],
-                )
-                .order_by("-datetime")
-                .first()
-            )
-            overview.end = end_bar.datetime
-
+            overview.start = d["start"]
+            overview.end = d["end"]
             overview.save()
 
 
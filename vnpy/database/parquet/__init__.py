@@ -0,0 +1 @@
+from .parquet_database import database_manager
@@ -0,0 +1,642 @@
+""""""
+import json
+import os
+import re
+import shutil
+from datetime import datetime
+from itertools import groupby
+from operator import attrgetter
+from pathlib import Path
+from time import time_ns
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.object import BarData, TickData
+from vnpy.trader.frame import BarFrame, TickFrame, DATETIME_DTYPE
+from vnpy.trader.utility import get_folder_path
+from vnpy.trader.database import (
+    BaseDatabase,
+    BarOverview,
+    DB_TZ,
+    BAR_ARRAY_FIELDS,
+    TICK_ARRAY_FIELDS,
+    convert_tz,
+    get_bar_rows,
+    get_tick_rows
+)
+
+
+FOLDER_NAME = "parquet_database"
+
+COMPRESSION = "zstd"
+
+# Datetime range of every row group is kept in file footer, so that row
+# groups out of range queried are skipped without being read.
+ROW_GROUP_SIZE = 50_000
+
+BAR_SCHEMA = pa.schema(
+    [("datetime", pa.timestamp("us"))]
+    + [(name, pa.float64()) for name in BAR_ARRAY_FIELDS[1:]]
+)
+TICK_SCHEMA = pa.schema(
+    [("datetime", pa.timestamp("us")), ("name", pa.string())]
+    + [(name, pa.float64()) for name in TICK_ARRAY_FIELDS[2:]]
+)
+
+
+class ParquetDatabase(BaseDatabase):
+    """
+    Local columnar database of Parquet files, partitioned by contract,
+    interval and month:
+
+        bar/<vt_symbol>/<interval>/<yyyy-mm>.parquet
+        tick/<vt_symbol>/<yyyy-mm>.parquet
+
+    Rows in each file are unique and ordered by datetime (wall time of
+    DB_TZ, the same as other drivers). Saving data rewrites files of the
+    months involved, which is atomic for readers in other processes.
+
+    Only files of months within range queried are opened, and row groups
+    are filtered by their datetime statistics (predicate pushdown).
+    """
+
+    def __init__(self) -> None:
+        """"""
+        self.folder_path: Path = get_folder_path(FOLDER_NAME)
+        self.bar_path: Path = self.folder_path.joinpath("bar")
+        self.tick_path: Path = self.folder_path.joinpath("tick")
+        self.overview_path: Path = self.folder_path.joinpath("overview.json")
+
+        self.overviews: Dict[Tuple[str, Exchange, Interval], BarOverview] = {}
+        self.load_overview()
+
+    def save_bar_data(self, bars: List[BarData]) -> bool:
+        """"""
+        key = attrgetter("symbol", "exchange", "interval")
+
+        for (symbol, exchange, interval), group in groupby(bars, key):
+            columns = list(zip(*get_bar_rows(group)))[3:]
+            table = create_table(columns, BAR_SCHEMA)
+
+            path = self.get_bar_path(symbol, exchange, interval)
+            metadata = {
+                "symbol": symbol,
+                "exchange": exchange.value,
+                "interval": interval.value
+            }
+            changed = self.merge_table(path, table, metadata)
+
+            # Update bar overview
+            overview = self.overviews.get((symbol, exchange, interval), None)
+            start, end = get_datetime_range(table)
+
+            if not overview:
+                overview = BarOverview(
+                    symbol=symbol,
+                    exchange=exchange,
+                    interval=interval,
+                    start=start,
+                    end=end
+                )
+                self.overviews[(symbol, exchange, interval)] = overview
+            else:
+                overview.start = min(start, overview.start)
+                overview.end = max(end, overview.end)
+
+            overview.count += changed
+
+        self.save_overview()
+
+    def save_tick_data(self, ticks: List[TickData]) -> bool:
+        """"""
+        # Ticks of different contracts may be saved together by recorder
+        key = attrgetter("symbol", "exchange")
+        groups: Dict[Tuple[str, Exchange], List[TickData]] = {}
+
+        for tick in ticks:
+            groups.setdefault(key(tick), []).append(tick)
+
+        for (symbol, exchange), group in groups.items():
+            columns = list(zip(*get_tick_rows(group)))[2:]
+            table = create_table(columns, TICK_SCHEMA)
+
+            path = self.get_tick_path(symbol, exchange)
+            metadata = {"symbol": symbol, "exchange": exchange.value}
+            self.merge_table(path, table, metadata)
+
+    def load_bar_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime
+    ) -> List[BarData]:
+        """"""
+        frame = self.load_bar_array(symbol, exchange, interval, start, end)
+        columns = [frame.datetime.tolist()]
+        columns.extend(frame.columns[name].tolist() for name in BarFrame.float_fields)
+
+        bars: List[BarData] = []
+        for dt, *values in zip(*columns):
+            bar = BarData(
+                symbol=symbol,
+                exchange=exchange,
+                interval=interval,
+                datetime=DB_TZ.localize(dt),
+                gateway_name="DB",
+                **dict(zip(BarFrame.float_fields, values))
+            )
+            bars.append(bar)
+
+        return bars
+
+    def load_tick_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        start: datetime,
+        end: datetime
+    ) -> List[TickData]:
+        """"""
+        path = self.get_tick_path(symbol, exchange)
+        table = self.read_table(path, TICK_SCHEMA, start, end)
+        names = table.column("name").to_pylist()
+        columns = [table.column(name).to_pylist() for name in TICK_ARRAY_FIELDS[2:]]
+
+        ticks: List[TickData] = []
+        for dt, name, *values in zip(table.column("datetime").to_pylist(), names, *columns):
+            tick = TickData(
+                symbol=symbol,
+                exchange=exchange,
+                datetime=DB_TZ.localize(dt),
+                name=name,
+                gateway_name="DB",
+                **dict(zip(TICK_ARRAY_FIELDS[2:], values))
+            )
+            ticks.append(tick)
+
+        return ticks
+
+    def load_bar_array(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime
+    ) -> BarFrame:
+        """"""
+        path = self.get_bar_path(symbol, exchange, interval)
+        table = self.read_table(path, BAR_SCHEMA, start, end)
+        return create_bar_frame(symbol, exchange, interval, table)
+
+    def load_tick_array(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        start: datetime,
+        end: datetime
+    ) -> TickFrame:
+        """"""
+        path = self.get_tick_path(symbol, exchange)
+        table = self.read_table(path, TICK_SCHEMA, start, end)
+        return create_tick_frame(symbol, exchange, table)
+
+    def iter_bar_array(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime,
+        chunk_size: int = 100_000
+    ) -> Iterator[BarFrame]:
+        """"""
+        path = self.get_bar_path(symbol, exchange, interval)
+
+        for table in self.iter_tables(path, BAR_SCHEMA, start, end, chunk_size):
+            yield create_bar_frame(symbol, exchange, interval, table)
+
+    def iter_tick_array(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        start: datetime,
+        end: datetime,
+        chunk_size: int = 100_000
+    ) -> Iterator[TickFrame]:
+        """"""
+        path = self.get_tick_path(symbol, exchange)
+
+        for table in self.iter_tables(path, TICK_SCHEMA, start, end, chunk_size):
+            yield create_tick_frame(symbol, exchange, table)
+
+    def iter_bar_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime,
+        chunk_size: int = 100_000
+    ) -> Iterator[BarData]:
+        """"""
+        for frame in self.iter_bar_array(
+            symbol, exchange, interval, start, end, chunk_size
+        ):
+            yield from frame
+
+    def iter_tick_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        start: datetime,
+        end: datetime,
+        chunk_size: int = 100_000
+    ) -> Iterator[TickData]:
+        """"""
+        for frame in self.iter_tick_array(symbol, exchange, start, end, chunk_size):
+            yield from frame
+
+    def delete_bar_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval
+    ) -> int:
+        """"""
+        path = self.get_bar_path(symbol, exchange, interval)
+        count = self.remove_folder(path)
+
+        # Delete bar overview
+        if self.overviews.pop((symbol, exchange, interval), None):
+            self.save_overview()
+
+        return count
+
+    def delete_tick_data(
+        self,
+        symbol: str,
+        exchange: Exchange
+    ) -> int:
+        """"""
+        path = self.get_tick_path(symbol, exchange)
+        return self.remove_folder(path)
+
+    def get_bar_overview(self) -> List[BarOverview]:
+        """
+        Return data avaible in database.
+        """
+        # Rebuild bar overview if overview file is lost
+        if not self.overviews and self.bar_path.exists():
+            self.rebuild_overview()
+
+        return list(self.overviews.values())
+
+    def rebuild_overview(self) -> None:
+        """
+        Rebuild bar overview from all bar files, only datetime column is
+        read from each file.
+        """
+        self.overviews.clear()
+
+        for filepath in sorted(self.bar_path.glob("*/*/*.parquet")):
+            metadata = read_metadata(filepath)
+            symbol = metadata["symbol"]
+            exchange = Exchange(metadata["exchange"])
+            interval = Interval(metadata["interval"])
+
+            table = pq.read_table(filepath, columns=["datetime"])
+            if not table.num_rows:
+                continue
+            start, end = get_datetime_range(table)
+
+            overview = self.overviews.get((symbol, exchange, interval), None)
+            if not overview:
+                overview = BarOverview(
+                    symbol=symbol,
+                    exchange=exchange,
+                    interval=interval,
+                    start=start,
+                    end=end
+                )
+                self.overviews[(symbol, exchange, interval)] = overview
+            else:
+                overview.start = min(start, overview.start)
+                overview.end = max(end, overview.end)
+
+            overview.count += table.num_rows
+
+        self.save_overview()
+
+    def get_bar_path(self, symbol: str, exchange: Exchange, interval: Interval) -> Path:
+        """"""
+        return self.bar_path.joinpath(
+            get_folder_name(f"{symbol}.{exchange.value}"),
+            get_folder_name(interval.value)
+        )
+
+    def get_tick_path(self, symbol: str, exchange: Exchange) -> Path:
+        """"""
+        return self.tick_path.joinpath(get_folder_name(f"{symbol}.{exchange.value}"))
+
+    def merge_table(self, path: Path, table: pa.Table, metadata: dict) -> int:
+        """
+        Merge rows of table into monthly files under path, rows with the
+        same datetime are replaced. Return count of rows added.
+        """
+        path.mkdir(parents=True, exist_ok=True)
+        table = sort_unique(table)
+
+        months = table.column("datetime").to_numpy().astype("datetime64[M]")
+        changes = np.flatnonzero(months[1:] != months[:-1]) + 1
+        bounds = [0] + changes.tolist() + [len(months)]
+
+        count = 0
+
+        for ix_start, ix_end in zip(bounds[:-1], bounds[1:]):
+            part = table.slice(ix_start, ix_end - ix_start)
+            filepath = path.joinpath(f"{months[ix_start]}.parquet")
+
+            if filepath.exists():
+                old = pq.read_table(filepath, schema=table.schema)
+                part = sort_unique(pa.concat_tables([old, part]))
+                count += part.num_rows - old.num_rows
+            else:
+                count += part.num_rows
+
+            self.write_table(filepath, part, metadata)
+
+        return count
+
+    def write_table(self, filepath: Path, table: pa.Table, metadata: dict) -> None:
+        """
+        Write table into a temporary file first and then replace the old
+        one, so that readers never see a half written file.
+        """
+        table = table.replace_schema_metadata({"vnpy": json.dumps(metadata)})
+        temp_path = filepath.with_name(f"{filepath.name}.{time_ns()}.tmp")
+
+        # Datetime increases steadily and is stored as deltas, which are
+        # packed into a few bits each.
+        pq.write_table(
+            table,
+            temp_path,
+            compression=COMPRESSION,
+            row_group_size=ROW_GROUP_SIZE,
+            use_dictionary=table.schema.names[1:],
+            column_encoding={"datetime": "DELTA_BINARY_PACKED"}
+        )
+        os.replace(temp_path, filepath)
+
+    def read_table(
+        self,
+        path: Path,
+        schema: pa.Schema,
+        start: datetime,
+        end: datetime
+    ) -> pa.Table:
+        """
+        Read rows within start and end from monthly files under path.
+        """
+        tables = [
+            read_file(filepath, schema, start, end)
+            for filepath in self.get_files(path, start, end)
+        ]
+        if not tables:
+            return schema.empty_table()
+
+        return pa.concat_tables(tables).combine_chunks()
+
+    def iter_tables(
+        self,
+        path: Path,
+        schema: pa.Schema,
+        start: datetime,
+        end: datetime,
+        chunk_size: int
+    ) -> Iterator[pa.Table]:
+        """
+        Iterate rows within start and end in tables of at most chunk_size,
+        only one monthly file is read into memory at a time.
+        """
+        for filepath in self.get_files(path, start, end):
+            table = read_file(filepath, schema, start, end)
+
+            for ix in range(0, table.num_rows, chunk_size):
+                yield table.slice(ix, chunk_size).combine_chunks()
+
+    def get_files(self, path: Path, start: datetime, end: datetime) -> List[Path]:
+        """
+        Get monthly files under path which may contain data within start
+        and end (partition pruning).
+        """
+        if not path.exists():
+            return []
+
+        first = str(np.datetime64(to_db_datetime(start), "M"))
+        last = str(np.datetime64(to_db_datetime(end), "M"))
+
+        return [
+            filepath for filepath in sorted(path.glob("*.parquet"))
+            if first <= filepath.stem <= last
+        ]
+
+    def remove_folder(self, path: Path) -> int:
+        """
+        Remove all files under path and return count of rows deleted.
+        """
+        if not path.exists():
+            return 0
+
+        count = sum(
+            pq.read_metadata(filepath).num_rows
+            for filepath in path.glob("*.parquet")
+        )
+        shutil.rmtree(path)
+        return count
+
+    def load_overview(self) -> None:
+        """"""
+        if not self.overview_path.exists():
+            return
+
+        with open(self.overview_path, mode="r", encoding="UTF-8") as f:
+            data = json.load(f)
+
+        for d in data:
+            overview = BarOverview(
+                symbol=d["symbol"],
+                exchange=Exchange(d["exchange"]),
+                interval=Interval(d["interval"]),
+                count=d["count"],
+                start=datetime.fromisoformat(d["start"]),
+                end=datetime.fromisoformat(d["end"])
+            )
+            self.overviews[(overview.symbol, overview.exchange, overview.interval)] = overview
+
+    def save_overview(self) -> None:
+        """"""
+        data = [
+            {
+                "symbol": overview.symbol,
+                "exchange": overview.exchange.value,
+                "interval": overview.interval.value,
+                "count": overview.count,
+                "start": overview.start.isoformat(),
+                "end": overview.end.isoformat()
+            }
+            for overview in self.overviews.values()
+        ]
+
+        temp_path = self.overview_path.with_name(f"overview.{time_ns()}.tmp")
+        with open(temp_path, mode="w", encoding="UTF-8") as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
+        os.replace(temp_path, self.overview_path)
+
+
+def get_folder_name(name: str) -> str:
+    """"""
+    return re.sub(r"[^\w.-]", "_", name)
+
+
+def to_db_datetime(dt: datetime) -> datetime:
+    """
+    Convert datetime to naive wall time of DB_TZ, naive datetime is
+    regarded as in DB_TZ already.
+    """
+    if dt.tzinfo:
+        return convert_tz(dt)
+    return dt
+
+
+def create_table(columns: List[tuple], schema: pa.Schema) -> pa.Table:
+    """"""
+    arrays = [
+        pa.array(column, type=field.type)
+        for column, field in zip(columns, schema)
+    ]
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def read_file(
+    filepath: Path,
+    schema: pa.Schema,
+    start: datetime,
+    end: datetime
+) -> pa.Table:
+    """
+    Read rows within start and end from file, row groups out of range
+    are skipped with statistics in file footer.
+    """
+    start = pa.scalar(to_db_datetime(start), pa.timestamp("us"))
+    end = pa.scalar(to_db_datetime(end), pa.timestamp("us"))
+
+    return pq.read_table(
+        filepath,
+        schema=schema,
+        filters=[("datetime", ">=", start), ("datetime", "<=", end)]
+    )
+
+
+def read_metadata(filepath: Path) -> dict:
+    """
+    Read contract info saved in schema metadata of file.
+    """
+    metadata = pq.read_schema(filepath).metadata
+    return json.loads(metadata[b"vnpy"])
+
+
+def sort_unique(table: pa.Table) -> pa.Table:
+    """
+    Sort rows by datetime, only the last one is kept for rows with the
+    same datetime.
+    """
+    datetimes = table.column("datetime").to_numpy()
+
+    ix = np.argsort(datetimes, kind="stable")
+    sorted_datetimes = datetimes[ix]
+
+    last = np.ones(len(ix), dtype=bool)
+    last[:-1] = sorted_datetimes[1:] != sorted_datetimes[:-1]
+
+    return table.take(ix[last])
+
+
+def get_datetime_range(table: pa.Table) -> Tuple[datetime, datetime]:
+    """"""
+    datetimes = table.column("datetime").to_numpy()
+    return datetimes.min().item(), datetimes.max().item()
+
+
+def get_column(table: pa.Table, name: str, dtype: str) -> np.ndarray:
+    """
+    Get column as NumPy array, which is zero-copy for column of a single
+    chunk without null.
+    """
+    column = table.column(name)
+
+    if column.num_chunks == 1:
+        array = column.chunk(0)
+    else:
+        array = column.combine_chunks()
+
+    return array.to_numpy(zero_copy_only=False).astype(dtype, copy=False)
+
+
+def create_bar_frame(
+    symbol: str,
+    exchange: Exchange,
+    interval: Interval,
+    table: pa.Table
+) -> BarFrame:
+    """"""
+    kwargs = {
+        name: get_column(table, name, "f8")
+        for name in BarFrame.float_fields
+    }
+
+    return BarFrame(
+        "DB",
+        symbol,
+        exchange,
+        get_column(table, "datetime", DATETIME_DTYPE),
+        DB_TZ,
+        interval=interval,
+        **kwargs
+    )
+
+
+def create_tick_frame(
+    symbol: str,
+    exchange: Exchange,
+    table: pa.Table
+) -> TickFrame:
+    """"""
+    kwargs = {
+        name: get_column(table, name, "f8")
+        for name in TickFrame.float_fields
+    }
+
+    if table.num_rows:
+        name = table.column("name")[0].as_py()
+    else:
+        name = ""
+
+    return TickFrame(
+        "DB",
+        symbol,
+        exchange,
+        get_column(table, "datetime", DATETIME_DTYPE),
+        DB_TZ,
+        name=name,
+        **kwargs
+    )
+
+
+database_manager = ParquetDatabase()
@@ -1,6 +1,6 @@
 """"""
 from datetime import datetime
-from typing import List
+from typing import Iterator, List, Sequence, Type
 
 from peewee import (
     AutoField,
@@ -17,12 +17,21 @@ from peewee import (
 
 from vnpy.trader.constant import Exchange, Interval
 from vnpy.trader.object import BarData, TickData
+from vnpy.trader.frame import BarFrame, TickFrame
 from vnpy.trader.utility import get_file_path
 from vnpy.trader.database import (
     BaseDatabase,
     BarOverview,
     DB_TZ,
-    convert_tz
+    BAR_ARRAY_FIELDS,
+    TICK_ARRAY_FIELDS,
+    BAR_FIELDS,
+    TICK_FIELDS,
+    create_bar_frame,
+    create_tick_frame,
+    get_bar_rows,
+    get_tick_rows,
+    iter_keyset
 )
 
 
@@ -120,6 +129,24 @@ class DbBarOverview(Model):
         indexes = ((("symbol", "exchange", "interval"), True),)
 
 
+def quote(name: str) -> str:
+    """"""
+    return db.quote[0] + name + db.quote[1]
+
+
+def get_upsert_sql(model: Type[Model], fields: Sequence[str]) -> str:
+    """
+    Get SQL of upserting one row, which is executed with many rows.
+    """
+    columns = ", ".join(quote(name) for name in fields)
+    params = ", ".join([db.param] * len(fields))
+    return f"INSERT OR REPLACE INTO {quote(model._meta.table_name)} ({columns}) VALUES ({params})"
+
+
+BAR_UPSERT_SQL = get_upsert_sql(DbBarData, BAR_FIELDS)
+TICK_UPSERT_SQL = get_upsert_sql(DbTickData, TICK_FIELDS)
+
+
 class SqliteDatabase(BaseDatabase):
     """"""
 
@@ -137,71 +164,77 @@ class SqliteDatabase(BaseDatabase):
         exchange = bar.exchange
         interval = bar.interval
 
-        # Convert bar object to dict and adjust timezone
-        data = []
-
-        for bar in bars:
-            bar.datetime = convert_tz(bar.datetime)
+        # Convert bar object to row and adjust timezone
+        rows = get_bar_rows(bars)
 
-            d = bar.__dict__
-            d["exchange"] = d["exchange"].value
-            d["interval"] = d["interval"].value
-            d.pop("gateway_name")
-            d.pop("vt_symbol")
-            data.append(d)
+        # Bars already in database are replaced by upsert, so only new
+        # bars are added into overview count.
+        datetimes = list({row[3] for row in rows})
+        start = min(datetimes)
+        end = max(datetimes)
 
-        # Upsert data into database
         with self.db.atomic():
-            for c in chunked(data, 50):
-                DbBarData.insert_many(c).on_conflict_replace().execute()
-
-        # Update bar overview
-        overview: DbBarOverview = DbBarOverview.get_or_none(
-            DbBarOverview.symbol == symbol,
-            DbBarOverview.exchange == exchange.value,
-            DbBarOverview.interval == interval.value,
-        )
+            overview: DbBarOverview = DbBarOverview.get_or_none(
+                DbBarOverview.symbol == symbol,
+                DbBarOverview.exchange == exchange.value,
+                DbBarOverview.interval == interval.value,
+            )
+
+            if overview and start <= overview.end and end >= overview.start:
+                replaced = self.count_bar_data(symbol, exchange, interval, datetimes)
+            else:
+                replaced = 0
+
+            # Upsert data into database with one prepared statement
+            self.db.cursor().executemany(BAR_UPSERT_SQL, rows)
+
+            # Update bar overview
+            if not overview:
+                overview = DbBarOverview()
+                overview.symbol = symbol
+                overview.exchange = exchange.value
+                overview.interval = interval.value
+                overview.start = start
+                overview.end = end
+                overview.count = len(datetimes)
+            else:
+                overview.start = min(start, overview.start)
+                overview.end = max(end, overview.end)
+                overview.count += len(datetimes) - replaced
 
-        if not overview:
-            overview = DbBarOverview()
-            overview.symbol = symbol
-            overview.exchange = exchange.value
-            overview.interval = interval.value
-            overview.start = bars[0].datetime
-            overview.end = bars[-1].datetime
-            overview.count = len(bars)
-        else:
-            overview.start = min(bars[0].datetime, overview.start)
-            overview.end = max(bars[-1].datetime, overview.end)
+            overview.save()
 
+    def count_bar_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        datetimes: List[datetime]
+    ) -> int:
+        """
+        Count bars of given datetimes in database.
+        """
+        count = 0
+
+        for c in chunked(datetimes, 500):
             s: ModelSelect = DbBarData.select().where(
                 (DbBarData.symbol == symbol)
                 & (DbBarData.exchange == exchange.value)
                 & (DbBarData.interval == interval.value)
+                & (DbBarData.datetime.in_(c))
             )
-            overview.count = s.count()
+            count += s.count()
 
-        overview.save()
+        return count
 
     def save_tick_data(self, ticks: List[TickData]) -> bool:
         """"""
-        # Convert bar object to dict and adjust timezone
-        data = []
-
-        for tick in ticks:
-            tick.datetime = convert_tz(tick.datetime)
-
-            d = tick.__dict__
-            d["exchange"] = d["exchange"].value
-            d["interval"] = d["interval"].value
-            d.pop("gateway_name")
-            d.pop("vt_symbol")
-            data.append(d)
+        # Convert tick object to row and adjust timezone
+        rows = get_tick_rows(ticks)
 
-        # Upsert data into database
+        # Upsert data into database with one prepared statement
         with self.db.atomic():
-            for c in chunked(data, 50):
-                DbTickData.insert_many(c).on_conflict_replace().execute()
+            self.db.cursor().executemany(TICK_UPSERT_SQL, rows)
 
     def load_bar_data(
         self,
@@ -262,6 +295,147 @@ class SqliteDatabase(BaseDatabase):
 
         return ticks
 
+    def load_bar_array(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime
+    ) -> BarFrame:
+        """"""
+        fields = [getattr(DbBarData, name) for name in BAR_ARRAY_FIELDS]
+
+        s: ModelSelect = (
+            DbBarData.select(*fields).where(
+                (DbBarData.symbol == symbol)
+                & (DbBarData.exchange == exchange.value)
+                & (DbBarData.interval == interval.value)
+                & (DbBarData.datetime >= start)
+                & (DbBarData.datetime <= end)
+            ).order_by(DbBarData.datetime)
+        )
+
+        # Fetch raw rows from cursor without creating model objects
+        rows = self.db.execute(s).fetchall()
+        return create_bar_frame(symbol, exchange, interval, rows)
+
+    def load_tick_array(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        start: datetime,
+        end: datetime
+    ) -> TickFrame:
+        """"""
+        fields = [getattr(DbTickData, name) for name in TICK_ARRAY_FIELDS]
+
+        s: ModelSelect = (
+            DbTickData.select(*fields).where(
+                (DbTickData.symbol == symbol)
+                & (DbTickData.exchange == exchange.value)
+                & (DbTickData.datetime >= start)
+                & (DbTickData.datetime <= end)
+            ).order_by(DbTickData.datetime)
+        )
+
+        rows = self.db.execute(s).fetchall()
+        return create_tick_frame(symbol, exchange, rows)
+
+    def iter_bar_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime,
+        chunk_size: int = 100_000
+    ) -> Iterator[BarData]:
+        """"""
+        for frame in self.iter_bar_array(
+            symbol, exchange, interval, start, end, chunk_size
+        ):
+            yield from frame
+
+    def iter_tick_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        start: datetime,
+        end: datetime,
+        chunk_size: int = 100_000
+    ) -> Iterator[TickData]:
+        """"""
+        for frame in self.iter_tick_array(symbol, exchange, start, end, chunk_size):
+            yield from frame
+
+    def iter_bar_array(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime,
+        chunk_size: int = 100_000
+    ) -> Iterator[BarFrame]:
+        """"""
+        fields = [getattr(DbBarData, name) for name in BAR_ARRAY_FIELDS]
+
+        def query(last: datetime, limit: int) -> list:
+            """
+            Seek with index on datetime instead of OFFSET, so that every
+            chunk costs the same however deep it is.
+            """
+            if last is None:
+                condition = DbBarData.datetime >= start
+            else:
+                condition = DbBarData.datetime > last
+
+            s: ModelSelect = (
+                DbBarData.select(*fields).where(
+                    (DbBarData.symbol == symbol)
+                    & (DbBarData.exchange == exchange.value)
+                    & (DbBarData.interval == interval.value)
+                    & condition
+                    & (DbBarData.datetime <= end)
+                ).order_by(DbBarData.datetime).limit(limit)
+            )
+            return self.db.execute(s).fetchall()
+
+        for rows in iter_keyset(query, chunk_size):
+            yield create_bar_frame(symbol, exchange, interval, rows)
+
+    def iter_tick_array(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        start: datetime,
+        end: datetime,
+        chunk_size: int = 100_000
+    ) -> Iterator[TickFrame]:
+        """"""
+        fields = [getattr(DbTickData, name) for name in TICK_ARRAY_FIELDS]
+
+        def query(last: datetime, limit: int) -> list:
+            """"""
+            if last is None:
+                condition = DbTickData.datetime >= start
+            else:
+                condition = DbTickData.datetime > last
+
+            s: ModelSelect = (
+                DbTickData.select(*fields).where(
+                    (DbTickData.symbol == symbol)
+                    & (DbTickData.exchange == exchange.value)
+                    & condition
+                    & (DbTickData.datetime <= end)
+                ).order_by(DbTickData.datetime).limit(limit)
+            )
+            return self.db.execute(s).fetchall()
+
+        for rows in iter_keyset(query, chunk_size):
+            yield create_tick_frame(symbol, exchange, rows)
+
     def delete_bar_data(
         self,
         symbol: str,
@@ -307,7 +481,7 @@ class SqliteDatabase(BaseDatabase):
         data_count = DbBarData.select().count()
         overview_count = DbBarOverview.select().count()
         if data_count and not overview_count:
-            self.init_bar_overview()
+            self.rebuild_overview()
 
         s: ModelSelect = DbBarOverview.select()
         overviews = []
@@ -317,16 +491,19 @@ class SqliteDatabase(BaseDatabase):
             overviews.append(overview)
         return overviews
 
-    def init_bar_overview(self) -> None:
+    def rebuild_overview(self) -> None:
         """
-        Init overview table if not exists.
+        Rebuild bar overview from all bar data in database, which can be
+        used for repairing overview.
         """
         s: ModelSelect = (
             DbBarData.select(
                 DbBarData.symbol,
                 DbBarData.exchange,
                 DbBarData.interval,
-                fn.COUNT(DbBarData.id).alias("count")
+                fn.COUNT(DbBarData.id).alias("count"),
+                fn.MIN(DbBarData.datetime).alias("start"),
+                fn.MAX(DbBarData.datetime).alias("end")
             ).group_by(
                 DbBarData.symbol,
                 DbBarData.exchange,
@@ -334,38 +511,11 @@ class SqliteDatabase(BaseDatabase):
             )
         )
 
-        for data in s:
-            overview = DbBarOverview()
-            overview.symbol = data.symbol
-            overview.exchange = data.exchange
-            overview.interval = data.interval
-            overview.count = data.count
-
-            start_bar: DbBarData = (
-                DbBarData.select()
-                .where(
-                    (DbBarData.symbol == data.symbol)
-                    & (DbBarData.exchange == data.exchange)
-                    & (DbBarData.interval == data.interval)
-                )
-                .order_by(DbBarData.datetime.desc())
-                .first()
-            )
-            overview.start = start_bar.datetime
-
-            end_bar: DbBarData = (
-                DbBarData.select()
-                .where(
-                    (DbBarData.symbol == data.symbol)
-                    & (DbBarData.exchange == data.exchange)
-                    & (DbBarData.interval == data.interval)
-                )
-                .order_by(DbBarData.datetime.asc())
-                .first()
-            )
-            overview.end = end_bar.datetime
+        with self.db.atomic():
+            DbBarOverview.delete().execute()
 
-            overview.save()
+            for data in s.dicts():
+                DbBarOverview.create(**data)
 
 
 database_manager = SqliteDatabase()
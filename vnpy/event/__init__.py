@@ -1 +1,12 @@
-from .engine import Event, EventEngine, EVENT_TIMER
+from .engine import (
+    Event,
+    EventEngine,
+    BatchEventEngine,
+    ShardedEventEngine,
+    ConflatingChannel,
+    EventStatistics,
+    EVENT_TIMER,
+    EVENT_STATISTICS,
+    AFFINITY_MAIN,
+    AFFINITY_KEY
+)
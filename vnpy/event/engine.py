@@ -4,11 +4,23 @@ Event-driven framework of vn.py framework.
 
 from collections import defaultdict
 from queue import Empty, Queue
-from threading import Thread
-from time import sleep
-from typing import Any, Callable, List
+from threading import Condition, Lock, Thread
+from time import perf_counter, sleep
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from zlib import crc32
 
 EVENT_TIMER = "eTimer"
+EVENT_STATISTICS = "eStatistics"
+
+# Number of buckets in latency histograms. Bucket 0 counts latencies
+# below 1 microsecond, bucket i counts those in [2^(i-1), 2^i) us, and
+# the last one also counts everything slower.
+HISTOGRAM_SIZE = 24
+
+# Handler affinity, only used by ShardedEventEngine. Other string values
+# are names of dedicated shards, e.g. "option_master".
+AFFINITY_MAIN = ""      # Run on the main shard together with all other handlers
+AFFINITY_KEY = "*"      # Run on the shard selected by partition key of event
 
 
 class Event:
@@ -27,6 +39,240 @@ class Event:
 # Defines handler function to be used in event engine.
 HandlerType = Callable[[Event], None]
 
+# Defines handler function of conflated subscription, which receives
+# the latest event and number of events dropped since last callback.
+ConflatedHandlerType = Callable[[Event, int], None]
+
+
+class LatencyHistogram:
+    """
+    Count, total, max and log2 histogram of latency samples.
+    """
+
+    def __init__(self):
+        """"""
+        self.count: int = 0
+        self.total: float = 0
+        self.max: float = 0
+        self.buckets: List[int] = [0] * HISTOGRAM_SIZE
+
+    def add(self, cost: float) -> None:
+        """
+        Add a latency sample in seconds.
+        """
+        self.count += 1
+        self.total += cost
+        if cost > self.max:
+            self.max = cost
+
+        ix = int(cost * 1_000_000).bit_length()
+        self.buckets[min(ix, HISTOGRAM_SIZE - 1)] += 1
+
+    def to_dict(self) -> dict:
+        """
+        Convert to dict with latencies in microseconds.
+        """
+        if self.count:
+            avg = self.total / self.count * 1_000_000
+        else:
+            avg = 0
+
+        return {
+            "count": self.count,
+            "avg": avg,
+            "max": self.max * 1_000_000,
+            "histogram": list(self.buckets)
+        }
+
+
+class EventStatistics:
+    """
+    Records how long events wait in queue of event engine, how long
+    they take to be processed, and how long every handler runs.
+
+    Enqueue time is stamped onto event object as put_time when the
+    event is put, and wait time is measured when its handlers start.
+    """
+
+    def __init__(self):
+        """"""
+        self._lock: Lock = Lock()
+
+        self.max_queue_depth: int = 0
+        self.wait_histograms: Dict[str, LatencyHistogram] = defaultdict(LatencyHistogram)
+        self.process_histograms: Dict[str, LatencyHistogram] = defaultdict(LatencyHistogram)
+        self.handler_histograms: Dict[HandlerType, LatencyHistogram] = defaultdict(LatencyHistogram)
+
+    def on_put(self, event: Event, queue_depth: int) -> None:
+        """
+        Stamp enqueue time and update max queue depth.
+        """
+        event.put_time = perf_counter()
+
+        if queue_depth > self.max_queue_depth:
+            self.max_queue_depth = queue_depth
+
+    def process(self, event: Event, handlers: Sequence[HandlerType]) -> None:
+        """
+        Distribute event to handlers and record latencies.
+        """
+        start = perf_counter()
+        costs = []
+
+        for handler in handlers:
+            handler_start = perf_counter()
+            handler(event)
+            costs.append((handler, perf_counter() - handler_start))
+
+        end = perf_counter()
+
+        # Events put before statistics switched on have no enqueue time
+        wait = start - getattr(event, "put_time", start)
+
+        with self._lock:
+            self.wait_histograms[event.type].add(wait)
+            self.process_histograms[event.type].add(end - start)
+
+            for handler, cost in costs:
+                self.handler_histograms[handler].add(cost)
+
+    def get_snapshot(self) -> dict:
+        """
+        Get statistics data as plain dict, which can be pickled by rpc
+        or shown in UI directly.
+        """
+        with self._lock:
+            types = {}
+            for type, histogram in self.wait_histograms.items():
+                types[type] = {
+                    "wait": histogram.to_dict(),
+                    "process": self.process_histograms[type].to_dict()
+                }
+
+            handlers = {}
+            for handler, histogram in self.handler_histograms.items():
+                name = get_handler_name(handler)
+                data = histogram.to_dict()
+
+                # Merge handlers of the same name (e.g. lambdas)
+                if name in handlers:
+                    data = merge_histogram_dict(handlers[name], data)
+                handlers[name] = data
+
+        return {
+            "max_queue_depth": self.max_queue_depth,
+            "types": types,
+            "handlers": handlers
+        }
+
+
+def get_handler_name(handler: HandlerType) -> str:
+    """
+    Get readable name of handler function, e.g. CtaEngine.process_tick_event.
+    """
+    return getattr(handler, "__qualname__", repr(handler))
+
+
+def merge_histogram_dict(d1: dict, d2: dict) -> dict:
+    """
+    Merge two dicts generated by LatencyHistogram.to_dict.
+    """
+    count = d1["count"] + d2["count"]
+    if count:
+        avg = (d1["avg"] * d1["count"] + d2["avg"] * d2["count"]) / count
+    else:
+        avg = 0
+
+    return {
+        "count": count,
+        "avg": avg,
+        "max": max(d1["max"], d2["max"]),
+        "histogram": [a + b for a, b in zip(d1["histogram"], d2["histogram"])]
+    }
+
+
+class ConflatingChannel:
+    """
+    Channel which keeps only the latest event of each key (vt_symbol
+    of event data by default) and delivers them to a slow handler in
+    its own thread.
+
+    Events arriving while the handler is still busy replace the older
+    ones of the same key, so memory and latency stay bounded no matter
+    how far the handler falls behind.
+    """
+
+    def __init__(self, handler: ConflatedHandlerType, key: str = "vt_symbol"):
+        """"""
+        self._handler: ConflatedHandlerType = handler
+        self._key: str = key
+
+        self._latest: Dict[str, Event] = {}
+        self._dropped: Dict[str, int] = {}
+        self._condition: Condition = Condition()
+
+        self._active: bool = False
+        self._thread: Thread = Thread(target=self._run)
+
+        self.dropped_count: int = 0     # Total number of dropped events
+
+    def _run(self) -> None:
+        """
+        Swap out latest events and then deliver them to handler.
+        """
+        while self._active:
+            with self._condition:
+                if not self._latest:
+                    self._condition.wait(1)
+
+                latest = self._latest
+                dropped = self._dropped
+                self._latest = {}
+                self._dropped = {}
+
+            for key, event in latest.items():
+                if not self._active:
+                    break
+                self._handler(event, dropped.get(key, 0))
+
+    def get_key(self, event: Event) -> str:
+        """
+        Get the key used for conflating events.
+        """
+        return getattr(event.data, self._key, event.type)
+
+    def put(self, event: Event) -> None:
+        """
+        Replace the latest event of the same key.
+        """
+        key = self.get_key(event)
+
+        with self._condition:
+            if key in self._latest:
+                self._dropped[key] = self._dropped.get(key, 0) + 1
+                self.dropped_count += 1
+
+            self._latest[key] = event
+            self._condition.notify()
+
+    def start(self) -> None:
+        """
+        Start delivering events.
+        """
+        self._active = True
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop delivering events.
+        """
+        self._active = False
+
+        with self._condition:
+            self._condition.notify()
+
+        self._thread.join()
+
 
 class EventEngine:
     """
@@ -49,6 +295,11 @@ class EventEngine:
         self._timer: Thread = Thread(target=self._run_timer)
         self._handlers: defaultdict = defaultdict(list)
         self._general_handlers: List = []
+        self._channels: Dict[Tuple[str, ConflatedHandlerType], ConflatingChannel] = {}
+
+        self._statistics: Optional[EventStatistics] = None
+        self._statistics_interval: int = 1
+        self._statistics_count: int = 0
 
     def _run(self) -> None:
         """
@@ -57,7 +308,13 @@ class EventEngine:
         while self._active:
             try:
                 event = self._queue.get(block=True, timeout=1)
-                self._process(event)
+
+                statistics = self._statistics
+                if statistics:
+                    handlers = self._handlers.get(event.type, [])
+                    statistics.process(event, handlers + self._general_handlers)
+                else:
+                    self._process(event)
             except Empty:
                 pass
 
@@ -84,6 +341,23 @@ class EventEngine:
             event = Event(EVENT_TIMER)
             self.put(event)
 
+            if self._statistics:
+                self._put_statistics()
+
+    def _put_statistics(self) -> None:
+        """
+        Generate a statistics event every statistics interval timer events.
+        """
+        self._statistics_count += 1
+        if self._statistics_count < self._statistics_interval:
+            return
+        self._statistics_count = 0
+
+        statistics = self._statistics
+        if statistics:
+            event = Event(EVENT_STATISTICS, statistics.get_snapshot())
+            self.put(event)
+
     def start(self) -> None:
         """
         Start event engine to process events and generate timer events.
@@ -100,16 +374,86 @@ class EventEngine:
         self._timer.join()
         self._thread.join()
 
+        self._stop_channels()
+
+    def _stop_channels(self) -> None:
+        """
+        Stop threads of all conflated subscriptions.
+        """
+        for channel in self._channels.values():
+            channel.stop()
+        self._channels.clear()
+
     def put(self, event: Event) -> None:
         """
         Put an event object into event queue.
         """
+        if self._statistics:
+            self._statistics.on_put(event, self._queue.qsize())
+
         self._queue.put(event)
 
-    def register(self, type: str, handler: HandlerType) -> None:
+    def put_group(self, events: Sequence[Event]) -> None:
+        """
+        Put a group of event objects which are generated from the
+        same data (e.g. a tick pushed under both EVENT_TICK and
+        EVENT_TICK + vt_symbol) into event queue.
+        """
+        for event in events:
+            self.put(event)
+
+    def enable_statistics(self, interval: int = 1) -> None:
+        """
+        Start recording queue wait, handler cost and max queue depth.
+
+        A statistics event (EVENT_STATISTICS) with snapshot data is
+        generated every interval timer events.
+        """
+        self._statistics_interval = interval
+        self._statistics_count = 0
+
+        if not self._statistics:
+            self._statistics = EventStatistics()
+
+    def disable_statistics(self) -> None:
+        """
+        Stop recording statistics and discard recorded data.
+        """
+        self._statistics = None
+
+    def reset_statistics(self) -> None:
+        """
+        Discard recorded data and record from now on.
+        """
+        if self._statistics:
+            self._statistics = EventStatistics()
+
+    def is_statistics_enabled(self) -> bool:
+        """"""
+        return self._statistics is not None
+
+    def get_statistics(self) -> dict:
+        """
+        Get snapshot of recorded statistics, empty if not enabled.
+
+        All latencies are in microseconds.
+        """
+        statistics = self._statistics
+        if not statistics:
+            return {}
+        return statistics.get_snapshot()
+
+    def register(
+        self,
+        type: str,
+        handler: HandlerType,
+        affinity: str = AFFINITY_MAIN
+    ) -> None:
         """
         Register a new handler function for a specific event type. Every
         function can only be registered once for each event type.
+
+        Affinity is ignored unless the engine runs handlers in shards.
         """
         handler_list = self._handlers[type]
         if handler not in handler_list:
@@ -127,7 +471,11 @@ class EventEngine:
         if not handler_list:
             self._handlers.pop(type)
 
-    def register_general(self, handler: HandlerType) -> None:
+    def register_general(
+        self,
+        handler: HandlerType,
+        affinity: str = AFFINITY_MAIN
+    ) -> None:
         """
         Register a new handler function for all event types. Every
         function can only be registered once for each event type.
@@ -141,3 +489,395 @@ class EventEngine:
         """
         if handler in self._general_handlers:
             self._general_handlers.remove(handler)
+
+    def register_conflated(
+        self,
+        type: str,
+        handler: ConflatedHandlerType,
+        key: str = "vt_symbol"
+    ) -> None:
+        """
+        Register a slow handler function which only receives the latest
+        event of each key (attribute of event data, vt_symbol by default)
+        since its last callback, together with the number of events
+        dropped in between.
+
+        The handler runs in its own thread, other handlers of the same
+        event type are not affected.
+        """
+        channel_key = (type, handler)
+        if channel_key in self._channels:
+            return
+
+        channel = ConflatingChannel(handler, key)
+        channel.start()
+        self._channels[channel_key] = channel
+
+        self.register(type, channel.put)
+
+    def unregister_conflated(self, type: str, handler: ConflatedHandlerType) -> None:
+        """
+        Unregister an existing conflated handler function.
+        """
+        channel = self._channels.pop((type, handler), None)
+        if not channel:
+            return
+
+        self.unregister(type, channel.put)
+        channel.stop()
+
+    def get_conflated_dropped_count(self, type: str, handler: ConflatedHandlerType) -> int:
+        """
+        Get total number of events dropped for a conflated handler.
+        """
+        channel = self._channels.get((type, handler), None)
+        if not channel:
+            return 0
+        return channel.dropped_count
+
+
+class BatchEventEngine(EventEngine):
+    """
+    Event engine which drains pending events in batches and resolves
+    handlers from a precompiled dispatch table.
+
+    The dispatch table maps each event type to a tuple of type handlers
+    followed by general handlers. It is rebuilt (copy-on-write) every
+    time a handler is registered or unregistered, so the processing
+    thread never locks or copies handler lists while distributing.
+
+    A group of events put by put_group takes only one queue entry.
+    """
+
+    def __init__(self, interval: int = 1):
+        """"""
+        super().__init__(interval)
+
+        self._pending: List = []
+        self._condition: Condition = Condition()
+
+        self._lock: Lock = Lock()
+        self._table: Tuple[Dict[str, Tuple[HandlerType, ...]], Tuple[HandlerType, ...]] = ({}, ())
+
+    def _run(self) -> None:
+        """
+        Swap out all pending queue entries and then process them.
+        """
+        while self._active:
+            with self._condition:
+                if not self._pending:
+                    self._condition.wait(1)
+
+                batch = self._pending
+                self._pending = []
+
+            self._process_batch(batch)
+
+    def _process_batch(self, batch: List) -> None:
+        """
+        Distribute every event in batch with current dispatch table.
+        """
+        dispatch, general = self._table
+
+        statistics = self._statistics
+        if statistics:
+            for entry in batch:
+                if entry.__class__ is not tuple:
+                    entry = (entry,)
+
+                for event in entry:
+                    statistics.process(event, dispatch.get(event.type, general))
+            return
+
+        for entry in batch:
+            if entry.__class__ is tuple:
+                for event in entry:
+                    for handler in dispatch.get(event.type, general):
+                        handler(event)
+            else:
+                for handler in dispatch.get(entry.type, general):
+                    handler(entry)
+
+    def _process(self, event: Event) -> None:
+        """
+        Distribute a single event with current dispatch table.
+        """
+        dispatch, general = self._table
+
+        for handler in dispatch.get(event.type, general):
+            handler(event)
+
+    def _compile(self) -> None:
+        """
+        Rebuild dispatch table from registered handlers.
+        """
+        general = tuple(self._general_handlers)
+        dispatch = {
+            type: tuple(handler_list) + general
+            for type, handler_list in self._handlers.items()
+        }
+        self._table = (dispatch, general)
+
+    def stop(self) -> None:
+        """
+        Stop event engine.
+        """
+        self._active = False
+
+        with self._condition:
+            self._condition.notify()
+
+        self._timer.join()
+        self._thread.join()
+
+        self._stop_channels()
+
+    def put(self, event: Event) -> None:
+        """
+        Put an event object into pending list.
+        """
+        with self._condition:
+            if self._statistics:
+                self._statistics.on_put(event, len(self._pending))
+
+            self._pending.append(event)
+            self._condition.notify()
+
+    def put_group(self, events: Sequence[Event]) -> None:
+        """
+        Put a group of event objects into pending list as one entry.
+        """
+        with self._condition:
+            statistics = self._statistics
+            if statistics:
+                for event in events:
+                    statistics.on_put(event, len(self._pending))
+
+            self._pending.append(tuple(events))
+            self._condition.notify()
+
+    def register(
+        self,
+        type: str,
+        handler: HandlerType,
+        affinity: str = AFFINITY_MAIN
+    ) -> None:
+        """"""
+        with self._lock:
+            super().register(type, handler, affinity)
+            self._compile()
+
+    def unregister(self, type: str, handler: HandlerType) -> None:
+        """"""
+        with self._lock:
+            super().unregister(type, handler)
+            self._compile()
+
+    def register_general(
+        self,
+        handler: HandlerType,
+        affinity: str = AFFINITY_MAIN
+    ) -> None:
+        """"""
+        with self._lock:
+            super().register_general(handler, affinity)
+            self._compile()
+
+    def unregister_general(self, handler: HandlerType) -> None:
+        """"""
+        with self._lock:
+            super().unregister_general(handler)
+            self._compile()
+
+
+class ShardedEventEngine(EventEngine):
+    """
+    Event engine which runs handlers in several shard threads, so that
+    a slow handler does not stall handlers on other shards.
+
+    Where a handler runs is decided by the affinity given when it
+    is registered:
+        * AFFINITY_MAIN: main shard, shared by all handlers which do
+          not declare an affinity, so they keep single thread behaviour.
+        * AFFINITY_KEY: shard selected by partition key of event data
+          (vt_symbol, vt_orderid or gateway_name), events with the same
+          key are always processed in order on the same shard.
+        * any other name: dedicated shard of that name.
+
+    Handlers are resolved when an event is put, so a handler unregistered
+    afterwards may still receive events already in the queue.
+    """
+
+    def __init__(self, interval: int = 1, shard_count: int = 4):
+        """"""
+        super().__init__(interval)
+
+        self._shard_count: int = shard_count
+        self._queues: List[Queue] = [Queue() for _ in range(shard_count)]
+        self._threads: List[Thread] = [
+            Thread(target=self._run_shard, args=(queue,))
+            for queue in self._queues
+        ]
+
+        self._affinities: Dict[Tuple[str, HandlerType], str] = {}
+        self._general_affinities: Dict[HandlerType, str] = {}
+
+        self._lock: Lock = Lock()
+        self._general_route: Tuple = ((), ())
+        self._routes: Dict[str, Tuple] = {}
+
+    def _run_shard(self, queue: Queue) -> None:
+        """
+        Get event and its handlers from shard queue and then process it.
+        """
+        while self._active:
+            try:
+                event, handlers = queue.get(block=True, timeout=1)
+
+                statistics = self._statistics
+                if statistics:
+                    statistics.process(event, handlers)
+                else:
+                    for handler in handlers:
+                        handler(event)
+            except Empty:
+                pass
+
+    def get_shard(self, affinity: str) -> int:
+        """
+        Get index of shard used by a named affinity.
+        """
+        if affinity == AFFINITY_MAIN or self._shard_count == 1:
+            return 0
+
+        # Dedicated shards never share thread with the main one
+        return 1 + crc32(affinity.encode()) % (self._shard_count - 1)
+
+    def get_partition_key(self, event: Event) -> str:
+        """
+        Get partition key of event, used by handlers with AFFINITY_KEY.
+        """
+        data = event.data
+
+        key = getattr(data, "vt_symbol", None)
+        if key:
+            return key
+
+        key = getattr(data, "vt_orderid", None)
+        if key:
+            return key
+
+        return getattr(data, "gateway_name", "")
+
+    def _compile_route(self, handlers: List[Tuple[HandlerType, str]]) -> Tuple:
+        """
+        Convert handler list into (fixed shard handlers, keyed handlers).
+        """
+        fixed: Dict[int, List[HandlerType]] = defaultdict(list)
+        keyed: List[HandlerType] = []
+
+        for handler, affinity in handlers:
+            if affinity == AFFINITY_KEY:
+                keyed.append(handler)
+            else:
+                fixed[self.get_shard(affinity)].append(handler)
+
+        fixed_route = tuple((ix, tuple(buf)) for ix, buf in fixed.items())
+        return fixed_route, tuple(keyed)
+
+    def _compile(self) -> None:
+        """
+        Rebuild routes from registered handlers.
+        """
+        general = [
+            (handler, self._general_affinities[handler])
+            for handler in self._general_handlers
+        ]
+
+        routes = {}
+        for type, handler_list in self._handlers.items():
+            handlers = [
+                (handler, self._affinities[(type, handler)])
+                for handler in handler_list
+            ]
+            routes[type] = self._compile_route(handlers + general)
+
+        self._general_route = self._compile_route(general)
+        self._routes = routes
+
+    def start(self) -> None:
+        """
+        Start all shard threads and timer thread.
+        """
+        self._active = True
+
+        for thread in self._threads:
+            thread.start()
+        self._timer.start()
+
+    def stop(self) -> None:
+        """
+        Stop event engine.
+        """
+        self._active = False
+        self._timer.join()
+
+        for thread in self._threads:
+            thread.join()
+
+        self._stop_channels()
+
+    def put(self, event: Event) -> None:
+        """
+        Put event into queues of shards which its handlers run on.
+        """
+        fixed, keyed = self._routes.get(event.type, self._general_route)
+
+        if self._statistics:
+            depth = max(queue.qsize() for queue in self._queues)
+            self._statistics.on_put(event, depth)
+
+        for ix, handlers in fixed:
+            self._queues[ix].put((event, handlers))
+
+        if keyed:
+            key = self.get_partition_key(event)
+            ix = hash(key) % self._shard_count
+            self._queues[ix].put((event, keyed))
+
+    def register(
+        self,
+        type: str,
+        handler: HandlerType,
+        affinity: str = AFFINITY_MAIN
+    ) -> None:
+        """"""
+        with self._lock:
+            super().register(type, handler, affinity)
+            self._affinities.setdefault((type, handler), affinity)
+            self._compile()
+
+    def unregister(self, type: str, handler: HandlerType) -> None:
+        """"""
+        with self._lock:
+            super().unregister(type, handler)
+            self._affinities.pop((type, handler), None)
+            self._compile()
+
+    def register_general(
+        self,
+        handler: HandlerType,
+        affinity: str = AFFINITY_MAIN
+    ) -> None:
+        """"""
+        with self._lock:
+            super().register_general(handler, affinity)
+            self._general_affinities.setdefault(handler, affinity)
+            self._compile()
+
+    def unregister_general(self, handler: HandlerType) -> None:
+        """"""
+        with self._lock:
+            super().unregister_general(handler)
+            self._general_affinities.pop(handler, None)
+            self._compile()
@@ -488,6 +488,18 @@ class BinanceRestApi(RestClient):
 
         self.gateway.write_log("合约信息查询成功")
 
+    def on_latency(self, request: Request) -> None:
+        """
+        Write log of slow request.
+        """
+        if request.latency >= self.slow_latency:
+            msg = (
+                f"REST请求延时过高：{request.method} {request.path}，"
+                f"延时{request.latency * 1000:.0f}ms，"
+                f"排队{request.wait_latency * 1000:.0f}ms"
+            )
+            self.gateway.write_log(msg)
+
     def on_send_order(self, data, request):
         """"""
         pass
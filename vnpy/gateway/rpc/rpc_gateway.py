@@ -1,5 +1,19 @@
+import zlib
+from threading import Lock, Thread
+from time import sleep
+from typing import List, Set, Tuple
+
 from vnpy.event import Event
-from vnpy.rpc import RpcClient
+from vnpy.rpc import RpcClient, make_topic
+from vnpy.trader.event import (
+    EVENT_TICK,
+    EVENT_ORDER,
+    EVENT_TRADE,
+    EVENT_POSITION,
+    EVENT_ACCOUNT,
+    EVENT_CONTRACT,
+    EVENT_LOG
+)
 from vnpy.trader.gateway import BaseGateway
 from vnpy.trader.object import (
     SubscribeRequest,
@@ -9,6 +23,23 @@ from vnpy.trader.object import (
 from vnpy.trader.constant import Exchange
 
 
+# Format version of snapshot supported
+SNAPSHOT_VERSION = 1
+
+# Seconds to wait before querying snapshot again after failed, which
+# is doubled after every failure
+RETRY_INTERVAL = 1
+MAX_RETRY_INTERVAL = 30
+
+# Updates kept while restoring snapshot, all of them are dropped when
+# exceeded and snapshot is restored again
+MAX_PENDING = 100_000
+
+# First key of topic for events other than trading data (e.g. events of
+# apps), which are all forwarded into event engine
+GENERAL_TOPIC = "general"
+
+
 class RpcGateway(BaseGateway):
     """
     VN Trader Gateway for RPC service.
@@ -27,23 +58,58 @@ class RpcGateway(BaseGateway):
 
         self.symbol_gateway_map = {}
 
+        # Updates are applied only after snapshot is restored, and those
+        # received during restoring are kept in pending list
+        self.active: bool = False
+        self.synchronized: bool = False
+        self.syncing: bool = False
+        self.last_seq: int = 0
+        self.pending: List[Tuple[int, Event]] = []
+        self.lock: Lock = Lock()
+
+        # Trades pushed already, which are not pushed again when
+        # restoring snapshot for another time
+        self.tradeids: Set[str] = set()
+
         self.client = RpcClient()
         self.client.callback = self.client_callback
 
+        # Data pushed again by gateway, so that specific events (e.g.
+        # EVENT_TICK + vt_symbol) are restored
+        self.data_handlers = {
+            EVENT_TICK: self.on_tick,
+            EVENT_ORDER: self.on_order,
+            EVENT_TRADE: self.on_trade,
+            EVENT_POSITION: self.on_position,
+            EVENT_ACCOUNT: self.on_account,
+            EVENT_CONTRACT: self.on_contract,
+            EVENT_LOG: self.on_log,
+        }
+
     def connect(self, setting: dict):
         """"""
         req_address = setting["主动请求地址"]
         pub_address = setting["推送订阅地址"]
 
-        self.client.subscribe_topic("")
+        # Tick data is subscribed for each symbol later
+        for event_type in self.data_handlers:
+            if event_type != EVENT_TICK:
+                self.client.subscribe_topic(make_topic(event_type))
+
+        self.client.subscribe_topic(make_topic(GENERAL_TOPIC))
+
         self.client.start(req_address, pub_address)
+        self.active = True
 
         self.write_log("服务器连接成功，开始初始化查询")
 
-        self.query_all()
+        with self.lock:
+            self.resync()
 
     def subscribe(self, req: SubscribeRequest):
         """"""
+        self.client.subscribe_topic(make_topic(EVENT_TICK, req.vt_symbol))
+
         gateway_name = self.symbol_gateway_map.get(req.vt_symbol, "")
         self.client.subscribe(req, gateway_name)
 
@@ -66,52 +132,130 @@ class RpcGateway(BaseGateway):
         pass
 
     def query_all(self):
-        """"""
-        contracts = self.client.get_all_contracts()
-        for contract in contracts:
-            self.symbol_gateway_map[contract.vt_symbol] = contract.gateway_name
-            contract.gateway_name = self.gateway_name
-            self.on_contract(contract)
-        self.write_log("合约信息查询成功")
-
-        accounts = self.client.get_all_accounts()
-        for account in accounts:
-            account.gateway_name = self.gateway_name
-            self.on_account(account)
-        self.write_log("资金信息查询成功")
-
-        positions = self.client.get_all_positions()
-        for position in positions:
-            position.gateway_name = self.gateway_name
-            self.on_position(position)
-        self.write_log("持仓信息查询成功")
-
-        orders = self.client.get_all_orders()
-        for order in orders:
-            order.gateway_name = self.gateway_name
-            self.on_order(order)
-        self.write_log("委托信息查询成功")
-
-        trades = self.client.get_all_trades()
-        for trade in trades:
-            trade.gateway_name = self.gateway_name
-            self.on_trade(trade)
-        self.write_log("成交信息查询成功")
+        """
+        Restore all trading data from snapshot, and then apply updates
+        published after it. Snapshot is queried again until restored
+        successfully or gateway closed.
+        """
+        interval = RETRY_INTERVAL
+
+        while self.active:
+            with self.lock:
+                self.synchronized = False
+                self.syncing = True
+                self.pending = []
+
+            try:
+                snapshot = self.client.get_snapshot()
+
+                if snapshot["version"] != SNAPSHOT_VERSION:
+                    self.write_log(f"快照版本{snapshot['version']}不支持，请升级客户端")
+
+                    with self.lock:
+                        self.syncing = False
+                        self.pending = []
+                    return
+
+                if self.restore_snapshot(snapshot):
+                    return
+            except Exception as ex:
+                self.write_log(f"快照同步失败：{ex}，{interval}秒后重试")
+
+                sleep(interval)
+                interval = min(interval * 2, MAX_RETRY_INTERVAL)
+
+    def restore_snapshot(self, snapshot: dict) -> bool:
+        """
+        Return False if any update after snapshot is missed.
+        """
+        for chunk in snapshot["chunks"]:
+            event_type, objects = self.client.serializer.loads(zlib.decompress(chunk))
+
+            for data in objects:
+                self.process_data(event_type, data)
+
+        with self.lock:
+            self.last_seq = snapshot["seq"]
+
+            for seq, event in self.pending:
+                # Already included in snapshot
+                if seq <= self.last_seq:
+                    continue
+
+                if seq != self.last_seq + 1:
+                    self.write_log("推送序号不连续，重新同步快照")
+                    return False
+
+                self.last_seq = seq
+                self.process_data(event.type, event.data)
+
+            self.pending = []
+            self.synchronized = True
+            self.syncing = False
+
+        self.write_log(f"快照同步成功，数据块{len(snapshot['chunks'])}个，序号{self.last_seq}")
+        return True
+
+    def resync(self) -> None:
+        """
+        Restore from snapshot in another thread, without blocking the
+        thread of client callback. Must be called with lock held.
+        """
+        self.synchronized = False
+        self.syncing = True
+
+        thread = Thread(target=self.query_all, daemon=True)
+        thread.start()
 
     def close(self):
         """"""
+        self.active = False
         self.client.stop()
         self.client.join()
 
-    def client_callback(self, topic: str, event: Event):
+    def client_callback(self, topic: str, data: Tuple[int, Event]):
         """"""
-        if event is None:
-            print("none event", topic, event)
+        seq, event = data
+
+        # Data not included in snapshot (e.g. tick)
+        if seq is None:
+            self.process_data(event.type, event.data, event)
             return
 
-        data = event.data
+        with self.lock:
+            # Updates are not kept if no snapshot is being restored
+            if not self.synchronized:
+                if self.syncing:
+                    if len(self.pending) >= MAX_PENDING:
+                        self.pending = []
+                    self.pending.append((seq, event))
+                return
+
+            # Server restarted, or data dropped by zmq
+            if seq != self.last_seq + 1:
+                self.write_log("推送序号不连续，重新同步快照")
+                self.resync()
+                return
+
+            self.last_seq = seq
+            self.process_data(event.type, event.data)
+
+    def process_data(self, event_type: str, data: object, event: Event = None):
+        """
+        Push data received from server by callback of the same type.
+        """
+        if event_type == EVENT_CONTRACT:
+            self.symbol_gateway_map[data.vt_symbol] = data.gateway_name
+        elif event_type == EVENT_TRADE:
+            if data.vt_tradeid in self.tradeids:
+                return
+            self.tradeids.add(data.vt_tradeid)
 
         if hasattr(data, "gateway_name"):
             data.gateway_name = self.gateway_name
 
-        self.event_engine.put(event)
+        handler = self.data_handlers.get(event_type, None)
+        if handler:
+            handler(data)
+        elif event:
+            self.event_engine.put(event)
@@ -0,0 +1 @@
+from .tick_bus_gateway import TickBusGateway
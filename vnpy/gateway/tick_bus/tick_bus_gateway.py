@@ -0,0 +1,178 @@
+from queue import Empty, Queue
+from threading import Thread
+from time import sleep
+from typing import Optional, Set
+
+from vnpy.event import EventEngine
+from vnpy.trader.gateway import BaseGateway
+from vnpy.trader.object import (
+    SubscribeRequest,
+    CancelRequest,
+    OrderRequest
+)
+from vnpy.trader.constant import Exchange
+from vnpy.trader.tick_bus import (
+    TickBusReader,
+    DEFAULT_BUS_NAME,
+    SHARED_MEMORY_AVAILABLE
+)
+
+
+# Seconds to sleep when no new tick found
+POLL_INTERVAL = 0.0001
+
+# Seconds to wait before opening bus again
+RECONNECT_INTERVAL = 1
+
+
+class TickBusGateway(BaseGateway):
+    """
+    VN Trader Gateway for tick bus in shared memory, which is written by
+    TickBusEngine of another process on the same host.
+    """
+
+    default_setting = {
+        "总线名称": DEFAULT_BUS_NAME
+    }
+
+    exchanges = list(Exchange)
+
+    def __init__(self, event_engine: EventEngine):
+        """Constructor"""
+        super().__init__(event_engine, "TICKBUS")
+
+        self.bus_name: str = DEFAULT_BUS_NAME
+        self.reader: Optional[TickBusReader] = None
+
+        # Reader and subscribed symbols are only used in polling thread,
+        # new subscriptions are passed by queue
+        self.subscribed: Set[str] = set()
+        self.subscribe_queue: Queue = Queue()
+
+        # Number of contracts in directory pushed already
+        self.contract_count: int = 0
+
+        self.active: bool = False
+        self.thread: Optional[Thread] = None
+
+    def connect(self, setting: dict) -> None:
+        """"""
+        if self.active:
+            return
+
+        if not SHARED_MEMORY_AVAILABLE:
+            self.write_log("当前Python版本不支持共享内存，需要3.8及以上版本")
+            return
+
+        self.bus_name = setting["总线名称"]
+
+        self.active = True
+        self.thread = Thread(target=self.run)
+        self.thread.start()
+
+    def subscribe(self, req: SubscribeRequest) -> None:
+        """"""
+        self.subscribe_queue.put(req.vt_symbol)
+
+    def send_order(self, req: OrderRequest) -> str:
+        """"""
+        self.write_log("行情总线接口不支持委托交易")
+        return ""
+
+    def cancel_order(self, req: CancelRequest) -> None:
+        """"""
+        pass
+
+    def query_account(self) -> None:
+        """"""
+        pass
+
+    def query_position(self) -> None:
+        """"""
+        pass
+
+    def close(self) -> None:
+        """"""
+        self.active = False
+
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+
+    def run(self) -> None:
+        """
+        Poll new ticks from bus, and open it again after writer restarted.
+        """
+        while self.active:
+            if not self.reader:
+                self.reader = self.open_reader()
+                if not self.reader:
+                    sleep(RECONNECT_INTERVAL)
+                    continue
+
+                self.contract_count = 0
+                self.push_contracts()
+
+                for vt_symbol in self.subscribed:
+                    self.reader.subscribe(vt_symbol)
+
+            if not self.subscribe_queue.empty():
+                self.process_subscribe_queue()
+
+            ticks = self.reader.poll()
+
+            if ticks:
+                for tick in ticks:
+                    self.on_tick(tick)
+            elif not self.reader.is_active():
+                self.write_log("行情总线已关闭，等待重新连接")
+                self.reader.close()
+                self.reader = None
+            else:
+                self.push_contracts()
+                sleep(POLL_INTERVAL)
+
+        if self.reader:
+            self.reader.close()
+            self.reader = None
+
+    def open_reader(self) -> Optional[TickBusReader]:
+        """"""
+        try:
+            reader = TickBusReader(self.bus_name, self.gateway_name)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        # Left by writer being closed
+        if not reader.is_active():
+            reader.close()
+            return None
+
+        self.write_log("行情总线连接成功")
+        return reader
+
+    def process_subscribe_queue(self) -> None:
+        """"""
+        while True:
+            try:
+                vt_symbol = self.subscribe_queue.get_nowait()
+            except Empty:
+                return
+
+            self.subscribed.add(vt_symbol)
+            self.reader.subscribe(vt_symbol)
+
+    def push_contracts(self) -> None:
+        """
+        Push contracts added into directory since last time.
+        """
+        self.reader.refresh()
+
+        if len(self.reader.contracts) == self.contract_count:
+            return
+
+        contracts = list(self.reader.contracts.values())
+        for contract in contracts[self.contract_count:]:
+            self.on_contract(contract)
+
+        self.contract_count = len(contracts)
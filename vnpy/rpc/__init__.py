@@ -3,16 +3,20 @@ from os import truncate
 import signal
 import threading
 import traceback
+from concurrent.futures import Future, TimeoutError
 from datetime import datetime, timedelta
 from functools import lru_cache
-from typing import Any, Callable, Dict
+from itertools import count
+from queue import Queue
+from typing import Any, Callable, Dict, List, Set, Tuple
 from pathlib import Path
 
 import zmq
 import zmq.auth
-from zmq.backend.cython.constants import NOBLOCK
 from zmq.auth.thread import ThreadAuthenticator
 
+from .serializer import Serializer, CompactSerializer
+
 
 # Achieve Ctrl-c interrupt recv
 signal.signal(signal.SIGINT, signal.SIG_DFL)
@@ -22,6 +26,11 @@ KEEP_ALIVE_TOPIC: str = "_keep_alive"
 KEEP_ALIVE_INTERVAL: timedelta = timedelta(seconds=1)
 KEEP_ALIVE_TOLERANCE: timedelta = timedelta(seconds=30)
 
+TOPIC_SEPARATOR: str = "|"
+
+DEFAULT_WORKER_COUNT: int = 4
+DEFAULT_TIMEOUT: int = 30000
+
 
 class RemoteException(Exception):
     """
@@ -44,18 +53,32 @@ class RemoteException(Exception):
 class RpcServer:
     """"""
 
-    def __init__(self):
+    def __init__(self, serializer: Serializer = None):
         """
         Constructor
         """
+        # Serializer of request, response and published data
+        if not serializer:
+            serializer = CompactSerializer()
+        self.serializer: Serializer = serializer
+
         # Save functions dict: key is fuction name, value is fuction object
         self.__functions: Dict[str, Any] = {}
 
+        # Functions (e.g. send_order) executed in the high priority lane
+        self.__priority_functions: Set[str] = set()
+
         # Zmq port related
         self.__context: zmq.Context = zmq.Context()
 
-        # Reply socket (Request–reply pattern)
-        self.__socket_rep: zmq.Socket = self.__context.socket(zmq.REP)
+        # Router socket (Request–reply pattern), which serves both REQ
+        # and DEALER clients
+        self.__socket_rep: zmq.Socket = self.__context.socket(zmq.ROUTER)
+
+        # Replies of worker threads are sent back through inproc socket
+        self.__reply_address: str = f"inproc://rpc_reply_{id(self)}"
+        self.__socket_reply: zmq.Socket = self.__context.socket(zmq.PULL)
+        self.__socket_reply.bind(self.__reply_address)
 
         # Publish socket (Publish–subscribe pattern)
         self.__socket_pub: zmq.Socket = self.__context.socket(zmq.PUB)
@@ -65,6 +88,12 @@ class RpcServer:
         self.__thread: threading.Thread = None          # RpcServer thread
         self.__lock: threading.Lock = threading.Lock()
 
+        # Worker pool: requests of high priority lane are never queued
+        # behind slow ones (e.g. query_history) of normal lane
+        self.__workers: List[Tuple[threading.Thread, Queue]] = []
+        self.__priority_queue: Queue = Queue()
+        self.__normal_queue: Queue = Queue()
+
         # Authenticator used to ensure data security
         self.__authenticator: ThreadAuthenticator = None
 
@@ -78,10 +107,14 @@ class RpcServer:
         pub_address: str,
         server_secretkey_path: str = "",
         username: str = "",
-        password: str = ""
+        password: str = "",
+        worker_count: int = DEFAULT_WORKER_COUNT
     ) -> None:
         """
         Start RpcServer
+
+        Functions of high priority are executed by a dedicated thread
+        in the order requested, others by a pool of worker_count threads.
         """
         if self.__active:
             return
@@ -122,6 +155,14 @@ class RpcServer:
         # Start RpcServer status
         self.__active = True
 
+        # Start worker threads
+        queues = [self.__priority_queue] + [self.__normal_queue] * max(worker_count, 1)
+
+        for queue in queues:
+            worker = threading.Thread(target=self.run_worker, args=(queue,))
+            worker.start()
+            self.__workers.append((worker, queue))
+
         # Start RpcServer thread
         self.__thread = threading.Thread(target=self.run)
         self.__thread.start()
@@ -146,21 +187,83 @@ class RpcServer:
         """
         Run RpcServer functions
         """
+        poller = zmq.Poller()
+        poller.register(self.__socket_rep, zmq.POLLIN)
+        poller.register(self.__socket_reply, zmq.POLLIN)
+
         start = datetime.utcnow()
 
         while self.__active:
-            # Use poll to wait event arrival, waiting time is 1 second (1000 milliseconds)
             cur = datetime.utcnow()
             delta = cur - start
 
             if delta >= KEEP_ALIVE_INTERVAL:
                 self.publish(KEEP_ALIVE_TOPIC, cur)
+                start = cur
+
+            # Use poll to wait event arrival, waiting time is 1 second (1000 milliseconds)
+            events = dict(poller.poll(1000))
+
+            # Dispatch requests to worker threads
+            if self.__socket_rep in events:
+                while True:
+                    try:
+                        frames = self.__socket_rep.recv_multipart(flags=zmq.NOBLOCK)
+                    except zmq.Again:
+                        break
+                    self.dispatch(frames)
+
+            # Send responses of worker threads back to clients
+            if self.__socket_reply in events:
+                while True:
+                    try:
+                        frames = self.__socket_reply.recv_multipart(flags=zmq.NOBLOCK)
+                    except zmq.Again:
+                        break
+                    self.__socket_rep.send_multipart(frames)
+
+        # Stop worker threads
+        for _, queue in self.__workers:
+            queue.put(None)
+
+        for worker, _ in self.__workers:
+            worker.join()
+        self.__workers = []
 
-            if not self.__socket_rep.poll(1000):
-                continue
+        # Unbind socket address
+        self.__socket_pub.unbind(self.__socket_pub.LAST_ENDPOINT)
+        self.__socket_rep.unbind(self.__socket_rep.LAST_ENDPOINT)
 
-            # Receive request data from Reply socket
-            req = self.__socket_rep.recv_pyobj()
+    def dispatch(self, frames: List[bytes]) -> None:
+        """
+        Put request into queue of its lane.
+
+        The last frame is request data, and all frames before it are the
+        envelope (client identity, empty delimiter and request id of
+        DEALER client) sent back with response.
+        """
+        header = frames[:-1]
+        req = self.serializer.loads(frames[-1])
+
+        name = req[0]
+        if name in self.__priority_functions:
+            self.__priority_queue.put((header, req))
+        else:
+            self.__normal_queue.put((header, req))
+
+    def run_worker(self, queue: Queue) -> None:
+        """
+        Execute requests in the queue until None is received.
+        """
+        socket = self.__context.socket(zmq.PUSH)
+        socket.connect(self.__reply_address)
+
+        while True:
+            task = queue.get()
+            if task is None:
+                break
+
+            header, req = task
 
             # Get function name and parameters
             name, args, kwargs = req
@@ -170,40 +273,64 @@ class RpcServer:
                 func = self.__functions[name]
                 r = func(*args, **kwargs)
                 rep = [True, r]
-            except Exception as e:  # noqa
+            except Exception:
                 rep = [False, traceback.format_exc()]
 
-            # send callable response by Reply socket
-            self.__socket_rep.send_pyobj(rep)
+            socket.send_multipart(header + [self.serializer.dumps(rep)])
 
-        # Unbind socket address
-        self.__socket_pub.unbind(self.__socket_pub.LAST_ENDPOINT)
-        self.__socket_rep.unbind(self.__socket_rep.LAST_ENDPOINT)
+        socket.close()
 
     def publish(self, topic: str, data: Any) -> None:
         """
         Publish data
         """
         with self.__lock:
-            self.__socket_pub.send_pyobj([topic, data])
+            self.__socket_pub.send_multipart(
+                [topic.encode("UTF-8"), self.serializer.dumps(data)]
+            )
 
-    def register(self, func: Callable) -> None:
+    def register(self, func: Callable, high_priority: bool = False) -> None:
         """
-        Register function
+        Register function, which is executed in high priority lane if
+        high_priority is True (e.g. send_order and cancel_order).
         """
         self.__functions[func.__name__] = func
 
+        if high_priority:
+            self.__priority_functions.add(func.__name__)
+        else:
+            self.__priority_functions.discard(func.__name__)
+
 
 class RpcClient:
     """"""
 
-    def __init__(self):
+    def __init__(self, serializer: Serializer = None):
         """Constructor"""
+        # Serializer of request, response and published data
+        if not serializer:
+            serializer = CompactSerializer()
+        self.serializer: Serializer = serializer
+
         # zmq port related
         self.__context: zmq.Context = zmq.Context()
 
-        # Request socket (Request–reply pattern)
-        self.__socket_req: zmq.Socket = self.__context.socket(zmq.REQ)
+        # Dealer socket (Request–reply pattern), which sends requests
+        # without waiting for responses of previous ones
+        self.__socket_req: zmq.Socket = self.__context.socket(zmq.DEALER)
+
+        # Requests of caller threads are passed to RpcClient thread
+        # through inproc sockets, since zmq socket is not thread safe
+        self.__request_address: str = f"inproc://rpc_request_{id(self)}"
+        self.__socket_request: zmq.Socket = self.__context.socket(zmq.PULL)
+        self.__socket_request.bind(self.__request_address)
+
+        self.__local: threading.local = threading.local()
+        self.__push_sockets: List[zmq.Socket] = []
+
+        # Futures of requests waiting for responses
+        self.__futures: Dict[int, Future] = {}
+        self.__count: count = count()
 
         # Subscribe socket (Publish–subscribe pattern)
         self.__socket_sub: zmq.Socket = self.__context.socket(zmq.SUB)
@@ -230,31 +357,60 @@ class RpcClient:
             if "timeout" in kwargs:
                 timeout = kwargs.pop("timeout")
             else:
-                timeout = 30000
-
-            # Generate request
-            req = [name, args, kwargs]
+                timeout = DEFAULT_TIMEOUT
 
             # Send request and wait for response
-            with self.__lock:
-                self.__socket_req.send_pyobj(req)
-                
-                # Timeout reached without any data
-                n = self.__socket_req.poll(timeout)
-                if not n:
-                    msg = f"Timeout of {timeout}ms reached for {req}"
-                    raise RemoteException(msg)
-                
-                rep = self.__socket_req.recv_pyobj()
-
-            # Return response if successed; Trigger exception if failed
-            if rep[0]:
-                return rep[1]
-            else:
-                raise RemoteException(rep[1])
+            future = self.call_async(name, *args, **kwargs)
+
+            try:
+                return future.result(timeout / 1000)
+            except TimeoutError:
+                self.__futures.pop(future.request_id, None)
+
+                req = [name, args, kwargs]
+                msg = f"Timeout of {timeout}ms reached for {req}"
+                raise RemoteException(msg)
 
         return dorpc
 
+    def call_async(self, name: str, *args, **kwargs) -> Future:
+        """
+        Send request of remote call without waiting for response.
+
+        Return a future of the result, which raises RemoteException if
+        remote call failed. Use asyncio.wrap_future to await it in
+        asyncio code.
+        """
+        request_id = next(self.__count)
+
+        future = Future()
+        future.request_id = request_id
+        self.__futures[request_id] = future
+
+        req = [name, args, kwargs]
+        data = self.serializer.dumps(req)
+
+        socket = self.get_push_socket()
+        socket.send_multipart([request_id.to_bytes(8, "little"), data])
+
+        return future
+
+    def get_push_socket(self) -> zmq.Socket:
+        """
+        Get inproc socket of current thread used for sending requests.
+        """
+        socket = getattr(self.__local, "socket", None)
+
+        if not socket:
+            socket = self.__context.socket(zmq.PUSH)
+            socket.connect(self.__request_address)
+            self.__local.socket = socket
+
+            with self.__lock:
+                self.__push_sockets.append(socket)
+
+        return socket
+
     def start(
         self, 
         req_address: str, 
@@ -307,6 +463,9 @@ class RpcClient:
         self.__socket_req.connect(req_address)
         self.__socket_sub.connect(sub_address)
 
+        # Heartbeat is always needed no matter what topics are subscribed
+        self.subscribe_topic(KEEP_ALIVE_TOPIC)
+
         # Start RpcClient status
         self.__active = True
 
@@ -336,26 +495,76 @@ class RpcClient:
         """
         Run RpcClient function
         """
-        pull_tolerance = int(KEEP_ALIVE_TOLERANCE.total_seconds() * 1000)
+        poller = zmq.Poller()
+        poller.register(self.__socket_req, zmq.POLLIN)
+        poller.register(self.__socket_request, zmq.POLLIN)
+        poller.register(self.__socket_sub, zmq.POLLIN)
+
+        last_received = datetime.utcnow()
 
         while self.__active:
-            if not self.__socket_sub.poll(pull_tolerance):
-                self.on_disconnected()
-                continue
+            events = dict(poller.poll(1000))
+
+            # Forward requests of caller threads to server
+            if self.__socket_request in events:
+                while True:
+                    try:
+                        frames = self.__socket_request.recv_multipart(flags=zmq.NOBLOCK)
+                    except zmq.Again:
+                        break
+                    self.__socket_req.send_multipart([b""] + frames)
+
+            # Set results of futures by responses
+            if self.__socket_req in events:
+                while True:
+                    try:
+                        _, request_id, data = self.__socket_req.recv_multipart(flags=zmq.NOBLOCK)
+                    except zmq.Again:
+                        break
+                    self.process_response(request_id, data)
 
             # Receive data from subscribe socket
-            topic, data = self.__socket_sub.recv_pyobj(flags=NOBLOCK)
-
-            if topic == KEEP_ALIVE_TOPIC:
-                self._last_received_ping = data
-            else:
-                # Process data by callable function
-                self.callback(topic, data)
+            if self.__socket_sub in events:
+                last_received = datetime.utcnow()
+
+                while True:
+                    try:
+                        topic, data = self.__socket_sub.recv_multipart(flags=zmq.NOBLOCK)
+                    except zmq.Again:
+                        break
+
+                    topic = topic.decode("UTF-8")
+                    data = self.serializer.loads(data)
+
+                    if topic == KEEP_ALIVE_TOPIC:
+                        self._last_received_ping = data
+                    else:
+                        # Process data by callable function
+                        self.callback(topic, data)
+            elif datetime.utcnow() - last_received > KEEP_ALIVE_TOLERANCE:
+                last_received = datetime.utcnow()
+                self.on_disconnected()
 
         # Close socket
         self.__socket_req.close()
         self.__socket_sub.close()
 
+    def process_response(self, request_id: bytes, data: bytes) -> None:
+        """"""
+        future = self.__futures.pop(int.from_bytes(request_id, "little"), None)
+
+        # Response arrived after timeout
+        if not future:
+            return
+
+        rep = self.serializer.loads(data)
+
+        # Return response if successed; Trigger exception if failed
+        if rep[0]:
+            future.set_result(rep[1])
+        else:
+            future.set_exception(RemoteException(rep[1]))
+
     def callback(self, topic: str, data: Any) -> None:
         """
         Callable function
@@ -364,10 +573,17 @@ class RpcClient:
 
     def subscribe_topic(self, topic: str) -> None:
         """
-        Subscribe data
+        Subscribe data of topics starting with the string, which is
+        filtered by zmq before being received.
         """
         self.__socket_sub.setsockopt_string(zmq.SUBSCRIBE, topic)
 
+    def unsubscribe_topic(self, topic: str) -> None:
+        """
+        Unsubscribe data
+        """
+        self.__socket_sub.setsockopt_string(zmq.UNSUBSCRIBE, topic)
+
     def on_disconnected(self):
         """
         Callback when heartbeat is lost.
@@ -376,6 +592,18 @@ class RpcClient:
                 .format(tolerance=KEEP_ALIVE_TOLERANCE.total_seconds()))
 
 
+def make_topic(*keys: str) -> str:
+    """
+    Make topic string from keys (e.g. event type and vt_symbol).
+
+    Every key is followed by separator, so that subscribing topic of
+    "IF2006.CFE" does not receive data of "IF2006.CFETS", and topic of
+    fewer keys (e.g. event type only) receives data of all topics
+    starting with them.
+    """
+    return "".join(key + TOPIC_SEPARATOR for key in keys)
+
+
 def generate_certificates(name: str) -> None:
     """
     Generate CURVE certificate files for zmq authenticator.
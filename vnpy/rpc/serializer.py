@@ -0,0 +1,326 @@
+"""
+Serializers which convert RPC messages to bytes sent by zmq sockets.
+"""
+
+import copyreg
+import io
+import pickle
+import struct
+from dataclasses import fields
+from datetime import datetime, timedelta, timezone, tzinfo
+from enum import Enum
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Dict, Iterable, List, Tuple
+
+from vnpy.trader.object import (
+    TickData,
+    BarData,
+    OrderData,
+    TradeData,
+    PositionData,
+    AccountData,
+    LogData,
+    ContractData,
+    SubscribeRequest,
+    OrderRequest,
+    CancelRequest,
+    HistoryRequest
+)
+
+
+PROTOCOL = pickle.HIGHEST_PROTOCOL
+
+DATA_CLASSES = [
+    TickData,
+    BarData,
+    OrderData,
+    TradeData,
+    PositionData,
+    AccountData,
+    LogData,
+    ContractData,
+    SubscribeRequest,
+    OrderRequest,
+    CancelRequest,
+    HistoryRequest
+]
+
+EPOCH = datetime(1970, 1, 1)
+UTC_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+# Stored for datetime field of None value
+NONE_TIME = -2 ** 63
+
+# Stored for enum field of None value
+NONE_INDEX = -1
+
+ZONEINFO_PREFIX = "zoneinfo:"
+
+CODECS: Dict[str, "DataCodec"] = {}
+TZ_NAMES: Dict[tzinfo, str] = {}
+
+
+class Serializer:
+    """
+    Convert message object to bytes and back.
+    """
+
+    def dumps(self, obj: Any) -> bytes:
+        """"""
+        raise NotImplementedError
+
+    def loads(self, data: bytes) -> Any:
+        """"""
+        raise NotImplementedError
+
+
+class PickleSerializer(Serializer):
+    """
+    Serialize any picklable object with the standard pickle.
+    """
+
+    def dumps(self, obj: Any) -> bytes:
+        """"""
+        return pickle.dumps(obj, PROTOCOL)
+
+    def loads(self, data: bytes) -> Any:
+        """"""
+        return pickle.loads(data)
+
+
+class CompactSerializer(PickleSerializer):
+    """
+    Pickle in which data objects of vnpy.trader.object are packed with
+    precompiled struct instead of pickling every field with its name.
+
+    Output is still a valid pickle, so it can be loaded by
+    PickleSerializer as well. Any other object, or data object which has
+    unexpected field value (e.g. None in float field), falls back to
+    standard pickle.
+    """
+
+    def __init__(self, classes: Iterable[type] = DATA_CLASSES):
+        """"""
+        self.dispatch_table: dict = copyreg.dispatch_table.copy()
+
+        for cls in classes:
+            self.dispatch_table[cls] = get_codec(cls).reduce
+
+    def dumps(self, obj: Any) -> bytes:
+        """"""
+        buf = io.BytesIO()
+        pickler = pickle.Pickler(buf, PROTOCOL)
+        pickler.dispatch_table = self.dispatch_table
+        pickler.dump(obj)
+        return buf.getvalue()
+
+
+class DataCodec:
+    """
+    Pack fields of a dataclass into bytes with precompiled struct:
+
+    * float, int and bool are stored as binary numbers
+    * enum is stored as index of its member
+    * datetime is stored as microseconds since epoch in UTC, with name
+      of its timezone in the strings
+    * any other field (e.g. str) is left in the strings tuple pickled
+      as usual
+
+    Attributes which are not fields (e.g. vt_symbol set in __post_init__)
+    are kept in a dict.
+    """
+
+    def __init__(self, cls: type):
+        """"""
+        self.cls: type = cls
+        self.name: str = f"{cls.__module__}.{cls.__qualname__}"
+
+        formats: List[str] = []
+        number_names: List[str] = []
+        string_names: List[str] = []
+
+        self.enum_fields: List[Tuple[int, str, list, dict]] = []
+        self.datetime_fields: List[Tuple[int, str]] = []
+
+        for field in fields(cls):
+            if field.type is float:
+                formats.append("d")
+            elif field.type is int:
+                formats.append("q")
+            elif field.type is bool:
+                formats.append("?")
+            elif isinstance(field.type, type) and issubclass(field.type, Enum):
+                members = list(field.type)
+                indexes = {member: i for i, member in enumerate(members)}
+                indexes[None] = NONE_INDEX
+
+                formats.append("h")
+                self.enum_fields.append(
+                    (len(number_names), field.name, members, indexes)
+                )
+            elif field.type is datetime:
+                formats.append("q")
+                self.datetime_fields.append((len(number_names), field.name))
+            else:
+                string_names.append(field.name)
+                continue
+
+            number_names.append(field.name)
+
+        self.struct: struct.Struct = struct.Struct("<" + "".join(formats))
+        self.number_names: List[str] = number_names
+        self.string_names: List[str] = string_names
+        self.field_names: set = set(number_names + string_names)
+
+        self.get_numbers = attrgetter(*number_names) if number_names else None
+        self.get_strings = attrgetter(*string_names) if string_names else None
+
+    def reduce(self, obj: Any) -> tuple:
+        """
+        Reduce function used in dispatch table of pickler.
+        """
+        try:
+            return decode_data, self.encode(obj)
+        except (struct.error, KeyError, ValueError, TypeError, AttributeError):
+            return obj.__reduce_ex__(PROTOCOL)
+
+    def encode(self, obj: Any) -> tuple:
+        """"""
+        numbers = self.get_numbers(obj) if self.get_numbers else ()
+        if len(self.number_names) == 1:
+            numbers = [numbers]
+        else:
+            numbers = list(numbers)
+
+        strings = self.get_strings(obj) if self.get_strings else ()
+        if len(self.string_names) == 1:
+            strings = [strings]
+        else:
+            strings = list(strings)
+
+        for i, _, _, indexes in self.enum_fields:
+            numbers[i] = indexes[numbers[i]]
+
+        for i, _ in self.datetime_fields:
+            numbers[i], tz_name = encode_datetime(numbers[i])
+            strings.append(tz_name)
+
+        d = obj.__dict__
+        extra_names = d.keys() - self.field_names
+        extras = {name: d[name] for name in extra_names}
+
+        return self.name, self.struct.pack(*numbers), tuple(strings), extras
+
+    def decode(self, packed: bytes, strings: tuple, extras: dict) -> Any:
+        """"""
+        obj = self.cls.__new__(self.cls)
+        d = obj.__dict__
+
+        numbers = self.struct.unpack(packed)
+        d.update(zip(self.number_names, numbers))
+        d.update(zip(self.string_names, strings))
+
+        for i, name, members, _ in self.enum_fields:
+            index = numbers[i]
+            if index == NONE_INDEX:
+                d[name] = None
+            else:
+                d[name] = members[index]
+
+        tz_names = strings[len(self.string_names):]
+        for (i, name), tz_name in zip(self.datetime_fields, tz_names):
+            d[name] = decode_datetime(numbers[i], tz_name)
+
+        if extras:
+            d.update(extras)
+
+        return obj
+
+
+def get_codec(cls: type) -> DataCodec:
+    """
+    Get codec of dataclass, which is created at the first time.
+    """
+    name = f"{cls.__module__}.{cls.__qualname__}"
+
+    codec = CODECS.get(name, None)
+    if not codec:
+        codec = DataCodec(cls)
+        CODECS[name] = codec
+
+    return codec
+
+
+def decode_data(name: str, packed: bytes, strings: tuple, extras: dict) -> Any:
+    """
+    Restore data object reduced by DataCodec, called by pickle when loading.
+    """
+    codec = CODECS.get(name, None)
+
+    if not codec:
+        module_name, class_name = name.rsplit(".", 1)
+        module = __import__(module_name, fromlist=[class_name])
+        codec = get_codec(getattr(module, class_name))
+
+    return codec.decode(packed, strings, extras)
+
+
+def encode_datetime(dt: datetime) -> Tuple[int, str]:
+    """
+    Get microseconds since epoch (UTC for aware datetime) and timezone name.
+    """
+    if dt is None:
+        return NONE_TIME, ""
+
+    tz = dt.tzinfo
+    if tz is None:
+        return (dt - EPOCH) // MICROSECOND, ""
+
+    tz_name = TZ_NAMES.get(tz, None)
+    if not tz_name:
+        tz_name = get_timezone_name(tz)
+        TZ_NAMES[tz] = tz_name
+
+    return (dt - UTC_EPOCH) // MICROSECOND, tz_name
+
+
+def decode_datetime(value: int, tz_name: str) -> datetime:
+    """"""
+    if value == NONE_TIME:
+        return None
+
+    dt = EPOCH + timedelta(microseconds=value)
+
+    if not tz_name:
+        return dt
+
+    tz = get_timezone(tz_name)
+    return tz.fromutc(dt.replace(tzinfo=tz))
+
+
+def get_timezone_name(tz: tzinfo) -> str:
+    """
+    Get name with which timezone can be restored by get_timezone.
+    """
+    zone = getattr(tz, "zone", None)                # pytz
+    if zone:
+        return zone
+
+    key = getattr(tz, "key", None)                  # zoneinfo
+    if key:
+        return ZONEINFO_PREFIX + key
+
+    raise ValueError(f"不支持的时区类型：{tz}")
+
+
+@lru_cache(maxsize=None)
+def get_timezone(tz_name: str):
+    """"""
+    if tz_name.startswith(ZONEINFO_PREFIX):
+        from zoneinfo import ZoneInfo
+        return ZoneInfo(tz_name[len(ZONEINFO_PREFIX):])
+    else:
+        import pytz
+        return pytz.timezone(tz_name)
@@ -0,0 +1,679 @@
+"""
+Local memory-mapped cache of bar and tick data loaded from database.
+"""
+
+import json
+import os
+import re
+from datetime import datetime, timedelta
+from pathlib import Path
+from time import time, time_ns
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .constant import Exchange, Interval
+from .database import (
+    BaseDatabase,
+    BarOverview,
+    DB_TZ,
+    convert_tz,
+    database_manager
+)
+from .frame import BaseFrame, BarFrame, TickFrame, DATETIME_DTYPE
+from .codec import encode_ticks, decode_ticks
+from .utility import get_folder_path
+
+
+# Fixed width record of each bar in cache file
+BAR_DTYPE = np.dtype(
+    [("datetime", DATETIME_DTYPE)] + [(name, "f8") for name in BarFrame.float_fields]
+)
+
+TICK_INTERVAL = "tick"
+
+# Bar overview is checked again only after this number of seconds
+CHECK_TIMEOUT = 10
+
+# Number of rows loaded from database at a time when filling cache
+LOAD_CHUNK_SIZE = 100_000
+
+# Drivers compare datetime bounds differently (naive/aware, date only),
+# so database is always queried with a margin and rows filtered later.
+QUERY_MARGIN = timedelta(days=1)
+
+
+class DataCache:
+    """
+    Cache data of each (vt_symbol, interval) in a file of fixed width
+    records ordered by datetime, which is opened with np.memmap and
+    sliced by datetime without copying.
+
+    Bar cache always holds all bars in database. It is checked against
+    get_bar_overview of database: new bars after cached end are appended,
+    other changes cause the whole file to be rebuilt.
+
+    Tick data has no overview, so tick cache holds the range loaded
+    before and is extended when a later range is requested. Tick cache
+    file is a series of blocks encoded by encode_ticks, which is much
+    smaller than fixed width records, and only blocks within range
+    requested are decoded.
+
+    Datetime is stored as wall time of DB_TZ, the same as database.
+    """
+
+    def __init__(self, database: BaseDatabase, folder_name: str = "data_cache"):
+        """"""
+        self.database: BaseDatabase = database
+        self.folder_path: Path = get_folder_path(folder_name)
+
+        self.check_times: Dict[str, float] = {}
+        self.overviews: Dict[Tuple[str, Exchange, Interval], BarOverview] = {}
+        self.overview_time: float = 0
+
+    def load_bar_array(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime
+    ) -> BarFrame:
+        """
+        Load bar data from cache, which is updated from database first
+        if necessary.
+        """
+        key = self.get_key(symbol, exchange, interval.value)
+
+        # Data not managed by overview is loaded from database directly
+        if not self.check_bar_cache(key, symbol, exchange, interval):
+            return self.database.load_bar_array(
+                symbol, exchange, interval, start, end
+            )
+
+        return self.open_bar_frame(key, symbol, exchange, interval, start, end)
+
+    def iter_bar_array(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime,
+        chunk_size: int = LOAD_CHUNK_SIZE
+    ) -> Iterator[BarFrame]:
+        """
+        Iterate bar data from cache as frames of at most chunk_size,
+        which are views of cache file mapped into memory.
+        """
+        key = self.get_key(symbol, exchange, interval.value)
+
+        if not self.check_bar_cache(key, symbol, exchange, interval):
+            yield from self.database.iter_bar_array(
+                symbol, exchange, interval, start, end, chunk_size
+            )
+            return
+
+        frame = self.open_bar_frame(key, symbol, exchange, interval, start, end)
+        for i in range(0, len(frame), chunk_size):
+            yield frame[i:i + chunk_size]
+
+    def load_tick_array(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        start: datetime,
+        end: datetime
+    ) -> TickFrame:
+        """
+        Load tick data from cache, missing range is loaded from database.
+        """
+        key = self.get_key(symbol, exchange, TICK_INTERVAL)
+        self.update_tick_cache(key, symbol, exchange, start, end)
+
+        meta = self.load_meta(key)
+        frames = self.read_blocks(meta, start, end)
+
+        if frames:
+            columns = {
+                name: np.concatenate([frame.columns[name] for frame in frames])
+                for name in TickFrame.float_fields
+            }
+            datetimes = np.concatenate([frame.datetime for frame in frames])
+        else:
+            columns = {}
+            datetimes = np.empty(0, dtype=DATETIME_DTYPE)
+
+        frame = TickFrame(
+            "DB",
+            symbol,
+            exchange,
+            datetimes,
+            DB_TZ,
+            name=meta.get("name", ""),
+            **columns
+        )
+
+        ix_start, ix_end = get_slice_index(frame.datetime, start, end)
+        return frame[ix_start:ix_end]
+
+    def iter_tick_array(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        start: datetime,
+        end: datetime,
+        chunk_size: int = LOAD_CHUNK_SIZE
+    ) -> Iterator[TickFrame]:
+        """
+        Iterate tick data from cache as frames of at most chunk_size,
+        only one block is decoded at a time.
+        """
+        key = self.get_key(symbol, exchange, TICK_INTERVAL)
+        self.update_tick_cache(key, symbol, exchange, start, end)
+
+        meta = self.load_meta(key)
+
+        for frame in self.iter_blocks(meta, start, end):
+            ix_start, ix_end = get_slice_index(frame.datetime, start, end)
+
+            for i in range(ix_start, ix_end, chunk_size):
+                yield frame[i:min(i + chunk_size, ix_end)]
+
+    def clear(self) -> None:
+        """
+        Delete all cache files.
+        """
+        for path in self.folder_path.iterdir():
+            self.remove_file(path)
+
+        self.check_times.clear()
+        self.overview_time = 0
+
+    def check_bar_cache(
+        self,
+        key: str,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval
+    ) -> bool:
+        """
+        Update bar cache if not checked within CHECK_TIMEOUT, return False
+        if data is not managed by overview and cannot be cached.
+        """
+        if time() - self.check_times.get(key, 0) <= CHECK_TIMEOUT:
+            return True
+
+        overview = self.get_overview(symbol, exchange, interval)
+        if not overview:
+            return False
+
+        self.update_bar_cache(key, symbol, exchange, interval, overview)
+        self.check_times[key] = time()
+        return True
+
+    def open_bar_frame(
+        self,
+        key: str,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime
+    ) -> BarFrame:
+        """
+        Create frame on records of bar cache within start and end.
+        """
+        records, meta = self.open_cache(key, BAR_DTYPE)
+        records = self.slice_records(records, start, end)
+
+        kwargs = {name: records[name] for name in BarFrame.float_fields}
+        return BarFrame(
+            "DB",
+            symbol,
+            exchange,
+            records["datetime"],
+            DB_TZ,
+            interval=interval,
+            **kwargs
+        )
+
+    def update_bar_cache(
+        self,
+        key: str,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        overview: BarOverview
+    ) -> None:
+        """
+        Make bar cache consistent with overview in database.
+        """
+        meta = self.load_meta(key)
+
+        if meta.get("count", 0):
+            start = datetime.fromisoformat(meta["start"])
+            end = datetime.fromisoformat(meta["end"])
+
+            # Cache is up to date
+            if overview.count == meta["count"] and overview.end == end:
+                return
+
+            # New bars after cached end, load and append them only
+            if overview.start >= start and overview.end > end:
+                frames = self.database.iter_bar_array(
+                    symbol,
+                    exchange,
+                    interval,
+                    DB_TZ.localize(end),
+                    DB_TZ.localize(overview.end) + QUERY_MARGIN,
+                    LOAD_CHUNK_SIZE
+                )
+                meta = self.append_records(key, meta, frames, BAR_DTYPE, end)
+
+                if meta["count"] == overview.count:
+                    return
+
+        # No cache file or data changed within cached range
+        frames = self.database.iter_bar_array(
+            symbol,
+            exchange,
+            interval,
+            DB_TZ.localize(overview.start) - QUERY_MARGIN,
+            DB_TZ.localize(overview.end) + QUERY_MARGIN,
+            LOAD_CHUNK_SIZE
+        )
+        self.write_records(key, frames, BAR_DTYPE)
+
+    def update_tick_cache(
+        self,
+        key: str,
+        symbol: str,
+        exchange: Exchange,
+        start: datetime,
+        end: datetime
+    ) -> None:
+        """
+        Make sure range from start to end is in tick cache.
+        """
+        start = to_db_datetime(start)
+        end = min(to_db_datetime(end), convert_tz(datetime.now(DB_TZ)))
+
+        meta = self.load_meta(key)
+
+        # Cache file of fixed width records created by old version
+        if "blocks" not in meta:
+            meta = {}
+
+        if meta:
+            cache_start = datetime.fromisoformat(meta["start"])
+            cache_end = datetime.fromisoformat(meta["end"])
+
+            if start >= cache_start:
+                if end <= cache_end:
+                    return
+
+                frames = self.database.iter_tick_array(
+                    symbol,
+                    exchange,
+                    DB_TZ.localize(cache_end),
+                    DB_TZ.localize(end),
+                    LOAD_CHUNK_SIZE
+                )
+                meta = self.append_blocks(key, meta, frames, cache_end)
+                meta["end"] = end.isoformat()
+                self.save_meta(key, meta)
+                return
+
+            # Load the union of cached and requested range
+            start = min(start, cache_start)
+            end = max(end, cache_end)
+
+        # End is not extended with margin, otherwise ticks after it
+        # would be appended again later.
+        frames = self.database.iter_tick_array(
+            symbol,
+            exchange,
+            DB_TZ.localize(start) - QUERY_MARGIN,
+            DB_TZ.localize(end),
+            LOAD_CHUNK_SIZE
+        )
+        meta = self.write_blocks(key, frames)
+
+        meta["start"] = start.isoformat()
+        meta["end"] = end.isoformat()
+        self.save_meta(key, meta)
+
+    def get_overview(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval
+    ) -> Optional[BarOverview]:
+        """
+        Get bar overview from database, which is queried at most once
+        every CHECK_TIMEOUT seconds for all contracts.
+        """
+        if time() - self.overview_time > CHECK_TIMEOUT:
+            self.overviews = {
+                (o.symbol, o.exchange, o.interval): o
+                for o in self.database.get_bar_overview()
+            }
+            self.overview_time = time()
+
+        return self.overviews.get((symbol, exchange, interval), None)
+
+    def open_cache(self, key: str, dtype: np.dtype) -> Tuple[np.ndarray, dict]:
+        """
+        Open records of cache file in read only mode.
+        """
+        meta = self.load_meta(key)
+        count = meta.get("count", 0)
+
+        # Empty file cannot be memory-mapped
+        if not count:
+            return np.empty(0, dtype=dtype), meta
+
+        path = self.folder_path.joinpath(meta["filename"])
+        records = np.memmap(path, dtype=dtype, mode="r", shape=(count,))
+        return records, meta
+
+    def write_records(
+        self,
+        key: str,
+        frames: Iterable[BaseFrame],
+        dtype: np.dtype
+    ) -> dict:
+        """
+        Write data of frames (chunks in datetime order) into a new cache
+        file, the old one is removed if not used by others.
+        """
+        old_meta = self.load_meta(key)
+
+        filename = f"{key}.{time_ns()}.bin"
+        path = self.folder_path.joinpath(filename)
+
+        meta = {"filename": filename, "count": 0}
+
+        with open(path, mode="wb") as f:
+            for frame in frames:
+                records = frame_to_records(frame, dtype)
+                if not len(records):
+                    continue
+
+                f.write(records.tobytes())
+
+                if not meta["count"]:
+                    meta["start"] = str(records["datetime"][0])
+                    if "name" in frame.consts:
+                        meta["name"] = frame.consts["name"]
+
+                meta["count"] += len(records)
+                meta["end"] = str(records["datetime"][-1])
+
+        self.save_meta(key, meta)
+
+        if old_meta:
+            self.remove_file(self.folder_path.joinpath(old_meta["filename"]))
+
+        return meta
+
+    def append_records(
+        self,
+        key: str,
+        meta: dict,
+        frames: Iterable[BaseFrame],
+        dtype: np.dtype,
+        after: datetime
+    ) -> dict:
+        """
+        Append data of frames later than after into cache file.
+        """
+        count = meta["count"]
+        end = meta.get("end", None)
+
+        # Write at the end of valid records, bytes left by unfinished
+        # writing before are overwritten.
+        path = self.folder_path.joinpath(meta["filename"])
+        with open(path, mode="r+b") as f:
+            f.seek(count * dtype.itemsize)
+
+            for frame in frames:
+                records = frame_to_records(frame, dtype)
+                records = records[records["datetime"] > np.datetime64(after)]
+                if not len(records):
+                    continue
+
+                f.write(records.tobytes())
+                count += len(records)
+                end = str(records["datetime"][-1])
+
+        if count == meta["count"]:
+            return meta
+
+        meta["count"] = count
+        meta["end"] = end
+        self.save_meta(key, meta)
+
+        return meta
+
+    def write_blocks(self, key: str, frames: Iterable[TickFrame]) -> dict:
+        """
+        Encode tick frames into blocks of a new cache file, the old one
+        is removed if not used by others.
+        """
+        old_meta = self.load_meta(key)
+
+        filename = f"{key}.{time_ns()}.bin"
+        path = self.folder_path.joinpath(filename)
+
+        meta = {"filename": filename, "count": 0, "blocks": []}
+
+        with open(path, mode="wb") as f:
+            self.encode_blocks(f, meta, frames)
+
+        self.save_meta(key, meta)
+
+        if old_meta:
+            self.remove_file(self.folder_path.joinpath(old_meta["filename"]))
+
+        return meta
+
+    def append_blocks(
+        self,
+        key: str,
+        meta: dict,
+        frames: Iterable[TickFrame],
+        after: datetime
+    ) -> dict:
+        """
+        Append ticks of frames later than after as new blocks.
+        """
+        blocks = meta["blocks"]
+        count = len(blocks)
+
+        if blocks:
+            position = blocks[-1][2] + blocks[-1][3]
+        else:
+            position = 0
+
+        # Write after the last valid block, bytes left by unfinished
+        # writing before are overwritten.
+        path = self.folder_path.joinpath(meta["filename"])
+        with open(path, mode="r+b") as f:
+            f.seek(position)
+            self.encode_blocks(f, meta, frames, after)
+
+        if len(blocks) > count:
+            self.save_meta(key, meta)
+
+        return meta
+
+    def encode_blocks(
+        self,
+        f: BinaryIO,
+        meta: dict,
+        frames: Iterable[TickFrame],
+        after: datetime = None
+    ) -> None:
+        """
+        Write every frame as a block into file, block info (datetime
+        range, offset and size) is added into meta.
+        """
+        for frame in frames:
+            if after:
+                ix = np.searchsorted(frame.datetime, np.datetime64(after), "right")
+                frame = frame[ix:]
+
+            if not len(frame):
+                continue
+
+            data = encode_ticks(frame)
+            datetimes = frame.datetime.view(np.int64)
+
+            if not meta["count"]:
+                meta["start"] = str(frame.datetime[0])
+
+            meta["blocks"].append(
+                [int(datetimes[0]), int(datetimes[-1]), f.tell(), len(data)]
+            )
+            meta["count"] += len(frame)
+            meta["end"] = str(frame.datetime[-1])
+
+            if not meta.get("name", ""):
+                meta["name"] = frame.name
+
+            f.write(data)
+
+    def read_blocks(
+        self,
+        meta: dict,
+        start: datetime,
+        end: datetime
+    ) -> List[TickFrame]:
+        """
+        Decode blocks of tick cache which overlap with start and end.
+        """
+        return list(self.iter_blocks(meta, start, end))
+
+    def iter_blocks(
+        self,
+        meta: dict,
+        start: datetime,
+        end: datetime
+    ) -> Iterator[TickFrame]:
+        """
+        Decode blocks of tick cache which overlap with start and end
+        one by one.
+        """
+        blocks = meta.get("blocks", [])
+        if not blocks:
+            return
+
+        start = np.datetime64(to_db_datetime(start), "us").view(np.int64)
+        end = np.datetime64(to_db_datetime(end), "us").view(np.int64)
+
+        path = self.folder_path.joinpath(meta["filename"])
+
+        with open(path, mode="rb") as f:
+            for block_start, block_end, offset, size in blocks:
+                if block_end < start or block_start > end:
+                    continue
+
+                f.seek(offset)
+                data = f.read(size)
+                yield decode_ticks(data, "DB", DB_TZ)
+
+    def slice_records(
+        self,
+        records: np.ndarray,
+        start: datetime,
+        end: datetime
+    ) -> np.ndarray:
+        """
+        Get records within start and end (both included) as a view.
+        """
+        ix_start, ix_end = get_slice_index(records["datetime"], start, end)
+        return records[ix_start:ix_end]
+
+    def get_key(self, symbol: str, exchange: Exchange, interval: str) -> str:
+        """
+        Get key used as cache file name.
+        """
+        key = f"{symbol}.{exchange.value}_{interval}"
+        return re.sub(r"[^\w.-]", "_", key)
+
+    def load_meta(self, key: str) -> dict:
+        """"""
+        path = self.folder_path.joinpath(f"{key}.json")
+        if not path.exists():
+            return {}
+
+        with open(path, mode="r", encoding="UTF-8") as f:
+            meta = json.load(f)
+
+        # Meta without its data file is useless
+        if not self.folder_path.joinpath(meta["filename"]).exists():
+            return {}
+
+        return meta
+
+    def save_meta(self, key: str, meta: dict) -> None:
+        """
+        Replace meta file atomically, so that other processes never
+        read a half written one.
+        """
+        path = self.folder_path.joinpath(f"{key}.json")
+        temp_path = self.folder_path.joinpath(f"{key}.{time_ns()}.tmp")
+
+        with open(temp_path, mode="w", encoding="UTF-8") as f:
+            json.dump(meta, f, indent=4, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+    def remove_file(self, path: Path) -> None:
+        """
+        Remove file if it is not opened by others (on Windows).
+        """
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def to_db_datetime(dt: datetime) -> datetime:
+    """
+    Convert datetime to naive wall time of DB_TZ, naive datetime is
+    regarded as in DB_TZ already.
+    """
+    if dt.tzinfo:
+        return convert_tz(dt)
+    return dt
+
+
+def get_slice_index(
+    datetimes: np.ndarray,
+    start: datetime,
+    end: datetime
+) -> Tuple[int, int]:
+    """
+    Get index range of datetimes within start and end (both included).
+    """
+    ix_start = np.searchsorted(datetimes, np.datetime64(to_db_datetime(start)), "left")
+    ix_end = np.searchsorted(datetimes, np.datetime64(to_db_datetime(end)), "right")
+    return int(ix_start), int(ix_end)
+
+
+def frame_to_records(frame: BaseFrame, dtype: np.dtype) -> np.ndarray:
+    """
+    Convert columns of frame into fixed width records.
+    """
+    records = np.empty(len(frame), dtype=dtype)
+    records["datetime"] = frame.datetime
+
+    for name in dtype.names[1:]:
+        records[name] = frame.columns[name]
+
+    return records
+
+
+data_cache: DataCache = DataCache(database_manager)
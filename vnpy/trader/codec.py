@@ -0,0 +1,160 @@
+"""
+Compact binary format of tick data, which takes much less space than
+fixed width records of all tick fields.
+"""
+
+import json
+import struct
+import zlib
+from datetime import tzinfo
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .constant import Exchange
+from .frame import TickFrame, DATETIME_DTYPE
+
+
+MAGIC = b"VNTK"
+HEADER_STRUCT = struct.Struct("<4sI")
+
+# Prices are quantized to integers of at most this number of decimals
+MAX_SCALE = 8
+
+# Integer part of float64 is exact only within 2**53
+MAX_EXACT = 2 ** 53
+
+INT_DTYPES = (np.int8, np.int16, np.int32, np.int64)
+
+
+def encode_ticks(frame: TickFrame, level: int = 6) -> bytes:
+    """
+    Encode tick frame into bytes without losing any value.
+
+    * datetime is stored as delta from the previous tick
+    * float field is quantized to integer of decimal scale (e.g. price
+      3500.2 with pricetick 0.2 is stored as 35002 of scale 1), and then
+      stored as delta from the previous tick, so that price changes and
+      volume increases (cumulative volume) take only a byte or two
+    * field of all zero (e.g. unused depth levels) is omitted
+    * field which cannot be quantized exactly is stored as raw float
+
+    Deltas are stored with the narrowest integer type and the whole body
+    is compressed with zlib.
+    """
+    columns: List[Tuple[str, Optional[int], np.ndarray]] = []
+
+    datetimes = frame.datetime.astype(DATETIME_DTYPE).view(np.int64)
+    columns.append(("datetime", 0, delta_encode(datetimes)))
+
+    for name in TickFrame.float_fields:
+        values = np.asarray(frame.columns[name], dtype=np.float64)
+        if not values.any():
+            continue
+
+        scale = get_decimal_scale(values)
+        if scale is None:
+            columns.append((name, None, values))
+        else:
+            ints = np.round(values * 10 ** scale).astype(np.int64)
+            columns.append((name, scale, delta_encode(ints)))
+
+    header = {
+        "symbol": frame.symbol,
+        "exchange": frame.exchange.value,
+        "name": frame.consts.get("name", ""),
+        "count": len(frame),
+        "columns": [
+            [name, scale, array.dtype.str] for name, scale, array in columns
+        ]
+    }
+    header_data = json.dumps(header, ensure_ascii=False).encode("UTF-8")
+
+    body = b"".join(array.tobytes() for _, _, array in columns)
+
+    return b"".join([
+        HEADER_STRUCT.pack(MAGIC, len(header_data)),
+        header_data,
+        zlib.compress(body, level)
+    ])
+
+
+def decode_ticks(
+    data: bytes,
+    gateway_name: str = "DB",
+    tz: tzinfo = None
+) -> TickFrame:
+    """
+    Decode bytes created by encode_ticks into tick frame, fields omitted
+    are filled with zero.
+    """
+    magic, header_size = HEADER_STRUCT.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("不是有效的Tick压缩数据")
+
+    offset = HEADER_STRUCT.size
+    header = json.loads(data[offset: offset + header_size].decode("UTF-8"))
+    body = zlib.decompress(data[offset + header_size:])
+
+    count = header["count"]
+    arrays = {}
+    position = 0
+
+    for name, scale, dtype in header["columns"]:
+        dtype = np.dtype(dtype)
+        array = np.frombuffer(body, dtype=dtype, count=count, offset=position)
+        position += count * dtype.itemsize
+
+        if scale is None:
+            arrays[name] = array
+        else:
+            ints = np.cumsum(array, dtype=np.int64)
+            arrays[name] = ints / 10 ** scale
+
+    datetimes = arrays.pop("datetime").astype(np.int64).view(DATETIME_DTYPE)
+
+    return TickFrame(
+        gateway_name,
+        header["symbol"],
+        Exchange(header["exchange"]),
+        datetimes,
+        tz,
+        name=header["name"],
+        **arrays
+    )
+
+
+def get_decimal_scale(values: np.ndarray) -> Optional[int]:
+    """
+    Get the least number of decimals with which all values are
+    restored exactly from integers, None if not found.
+    """
+    for scale in range(MAX_SCALE + 1):
+        factor = 10 ** scale
+        ints = np.round(values * factor)
+
+        if not np.all(np.abs(ints) < MAX_EXACT):
+            return None
+
+        if np.array_equal(ints / factor, values):
+            return scale
+
+    return None
+
+
+def delta_encode(ints: np.ndarray) -> np.ndarray:
+    """
+    Get delta of every value from the previous one (the first one from
+    zero), stored with the narrowest integer type.
+    """
+    deltas = np.diff(ints, prepend=np.int64(0))
+    if not len(deltas):
+        return deltas.astype(np.int8)
+
+    low = deltas.min()
+    high = deltas.max()
+
+    for dtype in INT_DTYPES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return deltas.astype(dtype)
@@ -1,12 +1,17 @@
 from abc import ABC, abstractmethod
 from datetime import datetime
-from typing import List
+from itertools import islice
+from operator import attrgetter
+from typing import Any, Callable, Iterable, Iterator, List, Sequence
 from pytz import timezone
 from dataclasses import dataclass
 from importlib import import_module
 
+import numpy as np
+
 from .constant import Interval, Exchange
 from .object import BarData, TickData
+from .frame import BarFrame, TickFrame, DATETIME_DTYPE
 from .setting import SETTINGS
 
 
@@ -21,6 +26,159 @@ def convert_tz(dt: datetime) -> datetime:
     return dt.replace(tzinfo=None)
 
 
+# Column order of rows used for creating frames: datetime first and then
+# constant fields (only tick name) followed by float fields.
+BAR_ARRAY_FIELDS = ("datetime",) + BarFrame.float_fields
+TICK_ARRAY_FIELDS = ("datetime", "name") + TickFrame.float_fields
+
+# Column order of rows used for saving data in bulk without creating
+# model objects.
+BAR_FIELDS = ("symbol", "exchange", "interval") + BAR_ARRAY_FIELDS
+TICK_FIELDS = ("symbol", "exchange") + TICK_ARRAY_FIELDS
+
+_get_bar_values = attrgetter(*BarFrame.float_fields)
+_get_tick_values = attrgetter(*(("name",) + TickFrame.float_fields))
+
+
+def get_bar_rows(bars: Iterable[BarData]) -> List[tuple]:
+    """
+    Convert bars into rows of BAR_FIELDS with timezone adjusted.
+    """
+    return [
+        (bar.symbol, bar.exchange.value, bar.interval.value, convert_tz(bar.datetime))
+        + _get_bar_values(bar)
+        for bar in bars
+    ]
+
+
+def get_tick_rows(ticks: Iterable[TickData]) -> List[tuple]:
+    """
+    Convert ticks into rows of TICK_FIELDS with timezone adjusted.
+    """
+    return [
+        (tick.symbol, tick.exchange.value, convert_tz(tick.datetime))
+        + _get_tick_values(tick)
+        for tick in ticks
+    ]
+
+
+def iter_keyset(
+    query: Callable[[Any, int], Sequence[tuple]],
+    chunk_size: int
+) -> Iterator[Sequence[tuple]]:
+    """
+    Fetch rows chunk by chunk with keyset pagination.
+
+    Query is called with datetime of the last row fetched (None for the
+    first chunk) and chunk_size, and should return rows later than it
+    ordered by datetime, which is the first column.
+    """
+    last = None
+
+    while True:
+        rows = query(last, chunk_size)
+        if rows:
+            yield rows
+
+        if len(rows) < chunk_size:
+            return
+        last = rows[-1][0]
+
+
+def iter_batches(
+    data: Iterable,
+    batch_size: int,
+    key: Callable[[Any], Any] = None
+) -> Iterator[list]:
+    """
+    Split data from iterable into lists of at most batch_size, and also
+    when key of data changes.
+    """
+    iterator = iter(data)
+
+    if not key:
+        while True:
+            batch = list(islice(iterator, batch_size))
+            if not batch:
+                return
+            yield batch
+
+    batch = []
+    batch_key = None
+
+    for d in iterator:
+        k = key(d)
+
+        if batch and (k != batch_key or len(batch) >= batch_size):
+            yield batch
+            batch = []
+
+        batch.append(d)
+        batch_key = k
+
+    if batch:
+        yield batch
+
+
+def create_bar_frame(
+    symbol: str,
+    exchange: Exchange,
+    interval: Interval,
+    rows: Sequence[Sequence]
+) -> BarFrame:
+    """
+    Create bar frame from rows fetched from database, which are ordered
+    by BAR_ARRAY_FIELDS with datetime in DB_TZ.
+    """
+    columns = list(zip(*rows)) or [()] * len(BAR_ARRAY_FIELDS)
+
+    kwargs = {}
+    for name, column in zip(BarFrame.float_fields, columns[1:]):
+        kwargs[name] = np.array(column, dtype=np.float64)
+
+    return BarFrame(
+        "DB",
+        symbol,
+        exchange,
+        np.array(columns[0], dtype=DATETIME_DTYPE),
+        DB_TZ,
+        interval=interval,
+        **kwargs
+    )
+
+
+def create_tick_frame(
+    symbol: str,
+    exchange: Exchange,
+    rows: Sequence[Sequence]
+) -> TickFrame:
+    """
+    Create tick frame from rows fetched from database, which are ordered
+    by TICK_ARRAY_FIELDS with datetime in DB_TZ.
+    """
+    columns = list(zip(*rows)) or [()] * len(TICK_ARRAY_FIELDS)
+
+    # Null value of optional fields (e.g. bid_price_5) is loaded as 0
+    kwargs = {}
+    for name, column in zip(TickFrame.float_fields, columns[2:]):
+        kwargs[name] = np.nan_to_num(np.array(column, dtype=np.float64))
+
+    if rows:
+        name = rows[0][1]
+    else:
+        name = ""
+
+    return TickFrame(
+        "DB",
+        symbol,
+        exchange,
+        np.array(columns[0], dtype=DATETIME_DTYPE),
+        DB_TZ,
+        name=name,
+        **kwargs
+    )
+
+
 @dataclass
 class BarOverview:
     """
@@ -54,6 +212,53 @@ class BaseDatabase(ABC):
         """
         pass
 
+    def ingest_bar_data(
+        self,
+        bars: Iterable[BarData],
+        batch_size: int = 100_000,
+        callback: Callable[[int], None] = None
+    ) -> int:
+        """
+        Save large amount of bar data from iterable (e.g. generator) in
+        batches, so that memory used is bounded.
+
+        Bars are also split when symbol, exchange or interval changes.
+        Callback is called with count of bars saved after each batch for
+        showing progress.
+        """
+        count = 0
+        key = attrgetter("symbol", "exchange", "interval")
+
+        for batch in iter_batches(bars, batch_size, key):
+            self.save_bar_data(batch)
+
+            count += len(batch)
+            if callback:
+                callback(count)
+
+        return count
+
+    def ingest_tick_data(
+        self,
+        ticks: Iterable[TickData],
+        batch_size: int = 100_000,
+        callback: Callable[[int], None] = None
+    ) -> int:
+        """
+        Save large amount of tick data from iterable (e.g. generator) in
+        batches, so that memory used is bounded.
+        """
+        count = 0
+
+        for batch in iter_batches(ticks, batch_size):
+            self.save_tick_data(batch)
+
+            count += len(batch)
+            if callback:
+                callback(count)
+
+        return count
+
     @abstractmethod
     def load_bar_data(
         self,
@@ -81,6 +286,108 @@ class BaseDatabase(ABC):
         """
         pass
 
+    def load_bar_array(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime
+    ) -> BarFrame:
+        """
+        Load bar data from database into columnar frame.
+
+        Drivers should override this to fetch raw rows without creating
+        data object for each bar.
+        """
+        bars = self.load_bar_data(symbol, exchange, interval, start, end)
+        if not bars:
+            return create_bar_frame(symbol, exchange, interval, [])
+        return BarFrame.from_rows(bars)
+
+    def load_tick_array(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        start: datetime,
+        end: datetime
+    ) -> TickFrame:
+        """
+        Load tick data from database into columnar frame.
+
+        Drivers should override this to fetch raw rows without creating
+        data object for each tick.
+        """
+        ticks = self.load_tick_data(symbol, exchange, start, end)
+        if not ticks:
+            return create_tick_frame(symbol, exchange, [])
+        return TickFrame.from_rows(ticks)
+
+    def iter_bar_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime,
+        chunk_size: int = 100_000
+    ) -> Iterator[BarData]:
+        """
+        Iterate bar data from database, which is fetched chunk by chunk
+        so that memory used does not grow with range queried.
+
+        Drivers should override this (or iter_bar_array) to fetch data
+        with server-side cursor or keyset pagination.
+        """
+        yield from self.load_bar_data(symbol, exchange, interval, start, end)
+
+    def iter_tick_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        start: datetime,
+        end: datetime,
+        chunk_size: int = 100_000
+    ) -> Iterator[TickData]:
+        """
+        Iterate tick data from database, which is fetched chunk by chunk
+        so that memory used does not grow with range queried.
+        """
+        yield from self.load_tick_data(symbol, exchange, start, end)
+
+    def iter_bar_array(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime,
+        chunk_size: int = 100_000
+    ) -> Iterator[BarFrame]:
+        """
+        Iterate bar data from database as frames of at most chunk_size.
+        """
+        bars = self.iter_bar_data(symbol, exchange, interval, start, end, chunk_size)
+
+        for batch in iter_batches(bars, chunk_size):
+            yield BarFrame.from_rows(batch)
+
+    def iter_tick_array(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        start: datetime,
+        end: datetime,
+        chunk_size: int = 100_000
+    ) -> Iterator[TickFrame]:
+        """
+        Iterate tick data from database as frames of at most chunk_size.
+        """
+        ticks = self.iter_tick_data(symbol, exchange, start, end, chunk_size)
+
+        for batch in iter_batches(ticks, chunk_size):
+            yield TickFrame.from_rows(batch)
+
     @abstractmethod
     def delete_bar_data(
         self,
@@ -111,6 +418,17 @@ class BaseDatabase(ABC):
         """
         pass
 
+    def rebuild_overview(self) -> None:
+        """
+        Rebuild bar overview from all bar data in database.
+
+        Overview is updated incrementally when saving bar data, this can
+        be used for repairing it after data changed in other ways.
+
+        Not abstract, so that existing drivers still work without it.
+        """
+        raise NotImplementedError
+
 
 driver: str = SETTINGS["database.driver"]
 module_name: str = f"vnpy.database.{driver}"
@@ -0,0 +1,422 @@
+"""
+Columnar containers holding a whole series of tick or bar data.
+"""
+
+from datetime import datetime, tzinfo
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .constant import Exchange, Interval
+from .object import SlotData, SlotBarData, SlotTickData, get_vt_symbol
+
+try:
+    from multiprocessing.shared_memory import SharedMemory
+except ImportError:     # Python 3.7
+    SharedMemory = None
+
+
+DATETIME_DTYPE = "datetime64[us]"
+
+# Number of rows converted to Python objects at a time when iterating
+ITER_CHUNK_SIZE = 10_000
+
+# Shared memory opened by attach is kept until process exits, since
+# numpy arrays (and their views) on it must never outlive the mapping.
+SHARED_MEMORIES: Dict[str, "SharedMemory"] = {}
+
+SHARED_MEMORY_AVAILABLE: bool = SharedMemory is not None
+
+
+def get_localize(tz: tzinfo) -> Callable[[datetime], datetime]:
+    """
+    Get function which attaches timezone to naive datetime.
+    """
+    if tz is None:
+        return lambda dt: dt
+
+    # pytz timezones need localize to get correct utc offset
+    localize = getattr(tz, "localize", None)
+    if localize:
+        return localize
+
+    return lambda dt: dt.replace(tzinfo=tz)
+
+
+class BaseFrame:
+    """
+    Series of data of one contract, every float field is stored in a
+    NumPy column and datetime in a datetime64 column (wall time of tz).
+
+    Fields which never change in a series (e.g. interval of bar) are
+    stored only once on frame.
+
+    Indexing with int creates a compact row object on demand, and
+    slicing returns a new frame sharing the same columns.
+    """
+
+    row_class: type = SlotData
+    const_fields: Tuple[str, ...] = ()
+    float_fields: Tuple[str, ...] = ()
+
+    def __init__(
+        self,
+        gateway_name: str,
+        symbol: str,
+        exchange: Exchange,
+        datetime: np.ndarray,
+        tz: tzinfo = None,
+        **kwargs
+    ):
+        """
+        Columns of float fields are passed as keyword arguments, missing
+        ones are filled with zero.
+        """
+        self.gateway_name: str = gateway_name
+        self.symbol: str = symbol
+        self.exchange: Exchange = exchange
+        self.vt_symbol: str = get_vt_symbol(symbol, exchange)
+
+        self.datetime: np.ndarray = np.asarray(datetime, dtype=DATETIME_DTYPE)
+        self.tz: tzinfo = tz
+        self._localize: Callable[[datetime], datetime] = get_localize(tz)
+
+        self.consts: Dict[str, object] = {}
+        for name in self.const_fields:
+            self.consts[name] = kwargs.pop(name, None)
+
+        size = len(self.datetime)
+        self.columns: Dict[str, np.ndarray] = {}
+        for name in self.float_fields:
+            if name in kwargs:
+                column = np.asarray(kwargs.pop(name), dtype=np.float64)
+            else:
+                column = np.zeros(size)
+            self.columns[name] = column
+
+        if kwargs:
+            raise TypeError(f"未知的字段：{list(kwargs.keys())}")
+
+    @classmethod
+    def from_rows(cls, rows: Sequence) -> "BaseFrame":
+        """
+        Create frame from data objects (dataclass or slot version) of
+        the same contract.
+        """
+        first = rows[0]
+        tz = first.datetime.tzinfo
+        size = len(rows)
+
+        kwargs = {name: getattr(first, name) for name in cls.const_fields}
+
+        for name in cls.float_fields:
+            kwargs[name] = np.fromiter(
+                (getattr(row, name) for row in rows),
+                dtype=np.float64,
+                count=size
+            )
+
+        datetimes = np.array(
+            [row.datetime.replace(tzinfo=None) for row in rows],
+            dtype=DATETIME_DTYPE
+        )
+
+        return cls(
+            first.gateway_name,
+            first.symbol,
+            first.exchange,
+            datetimes,
+            tz,
+            **kwargs
+        )
+
+    def __len__(self) -> int:
+        """"""
+        return len(self.datetime)
+
+    def __getattr__(self, name: str) -> object:
+        """
+        Get column of float field (e.g. frame.close_price) or value
+        of constant field (e.g. frame.interval).
+        """
+        columns = self.__dict__.get("columns", {})
+        if name in columns:
+            return columns[name]
+
+        consts = self.__dict__.get("consts", {})
+        if name in consts:
+            return consts[name]
+
+        raise AttributeError(name)
+
+    def __getitem__(self, ix: Union[int, slice]) -> Union[SlotData, "BaseFrame"]:
+        """"""
+        if isinstance(ix, slice):
+            kwargs = dict(self.consts)
+            for name, column in self.columns.items():
+                kwargs[name] = column[ix]
+
+            return self.__class__(
+                self.gateway_name,
+                self.symbol,
+                self.exchange,
+                self.datetime[ix],
+                self.tz,
+                **kwargs
+            )
+
+        dt = self._localize(self.datetime[ix].item())
+        values = [column[ix].item() for column in self.columns.values()]
+        return self.create_row(dt, values)
+
+    def __iter__(self) -> Iterator[SlotData]:
+        """
+        Iterate over row objects, columns are converted to Python
+        objects chunk by chunk instead of row by row, so that memory
+        used does not grow with size of frame.
+        """
+        localize = self._localize
+
+        for i in range(0, len(self), ITER_CHUNK_SIZE):
+            ix = slice(i, i + ITER_CHUNK_SIZE)
+            datetimes = self.datetime[ix].tolist()
+            columns = [column[ix].tolist() for column in self.columns.values()]
+
+            for dt, *values in zip(datetimes, *columns):
+                yield self.create_row(localize(dt), values)
+
+    def create_row(self, dt: datetime, values: List[float]) -> SlotData:
+        """
+        Create row object, constant fields come before float fields
+        in constructor of row class.
+        """
+        return self.row_class(
+            self.gateway_name,
+            self.symbol,
+            self.exchange,
+            dt,
+            *self.consts.values(),
+            *values
+        )
+
+    def to_rows(self) -> List[SlotData]:
+        """"""
+        return list(self)
+
+
+class TickFrame(BaseFrame):
+    """
+    Tick data series stored in columns.
+    """
+
+    row_class: type = SlotTickData
+    const_fields: Tuple[str, ...] = ("name",)
+    float_fields: Tuple[str, ...] = (
+        "volume", "open_interest", "last_price", "last_volume",
+        "limit_up", "limit_down",
+        "open_price", "high_price", "low_price", "pre_close",
+        "bid_price_1", "bid_price_2", "bid_price_3", "bid_price_4", "bid_price_5",
+        "ask_price_1", "ask_price_2", "ask_price_3", "ask_price_4", "ask_price_5",
+        "bid_volume_1", "bid_volume_2", "bid_volume_3", "bid_volume_4", "bid_volume_5",
+        "ask_volume_1", "ask_volume_2", "ask_volume_3", "ask_volume_4", "ask_volume_5",
+    )
+
+    def __init__(
+        self,
+        gateway_name: str,
+        symbol: str,
+        exchange: Exchange,
+        datetime: np.ndarray,
+        tz: tzinfo = None,
+        name: str = "",
+        **kwargs
+    ):
+        """"""
+        super().__init__(
+            gateway_name, symbol, exchange, datetime, tz, name=name, **kwargs
+        )
+
+
+class BarFrame(BaseFrame):
+    """
+    Bar data series stored in columns.
+    """
+
+    row_class: type = SlotBarData
+    const_fields: Tuple[str, ...] = ("interval",)
+    float_fields: Tuple[str, ...] = (
+        "volume", "open_interest",
+        "open_price", "high_price", "low_price", "close_price",
+    )
+
+    def __init__(
+        self,
+        gateway_name: str,
+        symbol: str,
+        exchange: Exchange,
+        datetime: np.ndarray,
+        tz: tzinfo = None,
+        interval: Interval = None,
+        **kwargs
+    ):
+        """"""
+        super().__init__(
+            gateway_name, symbol, exchange, datetime, tz, interval=interval, **kwargs
+        )
+
+
+class FrameChain:
+    """
+    Continuous frames chained as one series without concatenating their
+    columns, e.g. history data loaded range by range.
+    """
+
+    def __init__(self, frames: Sequence[BaseFrame] = ()):
+        """"""
+        self.frames: List[BaseFrame] = list(frames)
+
+    def append(self, frame: BaseFrame) -> None:
+        """"""
+        self.frames.append(frame)
+
+    def clear(self) -> None:
+        """"""
+        self.frames.clear()
+
+    def __len__(self) -> int:
+        """"""
+        return sum(len(frame) for frame in self.frames)
+
+    def __iter__(self) -> Iterator[SlotData]:
+        """"""
+        for frame in self.frames:
+            yield from frame
+
+
+class FrameStream:
+    """
+    Frames produced by loader one at a time when iterated, e.g. history
+    data read chunk by chunk from cache or database, so that memory used
+    does not grow with the range of data.
+
+    Loader is called again every time the stream is iterated. There is
+    no __len__, which would load all frames once more just for counting,
+    size is known only after the stream is iterated completely.
+    """
+
+    def __init__(self, loader: Callable[[], Iterable[BaseFrame]]):
+        """"""
+        self.loader: Callable[[], Iterable[BaseFrame]] = loader
+        self.size: Optional[int] = None
+
+    def __iter__(self) -> Iterator[SlotData]:
+        """"""
+        size = 0
+
+        for frame in self.loader():
+            size += len(frame)
+            yield from frame
+
+        self.size = size
+
+
+class SharedFrame:
+    """
+    Columns of a frame copied into shared memory, so that other
+    processes can read them without loading or copying data.
+
+    The object is pickled with only the name of shared memory and
+    frame info, call attach in other process to get a read-only frame.
+    Creator process must call close after all other processes finished,
+    and should not use frames attached by itself afterwards.
+    """
+
+    def __init__(self, frame: BaseFrame):
+        """"""
+        self.frame_class: type = frame.__class__
+        self.gateway_name: str = frame.gateway_name
+        self.symbol: str = frame.symbol
+        self.exchange: Exchange = frame.exchange
+        self.tz: tzinfo = frame.tz
+        self.consts: Dict[str, object] = dict(frame.consts)
+        self.size: int = len(frame)
+
+        # Datetime column first, then float columns, each 8 bytes per row
+        columns = [frame.datetime] + list(frame.columns.values())
+        nbytes = max(self.size * 8 * len(columns), 1)
+
+        if not SHARED_MEMORY_AVAILABLE:
+            raise RuntimeError("当前Python版本不支持共享内存，需要3.8及以上版本")
+
+        self.shm: SharedMemory = SharedMemory(create=True, size=nbytes)
+        self.name: str = self.shm.name
+
+        for ix, column in enumerate(columns):
+            array = np.ndarray(
+                self.size,
+                dtype=column.dtype,
+                buffer=self.shm.buf,
+                offset=ix * self.size * 8
+            )
+            array[:] = column
+
+    def __getstate__(self) -> dict:
+        """
+        Shared memory object itself is not pickled.
+        """
+        state = dict(self.__dict__)
+        state["shm"] = None
+        return state
+
+    def attach(self) -> BaseFrame:
+        """
+        Create read-only frame on shared memory.
+        """
+        if self.name not in SHARED_MEMORIES:
+            SHARED_MEMORIES[self.name] = self.shm or open_shared_memory(self.name)
+        shm = SHARED_MEMORIES[self.name]
+
+        def get_column(ix: int, dtype: str) -> np.ndarray:
+            array = np.ndarray(
+                self.size,
+                dtype=dtype,
+                buffer=shm.buf,
+                offset=ix * self.size * 8
+            )
+            array.flags.writeable = False
+            return array
+
+        columns = {
+            name: get_column(ix + 1, np.float64)
+            for ix, name in enumerate(self.frame_class.float_fields)
+        }
+
+        return self.frame_class(
+            self.gateway_name,
+            self.symbol,
+            self.exchange,
+            get_column(0, DATETIME_DTYPE),
+            self.tz,
+            **self.consts,
+            **columns
+        )
+
+    def close(self) -> None:
+        """
+        Release shared memory, called in creator process.
+        """
+        SHARED_MEMORIES.pop(self.name, None)
+
+        self.shm.close()
+        self.shm.unlink()
+
+
+def open_shared_memory(name: str) -> "SharedMemory":
+    """
+    Open existing shared memory without registering it to resource
+    tracker, which would otherwise unlink it when this process exits.
+    """
+    try:
+        return SharedMemory(name=name, track=False)
+    except TypeError:
+        return SharedMemory(name=name)
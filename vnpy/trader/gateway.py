@@ -90,45 +90,47 @@ class BaseGateway(ABC):
         event = Event(type, data)
         self.event_engine.put(event)
 
+    def on_events(self, types: Sequence[str], data: Any = None) -> None:
+        """
+        Push the same data under several event types at once.
+        """
+        events = [Event(type, data) for type in types]
+        self.event_engine.put_group(events)
+
     def on_tick(self, tick: TickData) -> None:
         """
         Tick event push.
         Tick event of a specific vt_symbol is also pushed.
         """
-        self.on_event(EVENT_TICK, tick)
-        self.on_event(EVENT_TICK + tick.vt_symbol, tick)
+        self.on_events((EVENT_TICK, EVENT_TICK + tick.vt_symbol), tick)
 
     def on_trade(self, trade: TradeData) -> None:
         """
         Trade event push.
         Trade event of a specific vt_symbol is also pushed.
         """
-        self.on_event(EVENT_TRADE, trade)
-        self.on_event(EVENT_TRADE + trade.vt_symbol, trade)
+        self.on_events((EVENT_TRADE, EVENT_TRADE + trade.vt_symbol), trade)
 
     def on_order(self, order: OrderData) -> None:
         """
         Order event push.
         Order event of a specific vt_orderid is also pushed.
         """
-        self.on_event(EVENT_ORDER, order)
-        self.on_event(EVENT_ORDER + order.vt_orderid, order)
+        self.on_events((EVENT_ORDER, EVENT_ORDER + order.vt_orderid), order)
 
     def on_position(self, position: PositionData) -> None:
         """
         Position event push.
         Position event of a specific vt_symbol is also pushed.
         """
-        self.on_event(EVENT_POSITION, position)
-        self.on_event(EVENT_POSITION + position.vt_symbol, position)
+        self.on_events((EVENT_POSITION, EVENT_POSITION + position.vt_symbol), position)
 
     def on_account(self, account: AccountData) -> None:
         """
         Account event push.
         Account event of a specific vt_accountid is also pushed.
         """
-        self.on_event(EVENT_ACCOUNT, account)
-        self.on_event(EVENT_ACCOUNT + account.vt_accountid, account)
+        self.on_events((EVENT_ACCOUNT, EVENT_ACCOUNT + account.vt_accountid), account)
 
     def on_log(self, log: LogData) -> None:
         """
@@ -2,14 +2,32 @@
 Basic data structure used for general trading function in VN Trader.
 """
 
+import sys
 from dataclasses import dataclass
 from datetime import datetime
 from logging import INFO
+from typing import Dict, Tuple
 
 from .constant import Direction, Exchange, Interval, Offset, Status, Product, OptionType, OrderType
 
 ACTIVE_STATUSES = set([Status.SUBMITTING, Status.NOTTRADED, Status.PARTTRADED])
 
+VT_SYMBOLS: Dict[Tuple[str, Exchange], str] = {}
+
+
+def get_vt_symbol(symbol: str, exchange: Exchange) -> str:
+    """
+    Get interned vt_symbol string, which is shared by all data objects
+    of the same contract instead of being formatted for each of them.
+    """
+    vt_symbol = VT_SYMBOLS.get((symbol, exchange), None)
+
+    if not vt_symbol:
+        vt_symbol = sys.intern(f"{symbol}.{exchange.value}")
+        VT_SYMBOLS[(symbol, exchange)] = vt_symbol
+
+    return vt_symbol
+
 
 @dataclass
 class BaseData:
@@ -99,6 +117,178 @@ class BarData(BaseData):
         self.vt_symbol = f"{self.symbol}.{self.exchange.value}"
 
 
+class SlotData:
+    """
+    Base class of compact data objects which store fields in __slots__
+    instead of a per-instance dict.
+
+    __dict__ is still provided (built on demand) for code which reads
+    all fields of data object, e.g. database drivers.
+    """
+
+    __slots__ = ()
+
+    @property
+    def __dict__(self) -> dict:
+        """"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __eq__(self, other: object) -> bool:
+        """"""
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self.__dict__ == other.__dict__
+
+    def __repr__(self) -> str:
+        """"""
+        fields = ", ".join(f"{k}={v!r}" for k, v in self.__dict__.items())
+        return f"{self.__class__.__name__}({fields})"
+
+
+class SlotTickData(SlotData):
+    """
+    Compact version of TickData with the same fields and constructor.
+    """
+
+    __slots__ = (
+        "gateway_name", "symbol", "exchange", "datetime", "name",
+        "volume", "open_interest", "last_price", "last_volume",
+        "limit_up", "limit_down",
+        "open_price", "high_price", "low_price", "pre_close",
+        "bid_price_1", "bid_price_2", "bid_price_3", "bid_price_4", "bid_price_5",
+        "ask_price_1", "ask_price_2", "ask_price_3", "ask_price_4", "ask_price_5",
+        "bid_volume_1", "bid_volume_2", "bid_volume_3", "bid_volume_4", "bid_volume_5",
+        "ask_volume_1", "ask_volume_2", "ask_volume_3", "ask_volume_4", "ask_volume_5",
+        "vt_symbol"
+    )
+
+    def __init__(
+        self,
+        gateway_name: str,
+        symbol: str,
+        exchange: Exchange,
+        datetime: datetime,
+        name: str = "",
+        volume: float = 0,
+        open_interest: float = 0,
+        last_price: float = 0,
+        last_volume: float = 0,
+        limit_up: float = 0,
+        limit_down: float = 0,
+        open_price: float = 0,
+        high_price: float = 0,
+        low_price: float = 0,
+        pre_close: float = 0,
+        bid_price_1: float = 0,
+        bid_price_2: float = 0,
+        bid_price_3: float = 0,
+        bid_price_4: float = 0,
+        bid_price_5: float = 0,
+        ask_price_1: float = 0,
+        ask_price_2: float = 0,
+        ask_price_3: float = 0,
+        ask_price_4: float = 0,
+        ask_price_5: float = 0,
+        bid_volume_1: float = 0,
+        bid_volume_2: float = 0,
+        bid_volume_3: float = 0,
+        bid_volume_4: float = 0,
+        bid_volume_5: float = 0,
+        ask_volume_1: float = 0,
+        ask_volume_2: float = 0,
+        ask_volume_3: float = 0,
+        ask_volume_4: float = 0,
+        ask_volume_5: float = 0
+    ):
+        """"""
+        self.gateway_name = gateway_name
+        self.symbol = symbol
+        self.exchange = exchange
+        self.datetime = datetime
+
+        self.name = name
+        self.volume = volume
+        self.open_interest = open_interest
+        self.last_price = last_price
+        self.last_volume = last_volume
+        self.limit_up = limit_up
+        self.limit_down = limit_down
+
+        self.open_price = open_price
+        self.high_price = high_price
+        self.low_price = low_price
+        self.pre_close = pre_close
+
+        self.bid_price_1 = bid_price_1
+        self.bid_price_2 = bid_price_2
+        self.bid_price_3 = bid_price_3
+        self.bid_price_4 = bid_price_4
+        self.bid_price_5 = bid_price_5
+
+        self.ask_price_1 = ask_price_1
+        self.ask_price_2 = ask_price_2
+        self.ask_price_3 = ask_price_3
+        self.ask_price_4 = ask_price_4
+        self.ask_price_5 = ask_price_5
+
+        self.bid_volume_1 = bid_volume_1
+        self.bid_volume_2 = bid_volume_2
+        self.bid_volume_3 = bid_volume_3
+        self.bid_volume_4 = bid_volume_4
+        self.bid_volume_5 = bid_volume_5
+
+        self.ask_volume_1 = ask_volume_1
+        self.ask_volume_2 = ask_volume_2
+        self.ask_volume_3 = ask_volume_3
+        self.ask_volume_4 = ask_volume_4
+        self.ask_volume_5 = ask_volume_5
+
+        self.vt_symbol = get_vt_symbol(symbol, exchange)
+
+
+class SlotBarData(SlotData):
+    """
+    Compact version of BarData with the same fields and constructor.
+    """
+
+    __slots__ = (
+        "gateway_name", "symbol", "exchange", "datetime", "interval",
+        "volume", "open_interest",
+        "open_price", "high_price", "low_price", "close_price",
+        "vt_symbol"
+    )
+
+    def __init__(
+        self,
+        gateway_name: str,
+        symbol: str,
+        exchange: Exchange,
+        datetime: datetime,
+        interval: Interval = None,
+        volume: float = 0,
+        open_interest: float = 0,
+        open_price: float = 0,
+        high_price: float = 0,
+        low_price: float = 0,
+        close_price: float = 0
+    ):
+        """"""
+        self.gateway_name = gateway_name
+        self.symbol = symbol
+        self.exchange = exchange
+        self.datetime = datetime
+
+        self.interval = interval
+        self.volume = volume
+        self.open_interest = open_interest
+        self.open_price = open_price
+        self.high_price = high_price
+        self.low_price = low_price
+        self.close_price = close_price
+
+        self.vt_symbol = get_vt_symbol(symbol, exchange)
+
+
 @dataclass
 class OrderData(BaseData):
     """
@@ -172,7 +362,7 @@ class TradeData(BaseData):
     def to_dict(self):
         obj_dict = {'symbol': self.symbol, 'exchange': self.exchange, 'orderid': self.orderid,
                     'tradeid': self.tradeid,
-                    'offset': self.offset, 'price': self.price, 'volume': self.volume, 'time': self.time,
+                    'offset': self.offset, 'price': self.price, 'volume': self.volume, 'time': self.datetime,
                     'vt_symbol': self.vt_symbol, 'direction': Direction.int(self.direction),
                     'vt_orderid': self.vt_orderid,
                     'vt_trade_id': self.vt_tradeid}
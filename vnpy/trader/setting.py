@@ -36,6 +36,11 @@ SETTINGS: Dict[str, Any] = {
     "database.password": "",
     "database.authentication_source": "admin",  # for mongodb
 
+    "cta.init_workers": 8,                      # strategies inited at the same time
+
+    "recorder.flush_size": 1000,                # data saved when buffer is full
+    "recorder.flush_interval": 1,               # or every this number of seconds
+
     "genus.parent_host": "",
     "genus.parent_port": "",
     "genus.parent_sender": "",
@@ -0,0 +1,300 @@
+"""
+Vectorized daily mark-to-market result and statistics of backtesting,
+shared by backtesting engines of different apps.
+"""
+
+from datetime import date
+from typing import Callable, Dict, Iterable, List, Tuple
+
+import numpy as np
+from pandas import DataFrame
+
+from .constant import Direction
+from .object import TradeData
+
+
+# Daily fields which are summed up for result of several contracts
+SUM_FIELDS: Tuple[str, ...] = (
+    "trade_count", "turnover", "commission", "slippage",
+    "trading_pnl", "holding_pnl", "total_pnl", "net_pnl",
+)
+
+STATISTICS_FIELDS: Tuple[str, ...] = (
+    "start_date", "end_date", "total_days", "profit_days", "loss_days",
+    "capital", "end_balance", "max_drawdown", "max_ddpercent",
+    "max_drawdown_duration", "total_net_pnl", "daily_net_pnl",
+    "total_commission", "daily_commission", "total_slippage",
+    "daily_slippage", "total_turnover", "daily_turnover",
+    "total_trade_count", "daily_trade_count", "total_return",
+    "annual_return", "daily_return", "return_std", "sharpe_ratio",
+    "return_drawdown_ratio",
+)
+
+
+def get_trade_arrays(
+    trades: Iterable[TradeData],
+    dates: List[date]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Convert trades into arrays of day index (in dates), position change
+    and trade price.
+    """
+    trades = list(trades)
+    count = len(trades)
+    day_map = {d: ix for ix, d in enumerate(dates)}
+
+    days = np.fromiter(
+        (day_map[trade.datetime.date()] for trade in trades),
+        dtype=np.int64,
+        count=count
+    )
+    changes = np.fromiter(
+        (
+            trade.volume if trade.direction == Direction.LONG else -trade.volume
+            for trade in trades
+        ),
+        dtype=np.float64,
+        count=count
+    )
+    prices = np.fromiter(
+        (trade.price for trade in trades),
+        dtype=np.float64,
+        count=count
+    )
+
+    return days, changes, prices
+
+
+def calculate_daily_pnl(
+    close_prices: np.ndarray,
+    trade_days: np.ndarray,
+    trade_changes: np.ndarray,
+    trade_prices: np.ndarray,
+    size: float,
+    rate: float,
+    slippage: float,
+    inverse: bool = False,
+    trade_values: np.ndarray = None
+) -> Dict[str, np.ndarray]:
+    """
+    Calculate daily result of one contract, which is the same as
+    calculate_pnl of DailyResult called day by day.
+
+    Trades are given by day index, position change (negative for short)
+    and price. Trade value used for turnover is trade price by default.
+    """
+    day_count = len(close_prices)
+    volumes = np.abs(trade_changes)
+    trade_closes = close_prices[trade_days]
+
+    if trade_values is None:
+        trade_values = trade_prices
+
+    def sum_by_day(values: np.ndarray) -> np.ndarray:
+        return np.bincount(trade_days, weights=values, minlength=day_count)
+
+    end_pos = np.cumsum(sum_by_day(trade_changes))
+    start_pos = np.zeros(day_count)
+    start_pos[1:] = end_pos[:-1]
+
+    # Value 1 is used on the first day to avoid zero division error
+    pre_close = np.ones(day_count)
+    pre_close[1:] = close_prices[:-1]
+    pre_close[pre_close == 0] = 1
+
+    if not inverse:
+        holding_pnl = start_pos * (close_prices - pre_close) * size
+        trading_pnl = trade_changes * (trade_closes - trade_prices) * size
+        turnover = volumes * size * trade_values
+        slippage_cost = volumes * size * slippage
+    else:
+        holding_pnl = start_pos * (1 / pre_close - 1 / close_prices) * size
+        trading_pnl = trade_changes * (1 / trade_prices - 1 / trade_closes) * size
+        turnover = volumes * size / trade_values
+        slippage_cost = volumes * size * slippage / (trade_prices ** 2)
+
+    turnover = sum_by_day(turnover)
+    trading_pnl = sum_by_day(trading_pnl)
+    commission = turnover * rate
+    slippage_cost = sum_by_day(slippage_cost)
+
+    total_pnl = trading_pnl + holding_pnl
+    net_pnl = total_pnl - commission - slippage_cost
+
+    return {
+        "close_price": close_prices,
+        "pre_close": pre_close,
+        "trade_count": np.bincount(trade_days, minlength=day_count),
+        "start_pos": start_pos,
+        "end_pos": end_pos,
+        "turnover": turnover,
+        "commission": commission,
+        "slippage": slippage_cost,
+        "trading_pnl": trading_pnl,
+        "holding_pnl": holding_pnl,
+        "total_pnl": total_pnl,
+        "net_pnl": net_pnl,
+    }
+
+
+def create_daily_df(dates: List[date], results: Dict[str, np.ndarray]) -> DataFrame:
+    """"""
+    df = DataFrame(results, index=dates)
+    df.index.name = "date"
+    return df
+
+
+def calculate_statistics(
+    df: DataFrame,
+    capital: float,
+    risk_free: float = 0
+) -> dict:
+    """
+    Calculate statistics from daily result, balance related columns are
+    added into df for showing chart.
+    """
+    # Set all statistics to 0 if no trade.
+    if df is None:
+        statistics = dict.fromkeys(STATISTICS_FIELDS, 0)
+        statistics["start_date"] = ""
+        statistics["end_date"] = ""
+        statistics["capital"] = capital
+        return statistics
+
+    # Calculate balance related time series data
+    net_pnl = df["net_pnl"].to_numpy(dtype=np.float64)
+    balance = np.cumsum(net_pnl) + capital
+
+    # When balance falls below 0, set daily return to 0
+    daily_return = np.zeros(len(balance))
+    x = balance[1:] / balance[:-1]
+    positive = x > 0
+    daily_return[1:][positive] = np.log(x[positive])
+
+    highlevel = np.maximum.accumulate(balance)
+    drawdown = balance - highlevel
+    ddpercent = drawdown / highlevel * 100
+
+    df["balance"] = balance
+    df["return"] = daily_return
+    df["highlevel"] = highlevel
+    df["drawdown"] = drawdown
+    df["ddpercent"] = ddpercent
+
+    # Calculate statistics value
+    dates = df.index
+    total_days = len(df)
+
+    end_ix = int(np.argmin(drawdown))
+    max_drawdown_end = dates[end_ix]
+
+    if isinstance(max_drawdown_end, date):
+        max_drawdown_start = dates[int(np.argmax(balance[:end_ix + 1]))]
+        max_drawdown_duration = (max_drawdown_end - max_drawdown_start).days
+    else:
+        max_drawdown_duration = 0
+
+    end_balance = balance[-1]
+    max_drawdown = drawdown[end_ix]
+    max_ddpercent = ddpercent.min()
+
+    total_net_pnl = net_pnl.sum()
+    total_commission = df["commission"].to_numpy().sum()
+    total_slippage = df["slippage"].to_numpy().sum()
+    total_turnover = df["turnover"].to_numpy().sum()
+    total_trade_count = df["trade_count"].to_numpy().sum()
+
+    total_return = (end_balance / capital - 1) * 100
+    mean_return = daily_return.mean() * 100
+
+    if total_days > 1:
+        return_std = daily_return.std(ddof=1) * 100
+    else:
+        return_std = 0
+
+    if return_std:
+        daily_risk_free = risk_free / np.sqrt(240)
+        sharpe_ratio = (mean_return - daily_risk_free) / return_std * np.sqrt(240)
+    else:
+        sharpe_ratio = 0
+
+    if max_ddpercent:
+        return_drawdown_ratio = -total_return / max_ddpercent
+    else:
+        return_drawdown_ratio = 0
+
+    statistics = {
+        "start_date": dates[0],
+        "end_date": dates[-1],
+        "total_days": total_days,
+        "profit_days": int((net_pnl > 0).sum()),
+        "loss_days": int((net_pnl < 0).sum()),
+        "capital": capital,
+        "end_balance": end_balance,
+        "max_drawdown": max_drawdown,
+        "max_ddpercent": max_ddpercent,
+        "max_drawdown_duration": max_drawdown_duration,
+        "total_net_pnl": total_net_pnl,
+        "daily_net_pnl": total_net_pnl / total_days,
+        "total_commission": total_commission,
+        "daily_commission": total_commission / total_days,
+        "total_slippage": total_slippage,
+        "daily_slippage": total_slippage / total_days,
+        "total_turnover": total_turnover,
+        "daily_turnover": total_turnover / total_days,
+        "total_trade_count": total_trade_count,
+        "daily_trade_count": total_trade_count / total_days,
+        "total_return": total_return,
+        "annual_return": total_return / total_days * 240,
+        "daily_return": mean_return,
+        "return_std": return_std,
+        "sharpe_ratio": sharpe_ratio,
+        "return_drawdown_ratio": return_drawdown_ratio,
+    }
+
+    # Filter potential error infinite value
+    for key, value in statistics.items():
+        if isinstance(value, (float, np.floating)):
+            statistics[key] = np.nan_to_num(value, posinf=0, neginf=0)
+
+    return statistics
+
+
+def output_statistics(statistics: dict, output: Callable[[str], None]) -> None:
+    """"""
+    s = statistics
+
+    output("-" * 30)
+    output(f"首个交易日：\t{s['start_date']}")
+    output(f"最后交易日：\t{s['end_date']}")
+
+    output(f"总交易日：\t{s['total_days']}")
+    output(f"盈利交易日：\t{s['profit_days']}")
+    output(f"亏损交易日：\t{s['loss_days']}")
+
+    output(f"起始资金：\t{s['capital']:,.2f}")
+    output(f"结束资金：\t{s['end_balance']:,.2f}")
+
+    output(f"总收益率：\t{s['total_return']:,.2f}%")
+    output(f"年化收益：\t{s['annual_return']:,.2f}%")
+    output(f"最大回撤: \t{s['max_drawdown']:,.2f}")
+    output(f"百分比最大回撤: {s['max_ddpercent']:,.2f}%")
+    output(f"最长回撤天数: \t{s['max_drawdown_duration']}")
+
+    output(f"总盈亏：\t{s['total_net_pnl']:,.2f}")
+    output(f"总手续费：\t{s['total_commission']:,.2f}")
+    output(f"总滑点：\t{s['total_slippage']:,.2f}")
+    output(f"总成交金额：\t{s['total_turnover']:,.2f}")
+    output(f"总成交笔数：\t{s['total_trade_count']}")
+
+    output(f"日均盈亏：\t{s['daily_net_pnl']:,.2f}")
+    output(f"日均手续费：\t{s['daily_commission']:,.2f}")
+    output(f"日均滑点：\t{s['daily_slippage']:,.2f}")
+    output(f"日均成交金额：\t{s['daily_turnover']:,.2f}")
+    output(f"日均成交笔数：\t{s['daily_trade_count']}")
+
+    output(f"日均收益率：\t{s['daily_return']:,.2f}%")
+    output(f"收益标准差：\t{s['return_std']:,.2f}%")
+    output(f"Sharpe Ratio：\t{s['sharpe_ratio']:,.2f}")
+    output(f"收益回撤比：\t{s['return_drawdown_ratio']:,.2f}")
+
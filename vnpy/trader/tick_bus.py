@@ -0,0 +1,559 @@
+"""
+Shared memory bus of tick data for processes on the same host.
+
+Ticks of each contract are kept in a ring of fixed layout records in its
+own shared memory, and a directory shared memory lists all contracts.
+Readers poll rings directly without any syscall or lock.
+"""
+
+import os
+import struct
+import sys
+from datetime import datetime, timedelta
+from operator import attrgetter
+from time import time_ns
+from typing import Dict, List, Optional, Set, Tuple
+
+from vnpy.event import Event, EventEngine
+
+from .constant import Exchange, Product
+from .database import DB_TZ, convert_tz
+from .engine import BaseEngine, MainEngine
+from .event import EVENT_TICK
+from .frame import TickFrame, open_shared_memory, SHARED_MEMORY_AVAILABLE
+from .object import ContractData, TickData
+
+try:
+    from multiprocessing import resource_tracker
+    from multiprocessing.shared_memory import SharedMemory
+except ImportError:     # Python 3.7
+    resource_tracker = None
+    SharedMemory = None
+
+
+DEFAULT_BUS_NAME = "vnpy_tick_bus"
+
+# Number of latest ticks kept for each contract
+DEFAULT_CAPACITY = 1024
+DEFAULT_MAX_SYMBOLS = 4096
+
+MAGIC = b"VNTB"
+VERSION = 2
+
+# Directory: header (magic, version, session, active, pid of writer,
+# capacity, max_symbols and count), and then vt_symbol, name, product,
+# size, pricetick and min_volume of every contract
+HEADER_STRUCT = struct.Struct("<4sIqqqqqq")
+SYMBOL_SIZE = 48
+NAME_SIZE = 80
+PRODUCT_SIZE = 16
+ENTRY_STRUCT = struct.Struct(f"<{SYMBOL_SIZE}s{NAME_SIZE}s{PRODUCT_SIZE}sddd")
+
+# Ring: number of ticks written, and then slots of sequence and record
+COUNT_STRUCT = struct.Struct("<q")
+SEQ_STRUCT = struct.Struct("<q")
+RECORD_STRUCT = struct.Struct("<q" + "d" * len(TickFrame.float_fields))
+
+RING_OFFSET = 64
+SLOT_SIZE = SEQ_STRUCT.size + RECORD_STRUCT.size
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+get_values = attrgetter(*TickFrame.float_fields)
+
+# Names of shared memory created by writer in this process
+CREATED_NAMES: Set[str] = set()
+
+# Used for checking whether writer process is alive on Windows
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+STILL_ACTIVE = 259
+
+
+class TickRing:
+    """
+    Ring of fixed layout tick records of one contract.
+
+    Every slot is protected by its sequence number (seqlock): 2n+1 when
+    the n-th tick is being written into it and 2n+2 after finished, so
+    that reader finds out both half written and overwritten records
+    without locking.
+    """
+
+    def __init__(self, shm: "SharedMemory", capacity: int):
+        """"""
+        self.shm: SharedMemory = shm
+        self.buf: memoryview = shm.buf
+        self.capacity: int = capacity
+
+    @property
+    def count(self) -> int:
+        """
+        Number of ticks written since created.
+        """
+        return COUNT_STRUCT.unpack_from(self.buf, 0)[0]
+
+    def write(self, tick: TickData) -> None:
+        """"""
+        n = self.count
+        offset = RING_OFFSET + (n % self.capacity) * SLOT_SIZE
+
+        SEQ_STRUCT.pack_into(self.buf, offset, 2 * n + 1)
+        RECORD_STRUCT.pack_into(
+            self.buf,
+            offset + SEQ_STRUCT.size,
+            (convert_tz(tick.datetime) - EPOCH) // MICROSECOND,
+            *get_values(tick)
+        )
+        SEQ_STRUCT.pack_into(self.buf, offset, 2 * n + 2)
+
+        COUNT_STRUCT.pack_into(self.buf, 0, n + 1)
+
+    def read(self, n: int) -> Optional[tuple]:
+        """
+        Get record of the n-th tick (datetime microseconds and float
+        fields), None if it is overwritten already.
+        """
+        offset = RING_OFFSET + (n % self.capacity) * SLOT_SIZE
+        seq = 2 * n + 2
+
+        if SEQ_STRUCT.unpack_from(self.buf, offset)[0] != seq:
+            return None
+
+        record = RECORD_STRUCT.unpack_from(self.buf, offset + SEQ_STRUCT.size)
+
+        if SEQ_STRUCT.unpack_from(self.buf, offset)[0] != seq:
+            return None
+
+        return record
+
+    def close(self) -> None:
+        """"""
+        self.buf = None
+        self.shm.close()
+
+
+class TickBus:
+    """
+    Writer of tick bus, only one for each bus name on the host.
+    """
+
+    def __init__(
+        self,
+        name: str = DEFAULT_BUS_NAME,
+        capacity: int = DEFAULT_CAPACITY,
+        max_symbols: int = DEFAULT_MAX_SYMBOLS
+    ):
+        """
+        RuntimeError is raised if bus of the name is used by another
+        writer still running.
+        """
+        if not SHARED_MEMORY_AVAILABLE:
+            raise RuntimeError("当前Python版本不支持共享内存，需要3.8及以上版本")
+
+        self.name: str = name
+        self.capacity: int = capacity
+        self.max_symbols: int = max_symbols
+
+        size = HEADER_STRUCT.size + ENTRY_STRUCT.size * max_symbols
+        self.directory: SharedMemory = create_directory(name, size)
+
+        self.session: int = time_ns()
+        self.rings: Dict[str, TickRing] = {}
+
+        self.write_header(True)
+
+    def write_header(self, active: bool) -> None:
+        """"""
+        HEADER_STRUCT.pack_into(
+            self.directory.buf,
+            0,
+            MAGIC,
+            VERSION,
+            self.session,
+            int(active),
+            os.getpid(),
+            self.capacity,
+            self.max_symbols,
+            len(self.rings)
+        )
+
+    def put(self, tick: TickData, contract: ContractData = None) -> None:
+        """
+        Contract is only used when the first tick of it is put, to be
+        listed in directory for readers.
+        """
+        ring = self.rings.get(tick.vt_symbol, None)
+
+        if not ring:
+            ring = self.add_ring(tick, contract)
+            if not ring:
+                return
+
+        ring.write(tick)
+
+    def add_ring(self, tick: TickData, contract: ContractData = None) -> Optional[TickRing]:
+        """
+        Create ring of new contract, which is added into directory after
+        created so that readers never find it before ready.
+        """
+        index = len(self.rings)
+        vt_symbol = tick.vt_symbol.encode("UTF-8")
+
+        if index >= self.max_symbols or len(vt_symbol) > SYMBOL_SIZE:
+            return None
+
+        size = RING_OFFSET + SLOT_SIZE * self.capacity
+        shm = create_shared_memory(get_ring_name(self.name, index), size)
+        ring = TickRing(shm, self.capacity)
+
+        # Product is left empty if contract not known
+        if contract:
+            contract_values = (
+                contract.product.value.encode("UTF-8"),
+                contract.size,
+                contract.pricetick,
+                contract.min_volume
+            )
+        else:
+            contract_values = (b"", 0, 0, 0)
+
+        ENTRY_STRUCT.pack_into(
+            self.directory.buf,
+            HEADER_STRUCT.size + ENTRY_STRUCT.size * index,
+            vt_symbol,
+            (tick.name or "").encode("UTF-8")[:NAME_SIZE],
+            *contract_values
+        )
+
+        self.rings[tick.vt_symbol] = ring
+        self.write_header(True)
+
+        return ring
+
+    def close(self) -> None:
+        """
+        Mark bus inactive for readers, and then release shared memory.
+        """
+        self.write_header(False)
+
+        for ring in self.rings.values():
+            CREATED_NAMES.discard(ring.shm.name)
+            ring.close()
+            ring.shm.unlink()
+        self.rings.clear()
+
+        CREATED_NAMES.discard(self.name)
+        self.directory.close()
+        self.directory.unlink()
+
+
+class TickBusReader:
+    """
+    Reader of tick bus, any number of them in other processes.
+    """
+
+    def __init__(self, name: str = DEFAULT_BUS_NAME, gateway_name: str = "TICKBUS"):
+        """
+        FileNotFoundError is raised if bus is not created yet.
+        """
+        if not SHARED_MEMORY_AVAILABLE:
+            raise RuntimeError("当前Python版本不支持共享内存，需要3.8及以上版本")
+
+        self.name: str = name
+        self.gateway_name: str = gateway_name
+
+        self.directory: SharedMemory = attach_shared_memory(name)
+
+        header = HEADER_STRUCT.unpack_from(self.directory.buf, 0)
+        magic, version, self.session, _, _, self.capacity, self.max_symbols, _ = header
+
+        if magic != MAGIC or version != VERSION:
+            self.directory.close()
+            raise ValueError("不是有效的行情总线共享内存")
+
+        # Index and name of contracts in directory
+        self.symbols: Dict[str, Tuple[int, str]] = {}
+        self.rings: Dict[str, TickRing] = {}
+
+        # Contracts listed with product, size and pricetick by writer
+        self.contracts: Dict[str, ContractData] = {}
+
+        # Number of ticks read of each subscribed contract
+        self.cursors: Dict[str, int] = {}
+
+    def is_active(self) -> bool:
+        """
+        Whether writer of the bus is still running. A new reader should
+        be created after writer restarted.
+        """
+        header = HEADER_STRUCT.unpack_from(self.directory.buf, 0)
+        return header[2] == self.session and bool(header[3])
+
+    def refresh(self) -> None:
+        """
+        Load contracts added into directory since last time.
+        """
+        count = HEADER_STRUCT.unpack_from(self.directory.buf, 0)[-1]
+
+        for index in range(len(self.symbols), count):
+            vt_symbol, name, product, size, pricetick, min_volume = ENTRY_STRUCT.unpack_from(
+                self.directory.buf,
+                HEADER_STRUCT.size + ENTRY_STRUCT.size * index
+            )
+            vt_symbol = vt_symbol.rstrip(b"\x00").decode("UTF-8")
+            name = name.rstrip(b"\x00").decode("UTF-8", errors="ignore")
+            self.symbols[vt_symbol] = (index, name)
+
+            product = product.rstrip(b"\x00").decode("UTF-8")
+            if product:
+                symbol, exchange_value = vt_symbol.rsplit(".", 1)
+
+                self.contracts[vt_symbol] = ContractData(
+                    gateway_name=self.gateway_name,
+                    symbol=symbol,
+                    exchange=Exchange(exchange_value),
+                    name=name,
+                    product=Product(product),
+                    size=size,
+                    pricetick=pricetick,
+                    min_volume=min_volume
+                )
+
+    def get_symbols(self) -> List[str]:
+        """"""
+        self.refresh()
+        return list(self.symbols.keys())
+
+    def get_ring(self, vt_symbol: str) -> Optional[TickRing]:
+        """"""
+        ring = self.rings.get(vt_symbol, None)
+        if ring:
+            return ring
+
+        if vt_symbol not in self.symbols:
+            self.refresh()
+            if vt_symbol not in self.symbols:
+                return None
+
+        # Ring is removed if writer closed
+        index, _ = self.symbols[vt_symbol]
+        try:
+            shm = attach_shared_memory(get_ring_name(self.name, index))
+        except FileNotFoundError:
+            return None
+
+        ring = TickRing(shm, self.capacity)
+        self.rings[vt_symbol] = ring
+        return ring
+
+    def get_tick(self, vt_symbol: str) -> Optional[TickData]:
+        """
+        Get the latest tick of contract.
+        """
+        ring = self.get_ring(vt_symbol)
+        if not ring:
+            return None
+
+        count = ring.count
+        if not count:
+            return None
+
+        record = ring.read(count - 1)
+        if not record:
+            return None
+
+        return self.create_tick(vt_symbol, record)
+
+    def subscribe(self, vt_symbol: str) -> None:
+        """
+        Receive ticks of contract written after now by poll.
+        """
+        ring = self.get_ring(vt_symbol)
+
+        if ring:
+            self.cursors[vt_symbol] = ring.count
+        else:
+            self.cursors[vt_symbol] = 0
+
+    def unsubscribe(self, vt_symbol: str) -> None:
+        """"""
+        self.cursors.pop(vt_symbol, None)
+
+    def poll(self) -> List[TickData]:
+        """
+        Get new ticks of subscribed contracts since last poll. Ticks
+        overwritten before being read are skipped.
+        """
+        ticks = []
+
+        for vt_symbol, cursor in self.cursors.items():
+            ring = self.rings.get(vt_symbol, None) or self.get_ring(vt_symbol)
+            if not ring:
+                continue
+
+            count = ring.count
+            if count == cursor:
+                continue
+
+            cursor = max(cursor, count - ring.capacity)
+
+            for n in range(cursor, count):
+                record = ring.read(n)
+                if record:
+                    ticks.append(self.create_tick(vt_symbol, record))
+
+            self.cursors[vt_symbol] = count
+
+        return ticks
+
+    def create_tick(self, vt_symbol: str, record: tuple) -> TickData:
+        """"""
+        symbol, exchange_value = vt_symbol.rsplit(".", 1)
+        _, name = self.symbols[vt_symbol]
+
+        tick = TickData(
+            gateway_name=self.gateway_name,
+            symbol=symbol,
+            exchange=Exchange(exchange_value),
+            datetime=DB_TZ.localize(EPOCH + timedelta(microseconds=record[0])),
+            name=name
+        )
+        tick.__dict__.update(zip(TickFrame.float_fields, record[1:]))
+        return tick
+
+    def close(self) -> None:
+        """"""
+        for ring in self.rings.values():
+            ring.close()
+        self.rings.clear()
+        self.cursors.clear()
+
+        self.directory.close()
+
+
+class TickBusEngine(BaseEngine):
+    """
+    Write every tick received by main engine into tick bus.
+    """
+
+    def __init__(self, main_engine: MainEngine, event_engine: EventEngine):
+        """"""
+        super().__init__(main_engine, event_engine, "tick_bus")
+
+        self.bus: Optional[TickBus] = None
+
+        try:
+            self.bus = TickBus()
+        except RuntimeError as ex:
+            self.main_engine.write_log(f"行情总线启动失败：{ex}")
+            return
+
+        self.event_engine.register(EVENT_TICK, self.process_tick_event)
+
+    def process_tick_event(self, event: Event) -> None:
+        """"""
+        tick = event.data
+
+        # Contract is only needed for the first tick
+        if tick.vt_symbol in self.bus.rings:
+            self.bus.put(tick)
+        else:
+            self.bus.put(tick, self.main_engine.get_contract(tick.vt_symbol))
+
+    def close(self) -> None:
+        """"""
+        if not self.bus:
+            return
+
+        self.event_engine.unregister(EVENT_TICK, self.process_tick_event)
+        self.bus.close()
+
+
+def get_ring_name(name: str, index: int) -> str:
+    """"""
+    return f"{name}_{index}"
+
+
+def create_directory(name: str, size: int) -> "SharedMemory":
+    """
+    Create directory shared memory of bus. The one left by writer
+    exited without closing is replaced, but never the one of writer
+    still running.
+    """
+    try:
+        shm = attach_shared_memory(name)
+    except FileNotFoundError:
+        return create_shared_memory(name, size)
+
+    if len(shm.buf) >= HEADER_STRUCT.size:
+        header = HEADER_STRUCT.unpack_from(shm.buf, 0)
+    else:
+        header = None
+    shm.close()
+
+    if header and header[0] == MAGIC and header[1] == VERSION:
+        active, pid = header[3], header[4]
+
+        if active and is_process_alive(pid):
+            raise RuntimeError(f"行情总线{name}已被进程{pid}使用")
+
+    return create_shared_memory(name, size)
+
+
+def is_process_alive(pid: int) -> bool:
+    """"""
+    if pid == os.getpid():
+        return True
+
+    if os.name == "nt":
+        import ctypes
+
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            return False
+
+        exit_code = ctypes.c_ulong()
+        kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+        kernel32.CloseHandle(handle)
+        return exit_code.value == STILL_ACTIVE
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def create_shared_memory(name: str, size: int) -> "SharedMemory":
+    """
+    Create shared memory of name, replacing the one left by programme
+    exited without closing.
+    """
+    try:
+        shm = SharedMemory(name=name, create=True, size=size)
+    except FileExistsError:
+        shm = open_shared_memory(name)
+        shm.close()
+        shm.unlink()
+        shm = SharedMemory(name=name, create=True, size=size)
+
+    CREATED_NAMES.add(name)
+    return shm
+
+
+def attach_shared_memory(name: str) -> "SharedMemory":
+    """
+    Open shared memory created by writer, which must not be unlinked by
+    resource tracker when reader process exits.
+    """
+    shm = open_shared_memory(name)
+
+    # Before Python 3.13, opened shared memory is always registered
+    if sys.version_info < (3, 13) and os.name != "nt" and name not in CREATED_NAMES:
+        resource_tracker.unregister(shm._name, "shared_memory")
+
+    return shm
@@ -21,6 +21,7 @@ from .widget import (
     ActiveOrderMonitor,
     ConnectDialog,
     ContractManager,
+    EventStatisticsMonitor,
     TradingWidget,
     AboutDialog,
     GlobalDialog
@@ -154,6 +155,13 @@ class MainWindow(QtWidgets.QMainWindow):
             partial(self.open_widget, CodeEditor, "editor")
         )
 
+        self.add_menu_action(
+            help_menu,
+            "事件统计",
+            "test.ico",
+            partial(self.open_widget, EventStatisticsMonitor, "statistics")
+        )
+
         self.add_menu_action(
             help_menu, "还原窗口", "restore.ico", self.restore_window_setting
         )
@@ -5,6 +5,7 @@ Basic widgets for VN Trader.
 import csv
 import platform
 from enum import Enum
+from threading import Event as ThreadingEvent
 from typing import Any, Dict
 from copy import copy
 from tzlocal import get_localzone
@@ -23,7 +24,8 @@ from ..event import (
     EVENT_ORDER,
     EVENT_POSITION,
     EVENT_ACCOUNT,
-    EVENT_LOG
+    EVENT_LOG,
+    EVENT_STATISTICS
 )
 from ..object import OrderRequest, SubscribeRequest, PositionData
 from ..utility import load_json, save_json, get_digits
@@ -36,6 +38,38 @@ COLOR_BID = QtGui.QColor(255, 174, 201)
 COLOR_ASK = QtGui.QColor(160, 255, 160)
 COLOR_BLACK = QtGui.QColor("black")
 
+# Seconds that conflated handler waits for UI to process an event
+CONFLATED_TIMEOUT = 0.1
+
+
+class ConflatedEmitter:
+    """
+    Conflated handler which emits event to Qt signal, and then waits
+    until the UI thread has processed it (or timeout).
+
+    Events arriving while the UI is busy are conflated by event engine
+    instead of piling up in Qt event queue. Must be created in the UI
+    thread, after slots of the signal are connected.
+    """
+
+    def __init__(self, signal: QtCore.pyqtBoundSignal):
+        """"""
+        self.signal: QtCore.pyqtBoundSignal = signal
+        self.processed: ThreadingEvent = ThreadingEvent()
+
+        # Called after all slots connected before
+        self.signal.connect(self.set_processed)
+
+    def __call__(self, event: Event, dropped: int) -> None:
+        """"""
+        self.processed.clear()
+        self.signal.emit(event)
+        self.processed.wait(CONFLATED_TIMEOUT)
+
+    def set_processed(self, event: Event) -> None:
+        """"""
+        self.processed.set()
+
 
 class BaseCell(QtWidgets.QTableWidgetItem):
     """
@@ -192,6 +226,7 @@ class BaseMonitor(QtWidgets.QTableWidget):
     event_type: str = ""
     data_key: str = ""
     sorting: bool = False
+    conflated: bool = False
     headers: Dict[str, dict] = {}
 
     signal: QtCore.pyqtSignal = QtCore.pyqtSignal(Event)
@@ -249,8 +284,18 @@ class BaseMonitor(QtWidgets.QTableWidget):
         """
         Register event handler into event engine.
         """
-        if self.event_type:
-            self.signal.connect(self.process_event)
+        if not self.event_type:
+            return
+
+        self.signal.connect(self.process_event)
+
+        # Only the latest data of each key is displayed if conflated
+        if self.conflated:
+            self.emitter = ConflatedEmitter(self.signal)
+            self.event_engine.register_conflated(
+                self.event_type, self.emitter, self.data_key
+            )
+        else:
             self.event_engine.register(self.event_type, self.signal.emit)
 
     def process_event(self, event: Event) -> None:
@@ -374,6 +419,7 @@ class TickMonitor(BaseMonitor):
     event_type = EVENT_TICK
     data_key = "vt_symbol"
     sorting = True
+    conflated = True
 
     headers = {
         "symbol": {"display": "代码", "cell": BaseCell, "update": False},
@@ -1065,6 +1111,113 @@ class ContractManager(QtWidgets.QWidget):
         self.contract_table.resizeColumnsToContents()
 
 
+class EventStatisticsMonitor(QtWidgets.QWidget):
+    """
+    Show queue wait and handler cost recorded by event engine.
+    """
+
+    signal: QtCore.pyqtSignal = QtCore.pyqtSignal(Event)
+
+    type_headers: list = [
+        "事件类型", "数量", "平均等待(us)", "最大等待(us)", "平均处理(us)", "最大处理(us)"
+    ]
+    handler_headers: list = ["回调函数", "调用次数", "平均耗时(us)", "最大耗时(us)"]
+
+    def __init__(self, main_engine: MainEngine, event_engine: EventEngine):
+        """"""
+        super().__init__()
+
+        self.main_engine: MainEngine = main_engine
+        self.event_engine: EventEngine = event_engine
+
+        self.init_ui()
+        self.register_event()
+
+    def init_ui(self) -> None:
+        """"""
+        self.setWindowTitle("事件统计")
+        self.resize(1000, 800)
+
+        self.enable_check = QtWidgets.QCheckBox("启用统计")
+        self.enable_check.setChecked(self.event_engine.is_statistics_enabled())
+        self.enable_check.stateChanged.connect(self.switch_statistics)
+
+        reset_button = QtWidgets.QPushButton("重置")
+        reset_button.clicked.connect(self.event_engine.reset_statistics)
+
+        self.depth_label = QtWidgets.QLabel()
+
+        self.type_table = self.create_table(self.type_headers)
+        self.handler_table = self.create_table(self.handler_headers)
+
+        hbox = QtWidgets.QHBoxLayout()
+        hbox.addWidget(self.enable_check)
+        hbox.addWidget(reset_button)
+        hbox.addStretch()
+        hbox.addWidget(self.depth_label)
+
+        vbox = QtWidgets.QVBoxLayout()
+        vbox.addLayout(hbox)
+        vbox.addWidget(self.type_table)
+        vbox.addWidget(self.handler_table)
+        self.setLayout(vbox)
+
+    def create_table(self, headers: list) -> QtWidgets.QTableWidget:
+        """"""
+        table = QtWidgets.QTableWidget()
+        table.setColumnCount(len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.verticalHeader().setVisible(False)
+        table.setEditTriggers(table.NoEditTriggers)
+        table.setAlternatingRowColors(True)
+        return table
+
+    def register_event(self) -> None:
+        """"""
+        self.signal.connect(self.process_statistics_event)
+        self.event_engine.register(EVENT_STATISTICS, self.signal.emit)
+
+    def switch_statistics(self, state: int) -> None:
+        """"""
+        if state:
+            self.event_engine.enable_statistics()
+        else:
+            self.event_engine.disable_statistics()
+
+    def process_statistics_event(self, event: Event) -> None:
+        """"""
+        data = event.data
+        self.depth_label.setText(f"最大队列深度：{data['max_queue_depth']}")
+
+        type_rows = [
+            [type, d["wait"]["count"], d["wait"]["avg"], d["wait"]["max"],
+             d["process"]["avg"], d["process"]["max"]]
+            for type, d in data["types"].items()
+        ]
+        self.update_table(self.type_table, type_rows)
+
+        handler_rows = [
+            [name, d["count"], d["avg"], d["max"]]
+            for name, d in data["handlers"].items()
+        ]
+        self.update_table(self.handler_table, handler_rows)
+
+    def update_table(self, table: QtWidgets.QTableWidget, rows: list) -> None:
+        """
+        Show rows sorted by the last column, slowest first.
+        """
+        rows.sort(key=lambda row: row[-1], reverse=True)
+
+        table.setRowCount(len(rows))
+        for row, values in enumerate(rows):
+            for column, value in enumerate(values):
+                if isinstance(value, float):
+                    value = f"{value:.1f}"
+                table.setItem(row, column, BaseCell(value, None))
+
+        table.resizeColumnsToContents()
+
+
 class AboutDialog(QtWidgets.QDialog):
     """
     About VN Trader.
@@ -4,9 +4,13 @@ General utility functions.
 
 import json
 import logging
+import os
 import sys
 from pathlib import Path
-from typing import Callable, Dict, Tuple, Union, Optional
+from queue import Empty, Queue
+from threading import Event, Thread
+from time import time
+from typing import Any, Callable, Dict, List, Tuple, Union, Optional
 from decimal import Decimal
 from math import floor, ceil
 
@@ -14,6 +18,7 @@ import numpy as np
 import talib
 
 from .object import BarData, TickData
+from .frame import BarFrame
 from .constant import Exchange, Interval
 
 
@@ -107,15 +112,178 @@ def load_json(filename: str) -> dict:
 def save_json(filename: str, data: dict) -> None:
     """
     Save data into json file in temp path.
+
+    Data is written into a temp file first and then renamed, so that the
+    json file is never left half written.
     """
     filepath = get_file_path(filename)
-    with open(filepath, mode="w+", encoding="UTF-8") as f:
+    temp_filepath = filepath.with_name(filepath.name + ".tmp")
+
+    with open(temp_filepath, mode="w+", encoding="UTF-8") as f:
         json.dump(
             data,
             f,
             indent=4,
             ensure_ascii=False
         )
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(temp_filepath, filepath)
+
+
+class JsonStore:
+    """
+    Write-behind storage of json file with data of different keys.
+
+    Changed keys are appended into a journal file by a background thread
+    at once, and the whole json file is saved at most once per interval.
+    Journal is replayed when loaded, so that no change is lost between
+    two saves if the programme crashes.
+    """
+
+    def __init__(self, filename: str, interval: float = 1):
+        """"""
+        self.filename: str = filename
+        self.interval: float = interval
+
+        self.filepath: Path = get_file_path(filename)
+        self.journal_path: Path = self.filepath.with_name(self.filepath.name + ".journal")
+
+        self.data: Dict[str, Any] = {}
+
+        self.queue: Queue = Queue()
+        self.thread: Thread = None
+
+    def load(self) -> dict:
+        """
+        Load data from json file and journal, then start writing thread.
+        """
+        self.data = load_json(self.filename)
+
+        changed = False
+        if self.journal_path.exists():
+            with open(self.journal_path, mode="r", encoding="UTF-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # The last record may be half written.
+                        break
+
+                    self.apply_record(self.data, record)
+                    changed = True
+
+        if changed:
+            save_json(self.filename, self.data)
+
+        if self.journal_path.exists():
+            self.journal_path.unlink()
+
+        if not self.thread:
+            self.thread = Thread(target=self.run, args=(dict(self.data),), daemon=True)
+            self.thread.start()
+
+        return self.data
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Update value of key, which is saved by writing thread later.
+        """
+        self.data[key] = value
+        self.queue.put(json.dumps([key, value], ensure_ascii=False))
+
+    def remove(self, key: str) -> None:
+        """"""
+        self.data.pop(key, None)
+        self.queue.put(json.dumps([key], ensure_ascii=False))
+
+    def flush(self) -> None:
+        """
+        Block until all changes before are saved into json file.
+        """
+        if not self.thread:
+            return
+
+        event = Event()
+        self.queue.put(event)
+        event.wait()
+
+    def close(self) -> None:
+        """
+        Save all changes and stop writing thread.
+        """
+        if not self.thread:
+            return
+
+        self.queue.put(None)
+        self.thread.join()
+        self.thread = None
+
+    def run(self, data: dict) -> None:
+        """
+        Data is copied for writing thread, and changes are applied from
+        journal records in queue.
+        """
+        active = True
+        dirty = False
+        save_time = time()
+
+        while active:
+            # Wait until next save time only if there is unsaved change
+            if dirty:
+                timeout = max(save_time + self.interval - time(), 0)
+            else:
+                timeout = None
+
+            try:
+                item = self.queue.get(timeout=timeout)
+                items = [item]
+            except Empty:
+                items = []
+
+            # Get all records available and append them in one write
+            while not self.queue.empty():
+                items.append(self.queue.get())
+
+            records: List[str] = []
+            events: List[Event] = []
+
+            for item in items:
+                if item is None:
+                    active = False
+                elif isinstance(item, Event):
+                    events.append(item)
+                else:
+                    records.append(item)
+
+            if records:
+                with open(self.journal_path, mode="a", encoding="UTF-8") as f:
+                    f.write("\n".join(records) + "\n")
+
+                for record in records:
+                    self.apply_record(data, json.loads(record))
+                dirty = True
+
+            if dirty and (not active or events or time() >= save_time + self.interval):
+                save_json(self.filename, data)
+
+                if self.journal_path.exists():
+                    self.journal_path.unlink()
+
+                dirty = False
+                save_time = time()
+
+            for event in events:
+                event.set()
+
+    @staticmethod
+    def apply_record(data: dict, record: list) -> None:
+        """"""
+        if len(record) == 2:
+            data[record[0]] = record[1]
+        else:
+            data.pop(record[0], None)
 
 
 def round_to(value: float, target: float) -> float:
@@ -467,6 +635,32 @@ class ArrayManager(object):
         self.volume_array[-1] = bar.volume
         self.open_interest_array[-1] = bar.open_interest
 
+    def update_frame(self, frame: BarFrame) -> None:
+        """
+        Update a series of bar data into array manager at once, same
+        as calling update_bar for every bar in frame.
+        """
+        n = min(len(frame), self.size)
+        if not n:
+            return
+
+        self.count += len(frame)
+        if not self.inited and self.count >= self.size:
+            self.inited = True
+
+        arrays = [
+            (self.open_array, frame.open_price),
+            (self.high_array, frame.high_price),
+            (self.low_array, frame.low_price),
+            (self.close_array, frame.close_price),
+            (self.volume_array, frame.volume),
+            (self.open_interest_array, frame.open_interest),
+        ]
+
+        for array, column in arrays:
+            array[:-n] = array[n:]
+            array[-n:] = column[-n:]
+
     @property
     def open(self) -> np.ndarray:
         """